@@ -0,0 +1,297 @@
+# benchmarks/harness.py
+"""Load-test harness for the monitoring API.
+
+Runs main.app under uvicorn against a stub GitHub API, the fake LLM and
+mongomock (or a real mongod via --mongo-url), replays a webhook storm and
+scheduled sweeps, and reports throughput, latency percentiles and memory.
+Exits non-zero when a phase, the stored results or the rollups come out
+empty or inconsistent, so a subsystem that silently writes nothing fails.
+
+    cd backend
+    python -m benchmarks.harness --repos 50 --events 500 --concurrency 32
+"""
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import resource
+import tempfile
+import threading
+import contextlib
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.stub_github import StubGitHub
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(name, latencies, elapsed):
+    return {
+        "phase": name,
+        "count": len(latencies),
+        "throughput_per_s": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "max_ms": max(latencies, default=0) * 1000
+    }
+
+
+def use_mongomock():
+    """Point pymongo and motor at one shared in-memory mongomock store."""
+    import mongomock
+    import mongomock_motor
+    import pymongo
+    import motor.motor_asyncio
+
+    # pymongo 4.11+ passes `sort` to every bulk update/replace; mongomock's builder predates it
+    builder = mongomock.collection.BulkOperationBuilder
+    for name in ("add_update", "add_replace"):
+        method = getattr(builder, name)
+        setattr(builder, name, lambda self, *args, sort=None, _method=method, **kwargs: _method(self, *args, **kwargs))
+
+    shared = mongomock.MongoClient()
+    pymongo.MongoClient = lambda *args, **kwargs: shared
+    motor.motor_asyncio.AsyncIOMotorClient = (
+        lambda *args, **kwargs: mongomock_motor.AsyncMongoMockClient(mock_mongo_client=shared)
+    )
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class AgentRunRecorder:
+    """Wraps main.monitor_repository_sync to time every agent run."""
+
+    def __init__(self, api):
+        self.api = api
+        self.original = api.monitor_repository_sync
+        self.durations = []
+        self._lock = threading.Lock()
+        api.monitor_repository_sync = self
+
+    def __call__(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self.original(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.durations.append(time.perf_counter() - started)
+
+    def wait_for(self, expected, timeout):
+        """Wait for `expected` runs, or until the dispatcher drains: triggers for a
+        repository that is still queued are coalesced into one run."""
+        deadline = time.monotonic() + timeout
+        dispatcher = self.api.get_monitor_dispatcher()
+        while len(self.durations) < expected and time.monotonic() < deadline:
+            time.sleep(0.05)
+            if dispatcher.idle():
+                break
+        return len(self.durations) >= expected
+
+
+async def replay(base_url, requests, concurrency):
+    import httpx
+
+    latencies = []
+    statuses = {}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=120) as client:
+        async def send(request):
+            method, path, kwargs = request
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.request(method, path, **kwargs)
+                latencies.append(time.perf_counter() - started)
+                body = response.json() if response.headers.get("content-type", "").startswith("application/json") else {}
+                status = body.get("status", response.status_code) if isinstance(body, dict) else response.status_code
+                statuses[status] = statuses.get(status, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(send(request) for request in requests))
+        elapsed = time.perf_counter() - started
+
+    return latencies, elapsed, statuses
+
+
+def webhook_request(owner, repo, run):
+    payload = {
+        "action": "completed",
+        "repository": {"name": repo, "owner": {"login": owner}},
+        "workflow_run": {"id": run["id"], "status": "completed", "conclusion": run["conclusion"]}
+    }
+    return ("POST", "/webhook", {"json": payload, "headers": {"x-github-event": "workflow_run"}})
+
+
+def run(args):
+    stub = StubGitHub(latency=args.github_latency, log_lines=args.log_lines,
+                      failure_rate=args.failure_rate, seed=args.seed)
+    stub.start()
+
+    archive_dir = tempfile.mkdtemp(prefix="bench-logs-")
+    os.environ.update({
+        "GITHUB_API_URL": stub.url,
+        "LLM_PROVIDER": "fake",
+        "FAKE_LLM_LATENCY": str(args.llm_latency),
+        "LOG_ARCHIVE_DIR": archive_dir,
+        "MONGODB_DATABASE": args.mongo_database
+    })
+    if args.mongo_url:
+        os.environ["MONGODB_URL"] = args.mongo_url
+    else:
+        use_mongomock()
+
+    if args.tracemalloc:
+        tracemalloc.start()
+
+    import logging
+    import uvicorn
+    import main as api
+
+    logging.getLogger().setLevel(logging.INFO if args.verbose else logging.WARNING)
+    recorder = AgentRunRecorder(api)
+
+    if args.mongo_url:
+        api.mongo_client.drop_database(args.mongo_database)
+
+    owner = "bench"
+    repo_ids = {}
+    for i in range(args.repos):
+        name = f"repo-{i}"
+        result = api.repositories_collection.insert_one({
+            "url": f"https://github.com/{owner}/{name}",
+            "name": name,
+            "owner": owner,
+            "access_token": "bench-token",
+            "is_active": True,
+            "created_at": api.datetime.now()
+        })
+        repo_ids[name] = str(result.inserted_id)
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(api.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    base_url = f"http://127.0.0.1:{port}"
+
+    report = {"config": vars(args), "phases": []}
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(open(os.devnull, "w"))
+    with quiet:
+        # Webhook storm: each event is a freshly completed run on a random repository
+        names = list(repo_ids)
+        requests = []
+        for i in range(args.events):
+            name = names[stub.random.randrange(len(names))]
+            requests.append(webhook_request(owner, name, stub.complete_run(owner, name)))
+        latencies, elapsed, statuses = asyncio.run(replay(base_url, requests, args.concurrency))
+        report["phases"].append({**summarize("webhook", latencies, elapsed), "statuses": statuses})
+
+        accepted = statuses.get("accepted", 0)
+        started = time.perf_counter()
+        recorder.wait_for(accepted, args.timeout)
+        drained = time.perf_counter() - started
+        report["phases"].append({**summarize("agent_run (storm)", recorder.durations, elapsed + drained)})
+
+        # Scheduled sweeps: a manual trigger for every repository
+        for sweep in range(args.sweeps):
+            before = len(recorder.durations)
+            for name in names:
+                stub.complete_run(owner, name)
+            requests = [("POST", f"/api/repositories/{repo_id}/monitor", {}) for repo_id in repo_ids.values()]
+            latencies, elapsed, statuses = asyncio.run(replay(base_url, requests, args.concurrency))
+            report["phases"].append({**summarize(f"sweep {sweep + 1} trigger", latencies, elapsed),
+                                     "statuses": statuses})
+            started = time.perf_counter()
+            recorder.wait_for(before + len(requests), args.timeout)
+            drained = time.perf_counter() - started
+            report["phases"].append(summarize(f"sweep {sweep + 1} agent_run",
+                                              recorder.durations[before:], elapsed + drained))
+
+    server.should_exit = True
+    stub.stop()
+
+    report["memory"] = {"max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}
+    if args.tracemalloc:
+        report["memory"]["python_peak_mb"] = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+    report["github_requests"] = stub.requests
+    report["issues_created"] = sum(len(issues) for issues in stub.issues.values())
+    report["results_stored"] = api.monitoring_results_collection.count_documents({})
+    # Collapsed successes stand for several runs; rollups count each of them
+    report["runs_stored"] = sum(doc.get("occurrences") or 1 for doc in
+                                api.monitoring_results_collection.find({}, {"occurrences": 1}))
+    report["rollup_runs"] = sum(doc.get("runs", 0) for doc in api.rollups_collection.find(
+        {"repo_id": None, "granularity": "hour"}, {"runs": 1}))
+
+    if args.mongo_url:
+        api.mongo_client.drop_database(args.mongo_database)
+    return report
+
+
+def check_report(report) -> list:
+    """Problems showing that a subsystem silently wrote nothing; empty when the run is sound."""
+    problems = []
+    for phase in report["phases"]:
+        if phase["count"] == 0:
+            problems.append(f"phase '{phase['phase']}' recorded no requests or agent runs")
+    if report["results_stored"] == 0:
+        problems.append("no monitoring results were stored")
+    if report["rollup_runs"] != report["runs_stored"]:
+        problems.append(f"rollups count {report['rollup_runs']} runs but {report['runs_stored']} were stored")
+    return problems
+
+
+def print_report(report):
+    print(f"{'phase':<26}{'count':>8}{'per s':>10}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for phase in report["phases"]:
+        print(f"{phase['phase']:<26}{phase['count']:>8}{phase['throughput_per_s']:>10.1f}"
+              f"{phase['p50_ms']:>10.1f}{phase['p99_ms']:>10.1f}{phase['max_ms']:>10.1f}")
+    for key in ("memory", "github_requests", "issues_created", "results_stored", "rollup_runs"):
+        print(f"{key}: {report[key]}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the monitoring API with stubbed dependencies")
+    parser.add_argument("--repos", type=int, default=20)
+    parser.add_argument("--events", type=int, default=200, help="webhook events in the storm")
+    parser.add_argument("--sweeps", type=int, default=2, help="scheduled sweeps over every repository")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent HTTP clients")
+    parser.add_argument("--failure-rate", type=float, default=0.5)
+    parser.add_argument("--log-lines", type=int, default=5000)
+    parser.add_argument("--github-latency", type=float, default=0.02, help="seconds per stub GitHub request")
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="seconds per fake LLM call")
+    parser.add_argument("--mongo-url", help="use a real mongod instead of mongomock")
+    parser.add_argument("--mongo-database", default="github_monitor_bench")
+    parser.add_argument("--timeout", type=float, default=300, help="seconds to wait for agent runs to drain")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--tracemalloc", action="store_true", help="also report the Python allocation peak")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--verbose", action="store_true")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = run(args)
+    print_report(report)
+    report["problems"] = check_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+    for problem in report["problems"]:
+        print(f"FAIL: {problem}", file=sys.stderr)
+    sys.exit(1 if report["problems"] else 0)
@@ -0,0 +1,138 @@
+# benchmarks/startup.py
+"""Startup benchmark for the API process.
+
+Measures `import main` with `python -X importtime` (no MongoDB needed: the
+module no longer touches the database at import), lists the slowest imports,
+flags heavy agent/LLM modules that should only load on the first monitoring
+run, and times how long uvicorn takes to answer its first request.
+
+    cd backend
+    python -m benchmarks.startup --runs 5
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import statistics
+import subprocess
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported lazily by the monitoring path; their presence at startup is a regression
+HEAVY_MODULES = ("langgraph", "langchain_core", "langchain_groq", "github", "src.agent.graph", "src.llm.client")
+
+
+def child_env(mongo_url):
+    # An unreachable server proves that import and startup do not wait on MongoDB
+    return {**os.environ, "MONGODB_URL": mongo_url, "PYTHONDONTWRITEBYTECODE": "1"}
+
+
+def parse_importtime(stderr: str) -> list:
+    """Return (module, self_us, cumulative_us, depth) for every `-X importtime` line."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), int(self_us), int(cumulative_us), depth))
+    return rows
+
+
+def measure_import(mongo_url: str) -> dict:
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=BACKEND_DIR, env=child_env(mongo_url), capture_output=True, text=True
+    )
+    wall = time.perf_counter() - started
+    if proc.returncode != 0:
+        raise RuntimeError(f"import main failed:\n{proc.stderr[-2000:]}")
+    rows = parse_importtime(proc.stderr)
+    main_row = next(row for row in rows if row[0] == "main")
+    return {
+        "wall_s": wall,
+        "import_main_s": main_row[2] / 1e6,
+        "rows": rows,
+        "heavy_loaded": sorted({row[0] for row in rows if row[0] in HEAVY_MODULES})
+    }
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_ready(mongo_url: str, path: str, timeout: float) -> float:
+    """Seconds from spawning uvicorn until `path` answers."""
+    port = free_port()
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=child_env(mongo_url), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        deadline = started + timeout
+        while time.perf_counter() < deadline:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=1):
+                    return time.perf_counter() - started
+            except Exception:
+                time.sleep(0.01)
+        raise RuntimeError(f"{path} did not answer within {timeout}s")
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def run(args) -> dict:
+    imports = [measure_import(args.mongo_url) for _ in range(args.runs)]
+    ready = [measure_ready(args.mongo_url, args.path, args.timeout) for _ in range(args.runs)]
+
+    # Slowest top-level imports of main (depth 1), from the last run
+    top = sorted((row for row in imports[-1]["rows"] if row[3] == 1), key=lambda row: row[2], reverse=True)
+    return {
+        "runs": args.runs,
+        "import_main_s": statistics.median(run["import_main_s"] for run in imports),
+        "import_process_s": statistics.median(run["wall_s"] for run in imports),
+        "ready_s": statistics.median(ready),
+        "ready_path": args.path,
+        "heavy_modules_at_import": imports[-1]["heavy_loaded"],
+        "slowest_imports": [{"module": name, "cumulative_ms": cumulative / 1000}
+                            for name, _, cumulative, _ in top[:args.top]]
+    }
+
+
+def print_report(report):
+    print(f"import main (median of {report['runs']}): {report['import_main_s'] * 1000:.0f} ms "
+          f"({report['import_process_s'] * 1000:.0f} ms with interpreter start)")
+    print(f"uvicorn ready on {report['ready_path']}: {report['ready_s'] * 1000:.0f} ms")
+    print(f"heavy modules loaded at import: {', '.join(report['heavy_modules_at_import']) or 'none'}")
+    print("slowest imports:")
+    for row in report["slowest_imports"]:
+        print(f"  {row['module']:<40}{row['cumulative_ms']:>10.1f} ms")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Measure API import and startup time")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="number of slowest imports to list")
+    parser.add_argument("--path", default="/", help="endpoint polled for readiness")
+    parser.add_argument("--mongo-url", default="mongodb://127.0.0.1:9/?serverSelectionTimeoutMS=2000")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--json", help="write the report to this file")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    report = run(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    sys.exit(1 if report["heavy_modules_at_import"] else 0)
@@ -0,0 +1,243 @@
+# benchmarks/stub_github.py
+import re
+import json
+import time
+import base64
+import random
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+WORKFLOW_PATH = ".github/workflows/ci.yml"
+WORKFLOW_YAML = """name: CI
+on: [push]
+jobs:
+  build:
+    runs-on: ubuntu-latest
+    steps:
+      - uses: actions/checkout@v4
+      - uses: actions/setup-node@v4
+        with:
+          node-version: 16
+      - run: npm ci
+      - run: npm test
+"""
+
+
+class StubGitHub:
+    """In-process fake of the GitHub REST endpoints the agent uses, plus the
+    GraphQL repository/check-suite query used by batched health checks.
+
+    Every response is delayed by `latency` seconds. Job logs are
+    `log_lines` lines long and end with an npm error.
+    """
+
+    def __init__(self, latency: float = 0.0, log_lines: int = 2000, failure_rate: float = 0.5, seed: int = 0):
+        self.latency = latency
+        self.log_lines = log_lines
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.runs = {}
+        self.issues = {}
+        # (owner, repo, branch) -> commit SHA of branches created through the Git Data API
+        self.refs = {}
+        self.requests = 0
+        self._next_id = 1000
+        self._clock = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        self._lock = threading.Lock()
+        self._log = None
+        self._server = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> str:
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                stub._handle(self, "GET")
+
+            def do_POST(self):
+                stub._handle(self, "POST")
+
+            def do_PUT(self):
+                stub._handle(self, "PUT")
+
+            def do_PATCH(self):
+                stub._handle(self, "PATCH")
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self.url
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+
+    def complete_run(self, owner: str, repo: str, conclusion: str = None) -> dict:
+        """Record a newly completed workflow run, as if a webhook were about to fire for it."""
+        with self._lock:
+            self._next_id += 1
+            self._clock += timedelta(seconds=1)
+            if conclusion is None:
+                conclusion = "failure" if self.random.random() < self.failure_rate else "success"
+            stamp = self._clock.strftime("%Y-%m-%dT%H:%M:%SZ")
+            run = {
+                "id": self._next_id,
+                "status": "completed",
+                "conclusion": conclusion,
+                "created_at": stamp,
+                "updated_at": stamp,
+                "path": WORKFLOW_PATH,
+                "head_branch": "main",
+                "head_sha": "a" * 40,
+                "head_commit": {"id": "a" * 40, "tree_id": "b" * 40},
+                "head_repository": {"full_name": f"{owner}/{repo}"},
+                "job_id": self._next_id * 10
+            }
+            self.runs.setdefault((owner, repo), []).insert(0, run)
+            del self.runs[(owner, repo)][20:]
+            return run
+
+    def _logs(self) -> bytes:
+        if self._log is None:
+            lines = [f"2026-01-01T00:00:{i % 60:02d}.0000000Z step {i}: npm info run build ok"
+                     for i in range(max(self.log_lines - 2, 0))]
+            lines += ["npm ERR! code ERESOLVE", "Error: Process completed with exit code 1."]
+            self._log = ("\n".join(lines) + "\n").encode()
+        return self._log
+
+    def _handle(self, handler, method):
+        self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        path = handler.path.split("?", 1)[0]
+        if method in ("POST", "PUT", "PATCH"):
+            length = int(handler.headers.get("content-length") or 0)
+            body = json.loads(handler.rfile.read(length) or b"{}")
+        else:
+            body = None
+
+        status, payload = self._route(method, path, body)
+        # Blob SHAs double as ETags so conditional requests can be answered with 304
+        etag = f'"{payload["sha"]}"' if method == "GET" and isinstance(payload, dict) and "sha" in payload else None
+        if etag and handler.headers.get("If-None-Match") == etag:
+            handler.send_response(304)
+            handler.send_header("ETag", etag)
+            handler.end_headers()
+            return
+        data = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+        handler.send_response(status)
+        handler.send_header("Content-Type", "text/plain" if isinstance(payload, bytes) else "application/json")
+        if etag:
+            handler.send_header("ETag", etag)
+        handler.send_header("Content-Length", str(len(data)))
+        handler.end_headers()
+        handler.wfile.write(data)
+
+    def _graphql(self, body):
+        variables = body.get("variables") or {}
+        data = {}
+        for key in variables:
+            if not key.startswith("o"):
+                continue
+            index = key[1:]
+            owner, repo = variables[key], variables[f"n{index}"]
+            runs = self.runs.get((owner, repo), [])
+            data[f"r{index}"] = {"defaultBranchRef": {"target": {"checkSuites": {"nodes": [
+                {"status": "COMPLETED", "conclusion": run["conclusion"].upper(),
+                 "workflowRun": {"databaseId": run["id"], "updatedAt": run["updated_at"]}}
+                for run in reversed(runs)
+            ]}}}}
+        return 200, {"data": data}
+
+    def _route(self, method, path, body):
+        if path == "/graphql" and method == "POST":
+            return self._graphql(body)
+        match = re.match(r"^/repos/([^/]+)/([^/]+)(/.*)?$", path)
+        if not match:
+            return 404, {"message": "Not Found"}
+        owner, repo, rest = match.group(1), match.group(2), match.group(3) or ""
+        full_name = f"{owner}/{repo}"
+        runs = self.runs.get((owner, repo), [])
+
+        if rest == "" and method == "GET":
+            return 200, {"id": hash(full_name) & 0xffff, "name": repo, "full_name": full_name,
+                         "default_branch": "main", "url": f"{self.url}/repos/{full_name}",
+                         "owner": {"login": owner}}
+
+        if rest == "/actions/runs":
+            return 200, {"total_count": len(runs), "workflow_runs": runs}
+
+        match = re.match(r"^/actions/runs/(\d+)(/jobs)?$", rest)
+        if match:
+            run = next((r for r in runs if r["id"] == int(match.group(1))), None)
+            if not run:
+                return 404, {"message": "Not Found"}
+            if match.group(2):
+                return 200, {"jobs": [{"id": run["job_id"], "name": "build", "conclusion": run["conclusion"]}]}
+            return 200, run
+
+        if re.match(r"^/actions/jobs/\d+/logs$", rest):
+            return 200, self._logs()
+
+        if rest == "/contents/.github/workflows":
+            return 200, [{"name": "ci.yml", "path": WORKFLOW_PATH, "sha": "stubsha", "type": "file"}]
+
+        if rest.startswith("/contents/"):
+            if method == "PUT":
+                return 200, {"commit": {"sha": "0" * 40}, "content": {"sha": "stubsha2"}}
+            return 200, {"name": rest.rsplit("/", 1)[-1], "path": rest[len("/contents/"):], "sha": "stubsha",
+                         "encoding": "base64", "content": base64.b64encode(WORKFLOW_YAML.encode()).decode()}
+
+        if rest.startswith("/branches/"):
+            name = rest[len("/branches/"):]
+            return 200, {"name": name,
+                         "commit": {"sha": self.refs.get((owner, repo, name), "a" * 40),
+                                    "commit": {"tree": {"sha": "b" * 40}}}}
+
+        if rest in ("/git/trees", "/git/commits") and method == "POST":
+            with self._lock:
+                self._next_id += 1
+                return 201, {"sha": f"{self._next_id:040x}"}
+
+        if rest.startswith("/git/refs") and method in ("POST", "PATCH"):
+            ref = body.get("ref") or "refs/" + rest[len("/git/refs/"):]
+            key = (owner, repo, ref[len("refs/heads/"):])
+            with self._lock:
+                if method == "POST" and key in self.refs:
+                    return 422, {"message": "Reference already exists"}
+                self.refs[key] = body["sha"]
+            return 200 if method == "PATCH" else 201, {"ref": ref, "object": {"sha": body["sha"]}}
+
+        if rest == "/pulls" and method == "POST":
+            with self._lock:
+                self._next_id += 1
+                return 201, {"number": self._next_id, "html_url": f"https://github.com/{full_name}/pull/{self._next_id}"}
+
+        match = re.match(r"^/issues/(\d+)/comments$", rest)
+        if match and method == "POST":
+            with self._lock:
+                self._next_id += 1
+                return 201, {"id": self._next_id,
+                             "html_url": f"https://github.com/{full_name}/issues/{match.group(1)}#issuecomment-{self._next_id}"}
+
+        if rest == "/issues" and method == "POST":
+            with self._lock:
+                issues = self.issues.setdefault(full_name, [])
+                number = len(issues) + 1
+                issue = {"number": number, "title": body.get("title"), "state": "open",
+                         "html_url": f"https://github.com/{full_name}/issues/{number}",
+                         "url": f"{self.url}/repos/{full_name}/issues/{number}"}
+                issues.append(issue)
+            return 201, issue
+
+        return 404, {"message": "Not Found"}
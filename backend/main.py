@@ -1,52 +1,131 @@
 import asyncio
+import importlib.util
 import sys
 import os
+import signal
+import socket
+import threading
+import time
+from contextlib import asynccontextmanager
 import json
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Any
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Request
+from fastapi import FastAPI, HTTPException, Depends, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field, ConfigDict
 from pydantic.functional_validators import BeforeValidator
 from typing_extensions import Annotated
 import uvicorn
-from pymongo import MongoClient
+from pymongo import MongoClient, ReturnDocument
 from pymongo.errors import DuplicateKeyError
 from bson import ObjectId
 import motor.motor_asyncio
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from src.agent.graph import MonitoringAgent
 from src.utils.config import Config
+from src.utils.log_setup import setup_logging, log_context
+from src.utils.log_archive import get_log_archive
+from src.llm.dispatch import dispatcher_stats
+from src.llm.schemas import get_parse_stats as llm_parse_stats
+from src.utils.job_queue import JobQueue
+from src.utils.priority_dispatcher import PriorityDispatcher
+from src.utils.deadline import Deadline
+from src.utils.repo_cache import RepositoryCache
+from src.utils.workflow_cache import get_workflow_cache
+from src.utils.issue_index import IssueIndex
+from src.utils.log_similarity import LogSimilarityIndex
+from src.utils import rollups, retention, tracing
 
-logging.basicConfig(
+setup_logging(
     level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('app.log')
-    ]
+    log_format=Config.LOG_FORMAT,
+    log_file=Config.LOG_FILE,
+    sample_rate=Config.LOG_SAMPLE_RATE
 )
 logger = logging.getLogger(__name__)
+# Before the Mongo clients are created, which take the tracing command listeners
+tracing.setup_tracing(Config.TRACING_EXPORTER, Config.TRACING_SERVICE_NAME, Config.TRACE_FILE)
 
 MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
-DATABASE_NAME = "github_monitor"
+DATABASE_NAME = os.getenv("MONGODB_DATABASE", "github_monitor")
 
-mongo_client = MongoClient(MONGODB_URL)
+mongo_client = MongoClient(MONGODB_URL, event_listeners=tracing.mongo_listeners())
 db = mongo_client[DATABASE_NAME]
 
-async_client = motor.motor_asyncio.AsyncIOMotorClient(MONGODB_URL)
+async_client = motor.motor_asyncio.AsyncIOMotorClient(MONGODB_URL, event_listeners=tracing.mongo_listeners())
 async_db = async_client[DATABASE_NAME]
 
 repositories_collection = db.repositories
 monitoring_results_collection = db.monitoring_results
+llm_usage_collection = db.llm_usage
+processed_runs_collection = db.processed_runs
+rollups_collection = db.monitoring_rollups
+maintenance_locks_collection = db.maintenance_locks
+monitoring_runs_collection = db.monitoring_runs
 
-repositories_collection.create_index("url", unique=True)
-repositories_collection.create_index("created_at")
-monitoring_results_collection.create_index("repo_id")
-monitoring_results_collection.create_index("timestamp")
+job_queue = JobQueue(
+    db.jobs,
+    lease_seconds=Config.JOB_LEASE_SECONDS,
+    max_attempts=Config.JOB_MAX_ATTEMPTS,
+    aging_seconds=Config.PRIORITY_AGING_SECONDS
+)
+issue_index = IssueIndex(db.agent_issues, window_days=Config.ISSUE_DEDUP_WINDOW_DAYS)
+log_index = LogSimilarityIndex(
+    db.log_fingerprints,
+    threshold=Config.LOG_SIMILARITY_THRESHOLD,
+    ttl_days=Config.LOG_SIMILARITY_TTL_DAYS,
+    max_entries=Config.LOG_SIMILARITY_MAX_ENTRIES,
+    wait_seconds=Config.LOG_SIMILARITY_WAIT_SECONDS
+)
+# run_id -> Deadline of the monitoring runs executing in this process, for immediate cancellation
+active_runs = {}
+
+_checkpointer = None
+
+def get_checkpointer():
+    """Mongo-backed LangGraph checkpointer, created on first use (it imports langgraph)."""
+    global _checkpointer
+    if _checkpointer is None and Config.CHECKPOINTS_ENABLED:
+        from src.agent.checkpoint import MongoCheckpointSaver
+        _checkpointer = MongoCheckpointSaver(
+            db.agent_checkpoints, db.agent_checkpoint_writes, ttl_days=Config.CHECKPOINT_TTL_DAYS
+        )
+    return _checkpointer
+
+index_status = {"state": "pending"}
+_index_lock = threading.Lock()
+
+def ensure_indexes():
+    """Create all indexes once per process. Safe to call repeatedly and from several processes."""
+    with _index_lock:
+        if index_status["state"] == "ready":
+            return
+        started = time.monotonic()
+        repositories_collection.create_index("url", unique=True)
+        repositories_collection.create_index("created_at")
+        repositories_collection.create_index([("owner", 1), ("name", 1)])
+        repositories_collection.create_index("tags")
+        monitoring_results_collection.create_index([("repo_id", 1), ("timestamp", -1)])
+        monitoring_results_collection.create_index("timestamp")
+        retention.ensure_indexes(monitoring_results_collection)
+        llm_usage_collection.create_index([("repo_id", 1), ("day", -1)], unique=True)
+        processed_runs_collection.create_index([("repo_id", 1), ("run_id", 1)], unique=True)
+        processed_runs_collection.create_index("claimed_at", expireAfterSeconds=30 * 86400)
+        rollups.ensure_indexes(rollups_collection)
+        job_queue.ensure_indexes()
+        issue_index.ensure_indexes()
+        log_index.ensure_indexes()
+        monitoring_results_collection.create_index("incident_id", sparse=True)
+        monitoring_runs_collection.create_index([("repo_id", 1), ("started_at", -1)])
+        monitoring_runs_collection.create_index("started_at", expireAfterSeconds=Config.CHECKPOINT_TTL_DAYS * 86400)
+        if get_checkpointer():
+            get_checkpointer().ensure_indexes()
+        index_status.update(state="ready", seconds=round(time.monotonic() - started, 3))
+
+repo_cache = RepositoryCache(ttl=Config.REPO_CACHE_TTL)
 
 PyObjectId = Annotated[str, BeforeValidator(str)]
 
@@ -59,6 +138,8 @@ class GitHubRepo(BaseModel):
     created_at: datetime = Field(default_factory=datetime.now)
     is_active: bool = True
     last_monitored: Optional[datetime] = None
+    run_cursor: Optional[dict] = None
+    tags: List[str] = []
 
     model_config = ConfigDict(
         populate_by_name=True,
@@ -76,10 +157,41 @@ class MonitoringResult(BaseModel):
     root_cause: Optional[str] = None
     fix_applied: bool = False
     commit_sha: Optional[str] = None
+    fix_branch: Optional[str] = None
+    pr_url: Optional[str] = None
     issue_url: Optional[str] = None
+    issue_comment_url: Optional[str] = None
     error_message: Optional[str] = None
     logs_snippet: Optional[str] = None
     analysis_data: Optional[dict] = None
+    token_usage: Optional[dict] = None
+    run_id: Optional[PyObjectId] = None
+    # OpenTelemetry trace of the run that produced this result (TRACING_EXPORTER)
+    trace_id: Optional[str] = None
+    # Failure shared with other repositories (see /api/incidents)
+    incident_id: Optional[str] = None
+    occurrences: int = 1
+    last_seen: Optional[datetime] = None
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        arbitrary_types_allowed=True,
+        json_encoders={ObjectId: str}
+    )
+
+class Incident(BaseModel):
+    """Near-identical failure logs seen across repositories, analyzed once."""
+    id: Optional[PyObjectId] = Field(alias="_id", default=None)
+    job_name: Optional[str] = None
+    root_cause: Optional[str] = None
+    error_message: Optional[str] = None
+    is_fixable: bool = False
+    repos: List[dict] = []
+    repo_count: int = 1
+    # Analyses reused instead of calling the LLM
+    hits: int = 0
+    first_seen: datetime
+    last_seen: datetime
 
     model_config = ConfigDict(
         populate_by_name=True,
@@ -90,26 +202,80 @@ class MonitoringResult(BaseModel):
 class AddRepoRequest(BaseModel):
     url: str
     access_token: str
+    tags: List[str] = []
 
 class UpdateRepoRequest(BaseModel):
     url: Optional[str] = None
     access_token: Optional[str] = None
     is_active: Optional[bool] = None
+    tags: Optional[List[str]] = None
+
+class MonitoringRun(BaseModel):
+    id: Optional[PyObjectId] = Field(alias="_id", default=None)
+    repo_id: PyObjectId
+    status: str
+    result_status: Optional[str] = None
+    attempts: int = 1
+    resumable: bool = False
+    cancel_requested: bool = False
+    trace_id: Optional[str] = None
+    error: Optional[str] = None
+    # Current node and partial LLM output while the run is in flight
+    progress: Optional[dict] = None
+    started_at: datetime
+    resumed_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    model_config = ConfigDict(
+        populate_by_name=True,
+        arbitrary_types_allowed=True,
+        json_encoders={ObjectId: str}
+    )
+
+class SweepRequest(BaseModel):
+    owner: Optional[str] = None
+    tag: Optional[str] = None
+    concurrency: int = Field(default=8, ge=1, le=64)
 
 class MongoDBManager:
     @staticmethod
     async def get_all_repositories() -> List[GitHubRepo]:
+        cached = repo_cache.get_all()
+        if cached is not None:
+            return cached
+
+        generation = repo_cache.generation
         repos = []
         async for repo in async_db.repositories.find().sort("created_at", -1):
             repos.append(GitHubRepo(**repo))
+        repo_cache.put_all(repos, generation)
         return repos
 
+    @staticmethod
+    async def find_active_repositories(owner: Optional[str] = None, tag: Optional[str] = None) -> List[dict]:
+        query = {"is_active": True}
+        if owner:
+            query["owner"] = owner
+        if tag:
+            query["tags"] = tag
+        return await async_db.repositories.find(query).to_list(length=None)
+
     @staticmethod
     async def get_repository(repo_id: str) -> Optional[GitHubRepo]:
         if not ObjectId.is_valid(repo_id):
             return None
+
+        cached = repo_cache.get(repo_id)
+        if cached is not None:
+            return cached
+
+        generation = repo_cache.generation
         repo = await async_db.repositories.find_one({"_id": ObjectId(repo_id)})
-        return GitHubRepo(**repo) if repo else None
+        if not repo:
+            return None
+        repo = GitHubRepo(**repo)
+        repo_cache.put(repo_id, repo, generation)
+        return repo
 
     @staticmethod
     async def create_repository(repo_data: dict) -> GitHubRepo:
@@ -126,6 +292,7 @@ class MongoDBManager:
             repo_data["_id"] = ObjectId()
             
             result = await async_db.repositories.insert_one(repo_data)
+            repo_cache.invalidate(result.inserted_id)
             created_repo = await async_db.repositories.find_one({"_id": result.inserted_id})
             return GitHubRepo(**created_repo)
         except DuplicateKeyError:
@@ -146,6 +313,7 @@ class MongoDBManager:
             {"$set": update_data},
             return_document=True  
         )
+        repo_cache.invalidate(repo_id)
         
         return GitHubRepo(**updated_repo) if updated_repo else None
 
@@ -155,7 +323,16 @@ class MongoDBManager:
             return False
             
         repo_result = await async_db.repositories.delete_one({"_id": ObjectId(repo_id)})
+        repo_cache.invalidate(repo_id)
         await async_db.monitoring_results.delete_many({"repo_id": ObjectId(repo_id)})
+        await async_db.processed_runs.delete_many({"repo_id": ObjectId(repo_id)})
+        await async_db.monitoring_rollups.delete_many({"repo_id": ObjectId(repo_id)})
+        await async_db.agent_issues.delete_many({"repo_id": ObjectId(repo_id)})
+        await async_db.monitoring_runs.delete_many({"repo_id": ObjectId(repo_id)})
+        await async_db.log_fingerprints.update_many(
+            {"repo_ids": ObjectId(repo_id)},
+            {"$pull": {"repo_ids": ObjectId(repo_id)}, "$inc": {"repo_count": -1}}
+        )
         return repo_result.deleted_count > 0
 
     @staticmethod
@@ -170,6 +347,13 @@ class MongoDBManager:
             results.append(MonitoringResult(**result))
         return results
 
+    @staticmethod
+    async def get_monitoring_result(result_id: str) -> Optional[MonitoringResult]:
+        if not ObjectId.is_valid(result_id):
+            return None
+        result = await async_db.monitoring_results.find_one({"_id": ObjectId(result_id)})
+        return MonitoringResult(**result) if result else None
+
     @staticmethod
     async def create_monitoring_result(result_data: dict) -> MonitoringResult:
         result_data["_id"] = ObjectId()
@@ -186,6 +370,84 @@ class MongoDBManager:
             results.append(MonitoringResult(**result))
         return results
 
+    @staticmethod
+    async def get_monitoring_runs(repo_id: Optional[str] = None, limit: int = 50) -> List[MonitoringRun]:
+        query = {"repo_id": ObjectId(repo_id)} if repo_id else {}
+        runs = []
+        async for run in async_db.monitoring_runs.find(query).sort("started_at", -1).limit(limit):
+            runs.append(MonitoringRun(**run))
+        return runs
+
+    @staticmethod
+    async def get_monitoring_run(run_id: str) -> Optional[MonitoringRun]:
+        if not ObjectId.is_valid(run_id):
+            return None
+        run = await async_db.monitoring_runs.find_one({"_id": ObjectId(run_id)})
+        return MonitoringRun(**run) if run else None
+
+    @staticmethod
+    async def _incident(doc: dict) -> Incident:
+        names = {}
+        async for repo in async_db.repositories.find({"_id": {"$in": doc.get("repo_ids", [])}}, {"name": 1, "owner": 1}):
+            names[repo["_id"]] = f"{repo['owner']}/{repo['name']}"
+        analysis = doc.get("analysis") or {}
+        return Incident(
+            **doc,
+            root_cause=analysis.get("root_cause"),
+            error_message=analysis.get("error_message"),
+            is_fixable=bool(analysis.get("is_fixable")),
+            repos=[{"id": str(repo_id), "name": names.get(repo_id)} for repo_id in doc.get("repo_ids", [])]
+        )
+
+    @staticmethod
+    async def get_incidents(min_repos: int = 2, limit: int = 50) -> List[Incident]:
+        incidents = []
+        async for doc in async_db.log_fingerprints.find(
+            {"repo_count": {"$gte": min_repos}, "analysis": {"$ne": None}}, {"signature": 0, "bands": 0}
+        ).sort([("repo_count", -1), ("last_seen", -1)]).limit(limit):
+            incidents.append(await MongoDBManager._incident(doc))
+        return incidents
+
+    @staticmethod
+    async def get_incident(incident_id: str) -> Optional[Incident]:
+        if not ObjectId.is_valid(incident_id):
+            return None
+        doc = await async_db.log_fingerprints.find_one({"_id": ObjectId(incident_id)}, {"signature": 0, "bands": 0})
+        return await MongoDBManager._incident(doc) if doc else None
+
+    @staticmethod
+    async def get_incident_results(incident_id: str, limit: int = 100) -> List[MonitoringResult]:
+        results = []
+        async for result in async_db.monitoring_results.find({"incident_id": incident_id}).sort("timestamp", -1).limit(limit):
+            results.append(MonitoringResult(**result))
+        return results
+
+    @staticmethod
+    async def get_llm_usage(repo_id: str, days: int = 30) -> List[dict]:
+        if not ObjectId.is_valid(repo_id):
+            return []
+
+        since = datetime.combine(datetime.now().date(), datetime.min.time()).timestamp() - days * 86400
+        usage = []
+        async for day in async_db.llm_usage.find({
+            "repo_id": ObjectId(repo_id),
+            "day": {"$gte": datetime.fromtimestamp(since)}
+        }, {"_id": 0, "repo_id": 0}).sort("day", -1):
+            usage.append(day)
+        return usage
+
+    @staticmethod
+    async def get_trends(repo_id: Optional[str], granularity: str, start: datetime, end: datetime) -> List[dict]:
+        query = {
+            "repo_id": ObjectId(repo_id) if repo_id else None,
+            "granularity": granularity,
+            "bucket": {"$gte": rollups.bucket_start(start, granularity), "$lt": end}
+        }
+        points = []
+        async for doc in async_db.monitoring_rollups.find(query).sort("bucket", 1):
+            points.append(rollups.trend_point(doc))
+        return points
+
     @staticmethod
     async def get_stats() -> dict:
         total_repos = await async_db.repositories.count_documents({})
@@ -209,10 +471,77 @@ class MongoDBManager:
             "recent_activity_24h": recent_activity
         }
 
+async def watch_repository_changes():
+    """Invalidate cached repositories on writes made by other workers."""
+    try:
+        async with async_db.repositories.watch() as stream:
+            logger.info("Watching repository changes for cache invalidation")
+            async for change in stream:
+                repo_cache.invalidate(change.get("documentKey", {}).get("_id"))
+    except asyncio.CancelledError:
+        raise
+    except Exception as e:
+        # Change streams need a replica set; fall back to TTL expiry
+        logger.info(f"Repository change stream unavailable, cache relies on TTL: {str(e)}")
+
+def compact_monitoring_results(owner: str = None) -> Optional[dict]:
+    """Cap and downsample stored results of every repository. None if another process holds the lock."""
+    owner = owner or f"{socket.gethostname()}:{os.getpid()}"
+    if not retention.acquire_lock(maintenance_locks_collection, "retention", owner):
+        return None
+    renewed_at = [time.monotonic()]
+    
+    def renew_lock():
+        if time.monotonic() - renewed_at[0] >= retention.LOCK_TTL_SECONDS / 3:
+            if not retention.acquire_lock(maintenance_locks_collection, "retention", owner):
+                raise RuntimeError("Lost the retention lock to another process")
+            renewed_at[0] = time.monotonic()
+    
+    try:
+        repo_ids = [repo["_id"] for repo in repositories_collection.find({}, {"_id": 1})]
+        stats = retention.compact(monitoring_results_collection, repo_ids,
+                                  Config.RESULT_MAX_PER_REPO, Config.RESULT_SUCCESS_TTL_DAYS, heartbeat=renew_lock)
+    finally:
+        retention.release_lock(maintenance_locks_collection, "retention", owner)
+    logger.info(f"Compacted monitoring results: {stats}")
+    return stats
+
+async def run_retention():
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    loop = asyncio.get_event_loop()
+    while True:
+        try:
+            await loop.run_in_executor(None, compact_monitoring_results, owner)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error compacting monitoring results: {str(e)}")
+        await asyncio.sleep(Config.RETENTION_INTERVAL)
+
+async def ensure_indexes_async():
+    """Startup hook: build indexes off the event loop so the API answers immediately."""
+    loop = asyncio.get_event_loop()
+    try:
+        await loop.run_in_executor(None, ensure_indexes)
+        logger.info(f"Indexes ready in {index_status['seconds']}s")
+    except Exception as e:
+        index_status.update(state="failed", error=str(e))
+        logger.error(f"Error creating indexes: {str(e)}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    tasks = [asyncio.create_task(ensure_indexes_async()), asyncio.create_task(watch_repository_changes())]
+    if Config.RETENTION_INTERVAL:
+        tasks.append(asyncio.create_task(run_retention()))
+    yield
+    for task in tasks:
+        task.cancel()
+
 app = FastAPI(
     title="GitHub Actions Monitoring Agent",
     description="Autonomous CI/CD Monitoring and Remediation System with MongoDB",
-    version="2.0.0"
+    version="2.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -228,13 +557,203 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-def monitor_repository_sync(repo_id: str):
+# Recent FastAPI releases open a server span per request themselves once a tracer is installed
+if tracing.enabled() and importlib.util.find_spec("fastapi.telemetry") is None:
+    @app.middleware("http")
+    async def trace_requests(request: Request, call_next):
+        """Server span per API request; monitoring runs it dispatches continue the same trace."""
+        with tracing.attach(dict(request.headers)), \
+                tracing.span(f"{request.method} {request.url.path}", {"http.method": request.method}) as current:
+            response = await call_next(request)
+            route = request.scope.get("route")
+            if route is not None:
+                # Name by route template so IDs in the path do not explode span names
+                current.update_name(f"{request.method} {route.path}")
+            current.set_attribute("http.status_code", response.status_code)
+            return response
+
+def record_llm_usage(repo_id: str, usage: Optional[dict]):
+    """Accumulate LLM token usage per repository per day."""
+    if not usage or not usage.get("calls"):
+        return
+    today = datetime.combine(datetime.now().date(), datetime.min.time())
+    increments = {
+        "calls": usage.get("calls", 0),
+        "prompt_tokens": usage.get("prompt_tokens", 0),
+        "completion_tokens": usage.get("completion_tokens", 0)
+    }
+    # Local and remote tokens cost differently; keep a per-provider split
+    for provider, spent in (usage.get("by_provider") or {}).items():
+        for key in ("calls", "prompt_tokens", "completion_tokens"):
+            increments[f"providers.{provider}.{key}"] = spent.get(key, 0)
+    llm_usage_collection.update_one(
+        {"repo_id": ObjectId(repo_id), "day": today},
+        {"$inc": increments},
+        upsert=True
+    )
+
+def record_rollup(repo_id: str, result: dict, recovery_seconds: Optional[float] = None):
+    # Trends are derived data; never fail a monitoring run because of them
+    try:
+        rollups.record_result(rollups_collection, ObjectId(repo_id), result, recovery_seconds)
+    except Exception as e:
+        logger.warning(f"Failed to update rollups for {repo_id}: {str(e)}")
+
+def collapse_monitoring_result(monitoring_result: dict) -> bool:
+    """Fold a routine success into the repository's latest result if that is the same success.
+
+    Returns False when the result has to be inserted as a new record.
+    """
+    if not retention.is_routine_success(monitoring_result):
+        return False
+    latest = monitoring_results_collection.find_one(
+        {"repo_id": monitoring_result["repo_id"]},
+        retention.ROUTINE_FIELDS,
+        sort=[("timestamp", -1)]
+    )
+    if not latest or not retention.same_routine_result(latest, monitoring_result):
+        return False
+
+    update = {"$set": {"last_seen": monitoring_result["last_seen"]}}
+    if "expires_at" in monitoring_result:
+        update["$set"]["expires_at"] = monitoring_result["expires_at"]
+    if "occurrences" in latest:
+        update["$inc"] = {"occurrences": 1}
+    else:
+        # Stored before results were collapsed
+        update["$set"]["occurrences"] = 2
+    return monitoring_results_collection.update_one({"_id": latest["_id"]}, update).modified_count > 0
+
+def save_monitoring_result(repo: dict, result: dict) -> dict:
+    """Store a monitoring result and update trend rollups. Returns repository fields to update.
+
+    Rollups count every run, including successes collapsed into an earlier record.
+    """
+    repo_id = str(repo["_id"])
+    monitoring_result = {
+        "repo_id": ObjectId(repo_id),
+        "status": result.get("status", "success"),
+        "failed_run_id": result.get("failed_run_id"),
+        "failed_job_id": result.get("failed_job_id"),
+        "root_cause": (result.get("analysis") or {}).get("root_cause", "No failures detected"),
+        "fix_applied": result.get("fix_applied", False),
+        "commit_sha": result.get("commit_sha"),
+        "fix_branch": result.get("fix_branch"),
+        "pr_url": result.get("pr_url"),
+        "issue_url": result.get("issue_url"),
+        "issue_comment_url": result.get("issue_comment_url"),
+        "issue_fingerprint": result.get("issue_fingerprint"),
+        "error_message": result.get("error_message"),
+        "logs_snippet": (result.get("raw_logs", "")[:500] 
+                       if result.get("raw_logs") else None),
+        "analysis_data": result.get("analysis") or {},
+        "token_usage": result.get("token_usage"),
+        "run_id": ObjectId(result["run_id"]) if result.get("run_id") else None,
+        "trace_id": tracing.current_trace_id(),
+        "incident_id": result.get("incident_id"),
+        "timestamp": datetime.now()
+    }
+    if retention.is_routine_success(monitoring_result):
+        monitoring_result["occurrences"] = 1
+        monitoring_result["last_seen"] = monitoring_result["timestamp"]
+        if Config.RESULT_SUCCESS_TTL_DAYS:
+            monitoring_result["expires_at"] = retention.success_expiry(
+                monitoring_result["timestamp"], Config.RESULT_SUCCESS_TTL_DAYS)
+
+    if not collapse_monitoring_result(monitoring_result):
+        monitoring_results_collection.insert_one(monitoring_result)
+    record_llm_usage(repo_id, result.get("token_usage"))
+
+    # Time to recovery runs from the first failure to the next success
+    repo_update = {}
+    recovery_seconds = None
+    if monitoring_result["status"] == "failure" and not repo.get("failing_since"):
+        repo_update["failing_since"] = monitoring_result["timestamp"]
+    elif monitoring_result["status"] == "success" and repo.get("failing_since"):
+        recovery_seconds = (monitoring_result["timestamp"] - repo["failing_since"]).total_seconds()
+        repo_update["failing_since"] = None
+    record_rollup(repo_id, monitoring_result, recovery_seconds)
+
+    if monitoring_result["status"] == "success":
+        logger.info(f"Monitoring completed successfully: {repo['name']}")
+    else:
+        logger.warning(f"Monitoring completed with issues: {repo['name']} - Status: {monitoring_result['status']}")
+    return repo_update
+
+def start_monitoring_run(repo_id: str, run_id: Optional[str] = None) -> str:
+    """Open a monitoring run, or reopen `run_id` when it failed resumably within RUN_RESUME_WINDOW.
+
+    Only an explicit `run_id` resumes; every other trigger starts a fresh run.
+    """
+    now = datetime.now()
+    query = None
+    if run_id:
+        query = {
+            "_id": ObjectId(run_id),
+            "status": "failed",
+            "resumable": True,
+            "started_at": {"$gte": now - timedelta(seconds=Config.RUN_RESUME_WINDOW)}
+        }
+    run = None
+    if query and get_checkpointer():
+        run = monitoring_runs_collection.find_one_and_update(
+            query,
+            {"$set": {"status": "running", "resumed_at": now, "cancel_requested": False,
+                      "trace_id": tracing.current_trace_id()},
+             "$inc": {"attempts": 1}},
+            sort=[("started_at", -1)],
+            return_document=ReturnDocument.AFTER
+        )
+    if run:
+        logger.info(f"Resuming monitoring run {run['_id']} (attempt {run['attempts']})")
+        return str(run["_id"])
+    return str(monitoring_runs_collection.insert_one({
+        "repo_id": ObjectId(repo_id),
+        "status": "running",
+        "attempts": 1,
+        "resumable": False,
+        "cancel_requested": False,
+        "trace_id": tracing.current_trace_id(),
+        "started_at": now
+    }).inserted_id)
+
+def finish_monitoring_run(run_id: str, result_status: str, error: Optional[str] = None, resumable: bool = False):
+    if result_status in ("timeout", "cancelled"):
+        run_status = result_status
+    elif result_status in ("error", "interrupted"):
+        run_status = "failed"
+    else:
+        run_status = "completed"
+    monitoring_runs_collection.update_one({"_id": ObjectId(run_id)}, {"$set": {
+        "status": run_status,
+        "result_status": result_status,
+        "resumable": resumable,
+        "error": error,
+        "finished_at": datetime.now()
+    }})
+    if not resumable and get_checkpointer():
+        get_checkpointer().delete_thread(run_id)
+
+def monitor_repository_sync(repo_id: str, repo: Optional[dict] = None, run_id: Optional[str] = None,
+                            on_start=None) -> Optional[str]:
+    """Run the agent for one repository and store the result. Returns the result status.
+
+    "interrupted" means the run failed part-way and can resume from its checkpoint
+    (pass its ID, which on_start(run_id) reports, as `run_id`); "timeout" and
+    "cancelled" runs were stopped by their deadline or a cancel request.
+    """
+    with log_context(repo_id=repo_id), tracing.span("monitoring.run", {"repo.id": repo_id}):
+        return _monitor_repository(repo_id, repo, run_id, on_start)
+
+def _monitor_repository(repo_id: str, repo: Optional[dict], run_id: Optional[str] = None,
+                        on_start=None) -> Optional[str]:
     try:
         if not ObjectId.is_valid(repo_id):
             logger.error(f"Invalid repository ID: {repo_id}")
             return
             
-        repo = repositories_collection.find_one({"_id": ObjectId(repo_id)})
+        if repo is None:
+            repo = repositories_collection.find_one({"_id": ObjectId(repo_id)})
         if not repo:
             logger.error(f"Repository not found: {repo_id}")
             return
@@ -245,12 +764,99 @@ def monitor_repository_sync(repo_id: str):
 
         logger.info(f"Starting monitoring for repository: {repo['name']}")
         
-        original_token = os.getenv("GITHUB_TOKEN")
-        os.environ["GITHUB_TOKEN"] = repo["access_token"]
+        run_id = start_monitoring_run(repo_id, run_id)
+        if on_start:
+            on_start(run_id)
+        tracing.set_attributes({"run.id": run_id, "repo.name": repo["name"]})
+        
+        def cancel_requested() -> bool:
+            # Picks up DELETE /api/monitoring/runs/{id} made through another process
+            return monitoring_runs_collection.find_one(
+                {"_id": ObjectId(run_id), "cancel_requested": True}, {"_id": 1}
+            ) is not None
+        
+        deadline = Deadline(Config.RUN_DEADLINE_SECONDS, poll=cancel_requested,
+                            poll_interval=Config.CANCEL_POLL_SECONDS)
+        active_runs[run_id] = deadline
+        resumable = False
+        run_error = None
+        repo_update = {"last_monitored": datetime.now()}
+        claimed_runs = []
+        status = "error"
+        
+        def claim_run(run_id: int) -> bool:
+            try:
+                processed_runs_collection.insert_one({
+                    "repo_id": ObjectId(repo_id),
+                    "run_id": run_id,
+                    "claimed_at": datetime.now()
+                })
+                claimed_runs.append(run_id)
+                return True
+            except DuplicateKeyError:
+                return False
+        
+        def release_claims():
+            # Errored runs are analyzed again on the next trigger
+            if claimed_runs:
+                processed_runs_collection.delete_many({
+                    "repo_id": ObjectId(repo_id),
+                    "run_id": {"$in": claimed_runs}
+                })
+        
+        def find_issue(fingerprint: str) -> Optional[dict]:
+            return issue_index.mark_seen(ObjectId(repo_id), fingerprint)
+        
+        def report_progress(update: dict):
+            monitoring_runs_collection.update_one({"_id": ObjectId(run_id)}, {"$set": {
+                **{f"progress.{key}": value for key, value in update.items()},
+                "progress.updated_at": datetime.now()
+            }})
+        
+        pending_failure = {}
+        
+        def match_failure(logs: str) -> Optional[dict]:
+            try:
+                match = log_index.match(logs, ObjectId(repo_id), repo["owner"], (repo["name"], repo["owner"]), deadline)
+            except Exception as e:
+                logger.warning(f"Log similarity lookup failed for {repo['name']}: {str(e)}")
+                return None
+            if match and "pending" in match:
+                pending_failure["token"] = match["pending"]
+                return None
+            return match
+        
+        def record_failure(logs: str, job_name: Optional[str], analysis: Optional[dict]) -> Optional[str]:
+            token = pending_failure.pop("token", None)
+            if token is None:
+                return None
+            try:
+                return log_index.complete(token, analysis, job_name)
+            except Exception as e:
+                logger.warning(f"Failed to index failure logs for {repo['name']}: {str(e)}")
+                return None
+        
+        def record_issue(fingerprint: str, issue_number: int, issue_url: str):
+            try:
+                issue_index.record(ObjectId(repo_id), fingerprint, issue_number, issue_url)
+            except Exception as e:
+                logger.warning(f"Failed to index issue #{issue_number} for {repo['name']}: {str(e)}")
         
         try:
-            agent = MonitoringAgent()
-            result = agent.run(repo["url"])
+            # Deferred: langgraph and the LLM clients dominate import time
+            from src.agent.graph import MonitoringAgent
+            agent = MonitoringAgent(
+                claim_run=claim_run,
+                find_issue=find_issue,
+                record_issue=record_issue,
+                checkpointer=get_checkpointer(),
+                progress=report_progress,
+                deadline=deadline,
+                match_failure=match_failure if Config.LOG_SIMILARITY_ENABLED else None,
+                record_failure=record_failure if Config.LOG_SIMILARITY_ENABLED else None,
+                github_token=repo["access_token"]
+            )
+            result = agent.run(repo["url"], repo.get("run_cursor"), thread_id=run_id)
             
             logger.info(f"Agent execution completed for {repo['name']}")
             
@@ -273,50 +879,51 @@ def monitor_repository_sync(repo_id: str):
                     }
                 }
             
-            monitoring_result = {
-                "repo_id": ObjectId(repo_id),
-                "status": result.get("status", "success"),
-                "failed_run_id": result.get("failed_run_id"),
-                "failed_job_id": result.get("failed_job_id"),
-                "root_cause": result.get("analysis", {}).get("root_cause", "No failures detected"),
-                "fix_applied": result.get("fix_applied", False),
-                "commit_sha": result.get("commit_sha"),
-                "issue_url": result.get("issue_url"),
-                "error_message": result.get("error_message"),
-                "logs_snippet": (result.get("raw_logs", "")[:500] 
-                               if result.get("raw_logs") else None),
-                "analysis_data": result.get("analysis", {}),
-                "timestamp": datetime.now()
-            }
-            
-            monitoring_results_collection.insert_one(monitoring_result)
+            result["run_id"] = run_id
+            resumable = result.get("status") == "error" and bool(result.get("resumable"))
+            if resumable:
+                # Claims stay held: the resumed run finishes the analysis for these runs
+                logger.info(f"Run {run_id} for {repo['name']} can resume from its last checkpoint")
+            elif result.get("status") in ("error", "timeout", "cancelled"):
+                release_claims()
+            elif result.get("run_cursor"):
+                repo_update["run_cursor"] = result["run_cursor"]
             
-            if monitoring_result["status"] == "success":
-                logger.info(f"Monitoring completed successfully: {repo['name']}")
+            status = result.get("status", "success")
+            run_error = result.get("error_message")
+            if status == "skipped":
+                logger.info(f"No new workflow runs to analyze for {repo['name']}")
             else:
-                logger.warning(f"Monitoring completed with issues: {repo['name']} - Status: {monitoring_result['status']}")
+                repo_update.update(save_monitoring_result(repo, result))
             
         except Exception as e:
             logger.error(f"Error during monitoring execution for {repo['name']}: {str(e)}")
+            release_claims()
+            run_error = str(e)
             
             error_result = {
                 "repo_id": ObjectId(repo_id),
                 "status": "error",
                 "error_message": str(e),
+                "run_id": ObjectId(run_id),
+                "trace_id": tracing.current_trace_id(),
                 "timestamp": datetime.now()
             }
             monitoring_results_collection.insert_one(error_result)
+            record_rollup(repo_id, error_result)
             
         finally:
-            if original_token:
-                os.environ["GITHUB_TOKEN"] = original_token
-            else:
-                os.environ.pop("GITHUB_TOKEN", None)
+            active_runs.pop(run_id, None)
         
+        if resumable:
+            status = "interrupted"
+        finish_monitoring_run(run_id, status, run_error, resumable)
         repositories_collection.update_one(
             {"_id": ObjectId(repo_id)},
-            {"$set": {"last_monitored": datetime.now()}}
+            {"$set": repo_update}
         )
+        repo_cache.invalidate(repo_id)
+        return status
         
     except Exception as e:
         logger.error(f"Critical error monitoring repository {repo_id}: {str(e)}")
@@ -325,13 +932,116 @@ def monitor_repository_sync(repo_id: str):
             "repo_id": ObjectId(repo_id),
             "status": "error",
             "error_message": f"Critical error: {str(e)}",
+            "trace_id": tracing.current_trace_id(),
             "timestamp": datetime.now()
         }
         monitoring_results_collection.insert_one(error_result)
+        record_rollup(repo_id, error_result)
+        return "error"
 
-async def monitor_repository_async(repo_id: str):
-    loop = asyncio.get_event_loop()
-    await loop.run_in_executor(None, monitor_repository_sync, repo_id)
+def record_health_check(repo: dict, health: dict) -> str:
+    """Store a batched health check that needed no agent run ("success" or "unchanged")."""
+    repo_update = {"last_monitored": datetime.now()}
+    if health.get("cursor"):
+        repo_update["run_cursor"] = health["cursor"]
+    if health["status"] == "success":
+        repo_update.update(save_monitoring_result(repo, {
+            "status": "success",
+            "analysis": {
+                "root_cause": "No workflow failures detected",
+                "is_fixable": False,
+                "fix_suggestion": "All workflows are running successfully"
+            }
+        }))
+    repositories_collection.update_one({"_id": repo["_id"]}, {"$set": repo_update})
+    repo_cache.invalidate(str(repo["_id"]))
+    return "success" if health["status"] == "success" else "skipped"
+
+_monitor_dispatcher = None
+_monitor_dispatcher_lock = threading.Lock()
+
+def get_monitor_dispatcher() -> PriorityDispatcher:
+    """Threads for inline monitoring runs, started on first use."""
+    global _monitor_dispatcher
+    with _monitor_dispatcher_lock:
+        if _monitor_dispatcher is None:
+            _monitor_dispatcher = PriorityDispatcher(Config.MONITOR_WORKERS, Config.PRIORITY_AGING_SECONDS)
+        return _monitor_dispatcher
+
+async def dispatch_monitoring(repo_id: str, priority_class: str, run_id: Optional[str] = None):
+    """Run monitoring in this process, or hand it to the worker pool when DISPATCH_MODE=queue.
+
+    `priority_class` is one of manual, failure, scheduled or success. `run_id`
+    resumes that monitoring run from its last checkpoint.
+    """
+    if Config.DISPATCH_MODE == "queue":
+        loop = asyncio.get_event_loop()
+        payload = {"run_id": run_id} if run_id else {}
+        trace_headers = tracing.inject()
+        if trace_headers:
+            # The worker continues this request's trace
+            payload["trace"] = trace_headers
+        await loop.run_in_executor(None, job_queue.enqueue, ObjectId(repo_id), "monitor", priority_class, payload)
+    else:
+        # A resume must not be folded into (or absorb) a plain run queued for the repository
+        get_monitor_dispatcher().submit(repo_id, priority_class, monitor_repository_sync, repo_id, None, run_id,
+                                        coalesce=run_id is None)
+
+def process_job(job: dict, worker_id: str):
+    done = threading.Event()
+
+    def heartbeat():
+        while not done.wait(job_queue.lease_seconds / 3):
+            if not job_queue.heartbeat(job["_id"], worker_id):
+                logger.warning(f"Worker {worker_id} lost the lease on job {job['_id']}")
+                return
+
+    threading.Thread(target=heartbeat, daemon=True).start()
+    try:
+        payload = job.get("payload") or {}
+        started = {}
+        with tracing.attach(payload.get("trace")):
+            status = monitor_repository_sync(str(job["repo_id"]), run_id=payload.get("run_id"),
+                                             on_start=lambda run_id: started.update(run_id=run_id))
+        if status == "interrupted":
+            # Retried with backoff; the next attempt resumes this run from its checkpoint
+            job_queue.fail(job["_id"], worker_id, "Monitoring run interrupted", payload={**payload, **started})
+        else:
+            job_queue.complete(job["_id"], worker_id)
+    except Exception as e:
+        logger.error(f"Job {job['_id']} failed: {str(e)}")
+        job_queue.fail(job["_id"], worker_id, str(e))
+    finally:
+        done.set()
+
+def run_worker(concurrency: int):
+    """Claim and run queued monitoring jobs until SIGTERM/SIGINT."""
+    stop = threading.Event()
+
+    def shutdown(signum, frame):
+        logger.info("Worker stopping after in-flight jobs finish")
+        stop.set()
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    def work(slot: int):
+        worker_id = f"{socket.gethostname()}:{os.getpid()}:{slot}"
+        while not stop.is_set():
+            job = job_queue.claim(worker_id)
+            if job is None:
+                stop.wait(Config.WORKER_POLL_INTERVAL)
+                continue
+            logger.info(f"Worker {worker_id} claimed job {job['_id']} (attempt {job['attempts']})")
+            process_job(job, worker_id)
+
+    threads = [threading.Thread(target=work, args=(slot,)) for slot in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    logger.info(f"Worker started with {concurrency} slots")
+    while any(thread.is_alive() for thread in threads):
+        for thread in threads:
+            thread.join(timeout=1)
 
 @app.get("/")
 async def read_root():
@@ -358,6 +1068,12 @@ async def health_check():
                 "active": active_repos,
                 "paused": total_repos - active_repos
             },
+            "llm_dispatch": dispatcher_stats(),
+            "llm_parse": llm_parse_stats(),
+            "log_similarity": log_index.get_stats(),
+            "repository_cache": repo_cache.stats(),
+            "workflow_cache": get_workflow_cache().stats(),
+            "indexes": index_status,
             "timestamp": datetime.now()
         }
     except Exception as e:
@@ -375,17 +1091,18 @@ async def get_repositories():
         raise HTTPException(status_code=500, detail=f"Error fetching repositories: {str(e)}")
 
 @app.post("/api/repositories", response_model=GitHubRepo)
-async def add_repository(request: AddRepoRequest, background_tasks: BackgroundTasks):
+async def add_repository(request: AddRepoRequest):
     try:
         repo_data = {
             "url": request.url,
             "access_token": request.access_token,
+            "tags": request.tags,
             "is_active": True
         }
         
         repo = await MongoDBManager.create_repository(repo_data)
         
-        background_tasks.add_task(monitor_repository_async, str(repo.id))
+        await dispatch_monitoring(str(repo.id), "manual")
         
         logger.info(f"Added new repository: {repo.name}")
         
@@ -449,11 +1166,11 @@ async def get_repository_results(repo_id: str, limit: int = 50):
         raise HTTPException(status_code=500, detail=f"Error fetching results: {str(e)}")
 
 @app.post("/webhook")
-async def github_webhook(request: Request, background_tasks: BackgroundTasks):
+async def github_webhook(request: Request):
     try:
         event_type = request.headers.get("x-github-event")
         
-        if event_type not in ["workflow_run", "workflow_job"]:
+        if event_type not in ["workflow_run", "workflow_job", "issues"]:
             logger.info(f"Ignoring unsupported event type: {event_type}")
             return {"status": "ignored", "message": f"Event type '{event_type}' not supported"}
         
@@ -520,11 +1237,22 @@ async def github_webhook(request: Request, background_tasks: BackgroundTasks):
         
         repo_obj = GitHubRepo(**repo)
         
+        if event_type == "issues":
+            # Closed issues stop absorbing repeat failures; the next one opens a new issue
+            if payload.get("action") in ("closed", "deleted", "transferred"):
+                number = payload.get("issue", {}).get("number")
+                loop = asyncio.get_event_loop()
+                if await loop.run_in_executor(None, issue_index.close, repo["_id"], number):
+                    logger.info(f"Agent issue #{number} closed for {repo_obj.name}")
+                    return {"status": "accepted", "message": "Issue index updated"}
+            return {"status": "ignored", "message": "Issue event doesn't affect agent issues"}
+        
         if not repo_obj.is_active:
             logger.info(f"Repository monitoring is paused: {repo_obj.name}")
             return {"status": "ignored", "message": "Repository monitoring is paused"}
         
         should_trigger = False
+        conclusion = None
         
         if event_type == "workflow_run":
             workflow_run = payload.get("workflow_run", {})
@@ -546,7 +1274,9 @@ async def github_webhook(request: Request, background_tasks: BackgroundTasks):
         
         if should_trigger:
             logger.info(f"Triggering monitoring agent for: {repo_obj.name}")
-            background_tasks.add_task(monitor_repository_async, str(repo_obj.id))
+            # Failures are analyzed ahead of routine checks; successes only refresh health
+            priority_class = "failure" if conclusion in ("failure", "timed_out", "startup_failure") else "success"
+            await dispatch_monitoring(str(repo_obj.id), priority_class)
             
             return {
                 "status": "accepted",
@@ -568,7 +1298,7 @@ async def github_webhook(request: Request, background_tasks: BackgroundTasks):
 
 
 @app.post("/api/repositories/{repo_id}/monitor")
-async def trigger_monitoring(repo_id: str, background_tasks: BackgroundTasks):
+async def trigger_monitoring(repo_id: str):
     try:
         repo = await MongoDBManager.get_repository(repo_id)
         if not repo:
@@ -578,7 +1308,7 @@ async def trigger_monitoring(repo_id: str, background_tasks: BackgroundTasks):
             raise HTTPException(status_code=400, detail="Cannot monitor paused repository. Please resume monitoring first.")
         
         logger.info(f"Manual monitoring triggered for: {repo.name}")
-        background_tasks.add_task(monitor_repository_async, repo_id)
+        await dispatch_monitoring(repo_id, "manual")
         return {"message": "Monitoring triggered successfully"}
     except HTTPException:
         raise
@@ -603,6 +1333,246 @@ async def get_all_monitoring_results(limit: int = 100, repo_id: Optional[str] =
         logger.error(f"Error fetching monitoring results: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error fetching monitoring results: {str(e)}")
 
+MAX_LOG_PAGE_LINES = 5000
+MAX_LOG_PAGE_BYTES = 1024 * 1024
+
+def parse_range(value: str, default_size: int, max_size: int) -> tuple:
+    start_str, sep, end_str = value.partition("-")
+    if not sep or not start_str.isdigit() or (end_str and not end_str.isdigit()):
+        raise ValueError(f"Invalid range '{value}', expected 'a-b'")
+    start = int(start_str)
+    end = int(end_str) if end_str else start + default_size - 1
+    if end < start:
+        raise ValueError(f"Invalid range '{value}', end is before start")
+    return start, min(end, start + max_size - 1)
+
+@app.get("/api/monitoring/results/{result_id}/logs")
+async def get_monitoring_result_logs(result_id: str, lines: Optional[str] = None,
+                                     byte_range: Optional[str] = Query(None, alias="bytes")):
+    """Page through the archived log of a result. `lines` is 1-based inclusive, `bytes` is 0-based inclusive."""
+    try:
+        result = await MongoDBManager.get_monitoring_result(result_id)
+        if not result:
+            raise HTTPException(status_code=404, detail="Monitoring result not found")
+        if not result.failed_job_id:
+            raise HTTPException(status_code=404, detail="Monitoring result has no failed job logs")
+
+        repo = await MongoDBManager.get_repository(result.repo_id)
+        if not repo:
+            raise HTTPException(status_code=404, detail="Repository not found")
+
+        archive = get_log_archive()
+        repo_key = f"{repo.owner}/{repo.name}"
+        loop = asyncio.get_event_loop()
+
+        try:
+            if byte_range is not None:
+                start, end = parse_range(byte_range, MAX_LOG_PAGE_BYTES, MAX_LOG_PAGE_BYTES)
+                page = await loop.run_in_executor(
+                    None, archive.read_bytes, repo_key, result.failed_job_id, start, end + 1
+                )
+                if page:
+                    page["end"] -= 1
+            else:
+                start, end = parse_range(lines or "1-200", 200, MAX_LOG_PAGE_LINES)
+                page = await loop.run_in_executor(
+                    None, archive.read_lines, repo_key, result.failed_job_id, max(start, 1) - 1, end
+                )
+                if page:
+                    page["start"] += 1
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except FileNotFoundError:
+            # Evicted between the lookup and the read
+            page = None
+
+        if page is None:
+            raise HTTPException(status_code=404, detail="Logs are not archived for this result")
+
+        return {
+            "result_id": result_id,
+            "job_id": result.failed_job_id,
+            **page
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching logs for result {result_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error fetching logs: {str(e)}")
+
+async def sweep_events(repos: List[dict], concurrency: int):
+    """Monitor every repository with at most `concurrency` in flight, yielding NDJSON progress lines."""
+    started = time.monotonic()
+    semaphore = asyncio.Semaphore(concurrency)
+    loop = asyncio.get_event_loop()
+    by_status = {}
+
+    health = {}
+    if Config.SWEEP_HEALTH_BACKEND == "graphql" and repos:
+        from src.agent.graphql_health import check_fleet_health
+        try:
+            health = await loop.run_in_executor(None, check_fleet_health, repos, Config.GRAPHQL_BATCH_SIZE)
+        except Exception as e:
+            logger.error(f"Batched health check failed, sweeping over REST: {str(e)}")
+
+    async def sweep_one(repo: dict) -> dict:
+        async with semaphore:
+            repo_started = time.monotonic()
+            repo_health = health.get(str(repo["_id"]), {})
+            try:
+                if repo_health.get("status") in ("success", "unchanged"):
+                    status = await loop.run_in_executor(None, record_health_check, repo, repo_health)
+                elif Config.DISPATCH_MODE == "queue":
+                    await loop.run_in_executor(None, job_queue.enqueue, repo["_id"], "monitor", "scheduled")
+                    status = "queued"
+                else:
+                    status = await asyncio.wrap_future(get_monitor_dispatcher().submit(
+                        str(repo["_id"]), "scheduled", monitor_repository_sync, str(repo["_id"]), repo
+                    )) or "error"
+            except Exception as e:
+                logger.error(f"Sweep failed for {repo['name']}: {str(e)}")
+                status = "error"
+            return {
+                "event": "result",
+                "repo_id": str(repo["_id"]),
+                "name": f"{repo['owner']}/{repo['name']}",
+                "status": status,
+                "elapsed_seconds": round(time.monotonic() - repo_started, 3)
+            }
+
+    yield json.dumps({"event": "started", "total": len(repos), "concurrency": concurrency}) + "\n"
+    for completed in asyncio.as_completed([sweep_one(repo) for repo in repos]):
+        event = await completed
+        by_status[event["status"]] = by_status.get(event["status"], 0) + 1
+        yield json.dumps(event) + "\n"
+
+    yield json.dumps({
+        "event": "summary",
+        "total": len(repos),
+        "by_status": by_status,
+        "elapsed_seconds": round(time.monotonic() - started, 3)
+    }) + "\n"
+
+@app.post("/api/monitoring/sweep")
+async def sweep_repositories(request: SweepRequest):
+    """Monitor all active repositories matching the filter, streaming progress as NDJSON."""
+    try:
+        repos = await MongoDBManager.find_active_repositories(request.owner, request.tag)
+    except Exception as e:
+        logger.error(f"Error loading repositories for sweep: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error loading repositories: {str(e)}")
+
+    logger.info(f"Sweep started for {len(repos)} repositories (owner={request.owner}, tag={request.tag})")
+    return StreamingResponse(
+        sweep_events(repos, request.concurrency),
+        media_type="application/x-ndjson"
+    )
+
+@app.get("/api/incidents")
+async def get_incidents(min_repos: int = 2, limit: int = 50):
+    """Failures that hit several repositories with near-identical logs, widest first."""
+    try:
+        incidents = await MongoDBManager.get_incidents(min_repos, limit)
+        return {"incidents": incidents, "index": log_index.get_stats()}
+    except Exception as e:
+        logger.error(f"Error fetching incidents: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error fetching incidents: {str(e)}")
+
+@app.get("/api/incidents/{incident_id}")
+async def get_incident(incident_id: str, limit: int = 100):
+    try:
+        incident = await MongoDBManager.get_incident(incident_id)
+        if not incident:
+            raise HTTPException(status_code=404, detail="Incident not found")
+        results = await MongoDBManager.get_incident_results(incident_id, limit)
+        return {"incident": incident, "results": results}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching incident {incident_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error fetching incident: {str(e)}")
+
+@app.get("/api/monitoring/queue")
+async def get_queue_status():
+    try:
+        loop = asyncio.get_event_loop()
+        if Config.DISPATCH_MODE == "queue":
+            counts = await loop.run_in_executor(None, job_queue.counts)
+            queue_times = await loop.run_in_executor(
+                None, job_queue.queue_times, datetime.now() - timedelta(hours=1)
+            )
+            return {"mode": Config.DISPATCH_MODE, "jobs": counts, "queue_times_last_hour": queue_times}
+        return {"mode": Config.DISPATCH_MODE, "inline": get_monitor_dispatcher().metrics()}
+    except Exception as e:
+        logger.error(f"Error fetching queue status: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error fetching queue status: {str(e)}")
+
+@app.get("/api/monitoring/runs", response_model=List[MonitoringRun])
+async def get_monitoring_runs(repo_id: Optional[str] = None, limit: int = 50):
+    try:
+        if repo_id and not ObjectId.is_valid(repo_id):
+            raise HTTPException(status_code=404, detail="Repository not found")
+        return await MongoDBManager.get_monitoring_runs(repo_id, limit)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching monitoring runs: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error fetching monitoring runs: {str(e)}")
+
+@app.get("/api/monitoring/runs/{run_id}", response_model=MonitoringRun)
+async def get_monitoring_run(run_id: str):
+    run = await MongoDBManager.get_monitoring_run(run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Monitoring run not found")
+    return run
+
+@app.post("/api/monitoring/runs/{run_id}/resume")
+async def resume_monitoring_run(run_id: str):
+    """Resume a failed run from its last checkpoint; completed nodes are not run again."""
+    try:
+        run = await MongoDBManager.get_monitoring_run(run_id)
+        if not run:
+            raise HTTPException(status_code=404, detail="Monitoring run not found")
+        if run.status != "failed" or not run.resumable:
+            raise HTTPException(status_code=409, detail=f"Monitoring run is {run.status} and cannot be resumed")
+        if run.started_at < datetime.now() - timedelta(seconds=Config.RUN_RESUME_WINDOW):
+            raise HTTPException(status_code=409, detail="Monitoring run is too old to be resumed")
+        
+        logger.info(f"Resuming monitoring run {run_id}")
+        await dispatch_monitoring(str(run.repo_id), "manual", run_id)
+        return {"message": "Monitoring run resumed", "run_id": run_id}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error resuming monitoring run {run_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error resuming monitoring run: {str(e)}")
+
+@app.delete("/api/monitoring/runs/{run_id}")
+async def cancel_monitoring_run(run_id: str):
+    """Cancel a running analysis; it stops before its next node, GitHub or LLM call."""
+    try:
+        run = await MongoDBManager.get_monitoring_run(run_id)
+        if not run:
+            raise HTTPException(status_code=404, detail="Monitoring run not found")
+        if run.status != "running":
+            raise HTTPException(status_code=409, detail=f"Monitoring run is {run.status} and cannot be cancelled")
+        
+        await async_db.monitoring_runs.update_one(
+            {"_id": ObjectId(run_id), "status": "running"},
+            {"$set": {"cancel_requested": True}}
+        )
+        # Runs in this process stop right away; workers elsewhere see the flag on their next poll
+        deadline = active_runs.get(run_id)
+        if deadline:
+            deadline.cancel()
+        logger.info(f"Cancellation requested for monitoring run {run_id}")
+        return {"message": "Cancellation requested", "run_id": run_id}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error cancelling monitoring run {run_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error cancelling monitoring run: {str(e)}")
+
 @app.get("/api/stats")
 async def get_stats():
     try:
@@ -612,6 +1582,48 @@ async def get_stats():
         logger.error(f"Error fetching stats: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error fetching stats: {str(e)}")
 
+@app.get("/api/repositories/{repo_id}/usage")
+async def get_repository_usage(repo_id: str, days: int = 30):
+    try:
+        repo = await MongoDBManager.get_repository(repo_id)
+        if not repo:
+            raise HTTPException(status_code=404, detail="Repository not found")
+
+        daily = await MongoDBManager.get_llm_usage(repo_id, days)
+        totals = {
+            key: sum(day.get(key, 0) for day in daily)
+            for key in ("calls", "prompt_tokens", "completion_tokens")
+        }
+        return {"repo_id": repo_id, "days": days, "totals": totals, "daily": daily}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error fetching LLM usage for {repo_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error fetching LLM usage: {str(e)}")
+
+@app.get("/api/stats/trends")
+async def get_trends(repo_id: Optional[str] = None, granularity: str = "day",
+                     start: Optional[datetime] = None, end: Optional[datetime] = None):
+    """Failure rate, MTTR and fix success per hour/day bucket, for one repository or the whole fleet."""
+    if granularity not in rollups.GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"granularity must be one of {', '.join(rollups.GRANULARITIES)}")
+    if repo_id and not ObjectId.is_valid(repo_id):
+        raise HTTPException(status_code=400, detail="Invalid repository ID")
+    try:
+        end = end or datetime.now()
+        start = start or end - timedelta(days=30 if granularity == "day" else 2)
+        points = await MongoDBManager.get_trends(repo_id, granularity, start, end)
+        return {
+            "repo_id": repo_id,
+            "granularity": granularity,
+            "start": start,
+            "end": end,
+            "points": points
+        }
+    except Exception as e:
+        logger.error(f"Error fetching trends: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Error fetching trends: {str(e)}")
+
 @app.get("/api/repositories/{repo_id}/status")
 async def get_repository_status(repo_id: str):
     try:
@@ -651,10 +1663,25 @@ if __name__ == "__main__":
             "created_at": datetime.now()
         }
         
+        ensure_indexes()
         repositories_collection.insert_one(repo_data)
         
         monitor_repository_sync(temp_repo_id)
         repositories_collection.delete_one({"_id": ObjectId(temp_repo_id)})
+    elif len(sys.argv) > 1 and sys.argv[1] == "rollup":
+        ensure_indexes()
+        days = int(sys.argv[2]) if len(sys.argv) > 2 else None
+        since = datetime.now() - timedelta(days=days) if days else None
+        count = rollups.rebuild(monitoring_results_collection, rollups_collection, since)
+        print(f"Rebuilt {count} rollup buckets")
+    elif len(sys.argv) > 1 and sys.argv[1] == "compact":
+        ensure_indexes()
+        stats = compact_monitoring_results()
+        print(f"Compacted monitoring results: {stats}" if stats else "Compaction already running elsewhere")
+    elif len(sys.argv) > 1 and sys.argv[1] == "worker":
+        ensure_indexes()
+        concurrency = int(sys.argv[2]) if len(sys.argv) > 2 else Config.WORKER_CONCURRENCY
+        run_worker(concurrency)
     else:
         uvicorn.run(
             "main:app",
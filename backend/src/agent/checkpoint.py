@@ -0,0 +1,140 @@
+# src/agent/checkpoint.py
+from datetime import datetime
+from typing import Iterator, Optional, Sequence, Any
+from pymongo import ASCENDING, DESCENDING
+from langgraph.checkpoint.base import (
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    WRITES_IDX_MAP,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
+
+
+class MongoCheckpointSaver(BaseCheckpointSaver):
+    """LangGraph checkpointer storing agent state in MongoDB after every node.
+
+    One thread per monitoring run (thread_id = run id). Checkpoints are stored
+    whole rather than as per-channel blobs: agent state is small and a run has
+    only a handful of steps. Sync only, like the rest of the agent.
+    """
+
+    def __init__(self, checkpoints, writes, ttl_days: int = 7):
+        super().__init__()
+        self.checkpoints = checkpoints
+        self.writes = writes
+        self.ttl_days = ttl_days
+
+    def ensure_indexes(self):
+        self.checkpoints.create_index(
+            [("thread_id", ASCENDING), ("checkpoint_ns", ASCENDING), ("checkpoint_id", DESCENDING)],
+            unique=True
+        )
+        self.writes.create_index(
+            [("thread_id", ASCENDING), ("checkpoint_ns", ASCENDING), ("checkpoint_id", ASCENDING),
+             ("task_id", ASCENDING), ("idx", ASCENDING)],
+            unique=True
+        )
+        for collection in (self.checkpoints, self.writes):
+            collection.create_index("created_at", expireAfterSeconds=self.ttl_days * 86400)
+
+    def _load(self, doc: dict) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id = doc["thread_id"], doc["checkpoint_ns"], doc["checkpoint_id"]
+        writes = self.writes.find(
+            {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}
+        ).sort([("task_path", ASCENDING), ("task_id", ASCENDING), ("idx", ASCENDING)])
+        return CheckpointTuple(
+            config={"configurable": {
+                "thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id
+            }},
+            checkpoint=self.serde.loads_typed((doc["type"], doc["checkpoint"])),
+            metadata=self.serde.loads_typed((doc["metadata_type"], doc["metadata"])),
+            parent_config={"configurable": {
+                "thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": doc["parent_checkpoint_id"]
+            }} if doc.get("parent_checkpoint_id") else None,
+            pending_writes=[
+                (write["task_id"], write["channel"], self.serde.loads_typed((write["type"], write["value"])))
+                for write in writes
+            ]
+        )
+
+    def get_tuple(self, config) -> Optional[CheckpointTuple]:
+        query = {
+            "thread_id": config["configurable"]["thread_id"],
+            "checkpoint_ns": config["configurable"].get("checkpoint_ns", "")
+        }
+        if checkpoint_id := get_checkpoint_id(config):
+            query["checkpoint_id"] = checkpoint_id
+        # Checkpoint ids are time-ordered uuid6 strings, so the largest is the latest
+        doc = self.checkpoints.find_one(query, sort=[("checkpoint_id", DESCENDING)])
+        return self._load(doc) if doc else None
+
+    def list(self, config, *, filter: Optional[dict] = None, before=None,
+             limit: Optional[int] = None) -> Iterator[CheckpointTuple]:
+        query = {}
+        if config:
+            query["thread_id"] = config["configurable"]["thread_id"]
+            if (checkpoint_ns := config["configurable"].get("checkpoint_ns")) is not None:
+                query["checkpoint_ns"] = checkpoint_ns
+            if checkpoint_id := get_checkpoint_id(config):
+                query["checkpoint_id"] = checkpoint_id
+        if before and (before_id := get_checkpoint_id(before)):
+            query.setdefault("checkpoint_id", {})
+            if isinstance(query["checkpoint_id"], dict):
+                query["checkpoint_id"]["$lt"] = before_id
+
+        for doc in self.checkpoints.find(query).sort("checkpoint_id", DESCENDING):
+            checkpoint = self._load(doc)
+            if filter and any(checkpoint.metadata.get(key) != value for key, value in filter.items()):
+                continue
+            if limit is not None:
+                if limit <= 0:
+                    return
+                limit -= 1
+            yield checkpoint
+
+    def put(self, config, checkpoint: Checkpoint, metadata: CheckpointMetadata,
+            new_versions: ChannelVersions):
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_type, checkpoint_data = self.serde.dumps_typed(checkpoint)
+        metadata_type, metadata_data = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+        self.checkpoints.update_one(
+            {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]},
+            {"$set": {
+                "parent_checkpoint_id": config["configurable"].get("checkpoint_id"),
+                "type": checkpoint_type,
+                "checkpoint": checkpoint_data,
+                "metadata_type": metadata_type,
+                "metadata": metadata_data,
+                "created_at": datetime.now()
+            }},
+            upsert=True
+        )
+        return {"configurable": {
+            "thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]
+        }}
+
+    def put_writes(self, config, writes: Sequence[tuple[str, Any]], task_id: str, task_path: str = "") -> None:
+        key = {
+            "thread_id": config["configurable"]["thread_id"],
+            "checkpoint_ns": config["configurable"].get("checkpoint_ns", ""),
+            "checkpoint_id": config["configurable"]["checkpoint_id"],
+            "task_id": task_id
+        }
+        for idx, (channel, value) in enumerate(writes):
+            idx = WRITES_IDX_MAP.get(channel, idx)
+            value_type, value_data = self.serde.dumps_typed(value)
+            fields = {"channel": channel, "type": value_type, "value": value_data,
+                      "task_path": task_path, "created_at": datetime.now()}
+            # Regular writes are kept from the first attempt; special writes (errors,
+            # interrupts) carry negative indexes and are replaced
+            update = {"$set": fields} if idx < 0 else {"$setOnInsert": fields}
+            self.writes.update_one({**key, "idx": idx}, update, upsert=True)
+
+    def delete_thread(self, thread_id: str) -> None:
+        self.checkpoints.delete_many({"thread_id": thread_id})
+        self.writes.delete_many({"thread_id": thread_id})
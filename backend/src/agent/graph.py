@@ -249,27 +249,63 @@ from langgraph.graph import StateGraph, END
 from .state import AgentState
 from .tools import GitHubTools
 from src.llm.client import LLMClient
+from src.utils.log_archive import get_log_archive
+from src.utils.issue_index import failure_fingerprint
+from src.utils.log_setup import log_context
+from src.utils.deadline import RunTimeout, RunCancelled
+from src.utils import tracing
 
 logger = logging.getLogger(__name__)
 
 
 class MonitoringAgent:
     """Agent to monitor GitHub workflow health, analyze failures, and auto-fix if possible."""
-    def __init__(self):
-        self.tools = GitHubTools()
-        self.llm = LLMClient()
+    def __init__(self, claim_run=None, find_issue=None, record_issue=None, checkpointer=None, progress=None,
+                 deadline=None, match_failure=None, record_failure=None, github_token=None):
+        # claim_run(run_id) -> bool atomically marks a run as analyzed; False means it already was
+        self.claim_run = claim_run
+        # find_issue(fingerprint) -> open issue entry for the same failure (counting this occurrence) or None;
+        # record_issue(fingerprint, issue_number, issue_url) remembers a newly created issue
+        self.find_issue = find_issue
+        self.record_issue = record_issue
+        # With a checkpointer, state is saved after every node and run(thread_id=...) resumes
+        self.checkpointer = checkpointer
+        # progress(update) is told the current node and partial LLM output while the run is in flight
+        self.progress = progress
+        # deadline (src.utils.deadline.Deadline) is checked before every node and bounds every
+        # GitHub and LLM call, so a hung connection cannot hold the run past its budget
+        self.deadline = deadline
+        # match_failure(logs) -> {"incident_id", "similarity", "analysis"} for a near-duplicate failure
+        # already analyzed in a repository of the same owner, or None; after a miss, record_failure(logs, job_name,
+        # analysis) -> incident_id stores the new analysis (analysis=None when there is none)
+        self.match_failure = match_failure
+        self.record_failure = record_failure
+        # github_token is the monitored repository's own access token
+        self.tools = GitHubTools(deadline, token=github_token)
+        self.llm = LLMClient(progress=progress, deadline=deadline)
         self.graph = self._build_graph()
 
+    def _node(self, step):
+        # LangGraph runs nodes in a copy of the caller's context; tag their logs with the run once known
+        def run(state: AgentState) -> AgentState:
+            with log_context(run_id=state.get("failed_run_id")), tracing.span(f"agent.{step.__name__}"):
+                if self.deadline:
+                    self.deadline.check()
+                if self.progress:
+                    self.llm.report_progress({"node": step.__name__})
+                return step(state)
+        return run
+
     def _build_graph(self):
         workflow = StateGraph(AgentState)
-        workflow.add_node("check_health", lambda state: self.check_health(state))
-        workflow.add_node("fetch_logs", lambda state: self.fetch_logs(state))
-        workflow.add_node("analyze_failure", lambda state: self.analyze_failure(state))
-        workflow.add_node("get_original_workflow", lambda state: self.get_original_workflow(state))
-        workflow.add_node("generate_fix", lambda state: self.generate_fix(state))
-        workflow.add_node("commit_fix", lambda state: self.commit_fix(state))
-        workflow.add_node("create_issue", lambda state: self.create_issue(state))
-        workflow.add_node("mark_success", lambda state: self.mark_success(state))
+        workflow.add_node("check_health", self._node(self.check_health))
+        workflow.add_node("fetch_logs", self._node(self.fetch_logs))
+        workflow.add_node("analyze_failure", self._node(self.analyze_failure))
+        workflow.add_node("get_original_workflow", self._node(self.get_original_workflow))
+        workflow.add_node("generate_fix", self._node(self.generate_fix))
+        workflow.add_node("commit_fix", self._node(self.commit_fix))
+        workflow.add_node("create_issue", self._node(self.create_issue))
+        workflow.add_node("mark_success", self._node(self.mark_success))
 
         workflow.set_entry_point("check_health")
         workflow.add_conditional_edges(
@@ -293,20 +329,41 @@ class MonitoringAgent:
         )
 
         workflow.add_edge("get_original_workflow", "generate_fix")
-        workflow.add_edge("generate_fix", "commit_fix")
+        workflow.add_conditional_edges(
+            "generate_fix",
+            lambda state: self.conditional_fix(state),
+            {
+                "commit_fix": "commit_fix",
+                "create_issue": "create_issue"
+            }
+        )
         workflow.add_edge("commit_fix", END)
         workflow.add_edge("create_issue", END)
         workflow.add_edge("mark_success", END)
 
-        return workflow.compile()
+        return workflow.compile(checkpointer=self.checkpointer)
 
     def check_health(self, state: AgentState) -> AgentState:
-        result = self.tools.check_workflow_health(state["owner"], state["repo_name"])
+        result = self.tools.check_workflow_health(state["owner"], state["repo_name"], state.get("run_cursor"))
         logger.info(f"Health check result for {state['owner']}/{state['repo_name']}: {result}")
 
-        if result["status"] == "failure":
+        if result["status"] != "error":
+            state["run_cursor"] = result.get("cursor")
+
+        if result["status"] == "failure" and self.claim_run and not self.claim_run(result["run_id"]):
+            logger.info(f"Run {result['run_id']} was already analyzed - skipping")
+            state["health_status"] = "unchanged"
+            state["status"] = "skipped"
+        elif result["status"] == "unchanged":
+            logger.info("No new workflow runs since last check - skipping")
+            state["health_status"] = "unchanged"
+            state["status"] = "skipped"
+        elif result["status"] == "failure":
             state["failed_run_id"] = result["run_id"]
             state["failed_job_id"] = result["job_id"]
+            state["failed_job_name"] = result.get("job_name")
+            state["failed_workflow_path"] = result.get("workflow_path")
+            state["failed_run_head"] = result.get("head")
             state["health_status"] = "failure"
             logger.warning(f"Failure detected in run {result['run_id']}")
         elif result["status"] == "error":
@@ -329,6 +386,7 @@ class MonitoringAgent:
                     state["repo_name"],
                     state["failed_job_id"]
                 )
+                self._archive_logs(state, full_logs)
                 
                 # 2. Filter for the latest logs (Fix for Context Limit Exceeded)
                 # Keeping last 20,000 characters is usually enough for ~5-6k tokens
@@ -340,6 +398,19 @@ class MonitoringAgent:
                 logger.info(f"Original log size: {len(full_logs)}. Processed log size: {len(filtered_logs)}")
             return state
 
+    def _archive_logs(self, state: AgentState, logs: str):
+        """Keep the full log on disk so it can be paged later without calling GitHub."""
+        if not logs or logs.startswith(("Failed to fetch logs", "Error fetching logs")):
+            return
+        try:
+            get_log_archive().put(
+                f"{state['owner']}/{state['repo_name']}",
+                state["failed_job_id"],
+                logs
+            )
+        except Exception as e:
+            logger.warning(f"Failed to archive logs for job {state['failed_job_id']}: {e}")
+
     def _get_log_tail(self, logs: str, max_chars: int) -> str:
         """
         Helper to get the end of the log to fit in LLM context.
@@ -362,8 +433,25 @@ class MonitoringAgent:
 
     def analyze_failure(self, state: AgentState) -> AgentState:
         if state.get("raw_logs"):
+            match = self.match_failure(state["raw_logs"]) if self.match_failure else None
+            if match:
+                logger.info(f"Logs match incident {match['incident_id']} "
+                            f"({match['similarity']:.0%} similar) - reusing its analysis")
+                state["analysis"] = {**match["analysis"], "incident_similarity": match["similarity"]}
+                state["incident_id"] = match["incident_id"]
+                return state
+
             logger.info("Analyzing failure with LLM")
-            analysis = self.llm.analyze_failure(state["raw_logs"])
+            analysis = None
+            try:
+                analysis = self.llm.analyze_failure(state["raw_logs"])
+            finally:
+                if self.record_failure:
+                    # Also on failure, so runs waiting on this analysis stop waiting
+                    state["incident_id"] = self.record_failure(
+                        state["raw_logs"], state.get("failed_job_name"),
+                        None if not analysis or analysis.get("analysis_failed") else analysis
+                    )
             state["analysis"] = analysis
             logger.info(f"Analysis complete: {analysis.get('root_cause', 'Unknown')}")
         return state
@@ -386,30 +474,64 @@ class MonitoringAgent:
             logger.info("Generating fix with LLM")
             proposed_fix = self.llm.generate_fix(
                 state["original_content"],
-                state["analysis"].get("fix_suggestion", "")
+                state["analysis"].get("fix_suggestion", ""),
+                state.get("failed_job_name")
             )
             state["proposed_fix"] = proposed_fix
-            logger.info("Fix generated successfully")
+            if proposed_fix:
+                logger.info("Fix generated successfully")
         return state
 
     def commit_fix(self, state: AgentState) -> AgentState:
         if all(key in state for key in ["workflow_file_path", "proposed_fix"]):
             logger.info(f"Committing fix to {state['workflow_file_path']}")
-            commit_sha = self.tools.commit_workflow_fix(
+            root_cause = state['analysis'].get('root_cause', 'Unknown')
+            commit = self.tools.commit_workflow_fix(
                 state["owner"],
                 state["repo_name"],
                 state["workflow_file_path"],
                 state["proposed_fix"],
-                f"Fix workflow failure: {state['analysis'].get('root_cause', 'Unknown')}"
+                f"Fix workflow failure: {root_cause}",
+                branch=f"ci-fix/run-{state['failed_run_id']}",
+                base=state.get("failed_run_head"),
+                pr_body=f"Automated fix for failed workflow run {state['failed_run_id']}.\n\n"
+                        f"*Root Cause:* {root_cause}\n\n"
+                        f"*Fix:* {state['analysis'].get('fix_suggestion', '')}"
             )
-            state["commit_sha"] = commit_sha
+            state["commit_sha"] = commit["commit_sha"]
+            state["fix_branch"] = commit["branch"]
+            state["pr_url"] = commit["pr_url"]
             state["fix_applied"] = True
-            logger.info(f"Fix committed with SHA: {commit_sha}")
+            logger.info(f"Fix committed with SHA: {commit['commit_sha']} on {commit['branch']}")
         return state
 
     def create_issue(self, state: AgentState) -> AgentState:
+        fingerprint = failure_fingerprint(state.get("failed_workflow_path"), state.get("failed_job_name"),
+                                          state.get("raw_logs"))
+        state["issue_fingerprint"] = fingerprint
+        existing = self.find_issue(fingerprint) if self.find_issue else None
+        if existing:
+            logger.info(f"Failure already tracked in issue #{existing['issue_number']} - commenting")
+            try:
+                state["issue_comment_url"] = self.tools.comment_on_issue(
+                    state["owner"],
+                    state["repo_name"],
+                    existing["issue_number"],
+                    f"Seen again in workflow run {state.get('failed_run_id', 'Unknown')} "
+                    f"({existing.get('occurrences', 1)} occurrences so far)."
+                )
+                state["issue_url"] = existing["issue_url"]
+                return state
+            except Exception as e:
+                # Deleted, transferred or locked - open a new issue instead
+                logger.warning(f"Could not comment on issue #{existing['issue_number']}: {e}")
+
         logger.info("Creating GitHub issue")
         title = f"Workflow Failure: {state.get('analysis', {}).get('root_cause', 'Unknown')}"
+        if state.get("analysis", {}).get("is_fixable"):
+            verdict = "The automated agent could not generate a valid fix for this issue."
+        else:
+            verdict = "The automated agent determined this issue is not automatically fixable."
 
         body = f"""## Workflow Failure Analysis
 
@@ -421,7 +543,7 @@ class MonitoringAgent:
 
 
 ### Analysis:
-The automated agent determined this issue is not automatically fixable.
+{verdict}
 
 *Suggested Action:* {state.get('analysis', {}).get('fix_suggestion', 'Manual intervention required.')}"""
 
@@ -433,6 +555,8 @@ The automated agent determined this issue is not automatically fixable.
         )
         state["issue_url"] = issue_url
         logger.info(f"Issue created: {issue_url}")
+        if self.record_issue:
+            self.record_issue(fingerprint, int(issue_url.rstrip("/").rsplit("/", 1)[-1]), issue_url)
         return state
 
     def mark_success(self, state: AgentState) -> AgentState:
@@ -458,7 +582,14 @@ The automated agent determined this issue is not automatically fixable.
             return "get_original_workflow"
         return "create_issue"
 
-    def run(self, repo_url: str) -> dict:
+    def conditional_fix(self, state: AgentState) -> str:
+        # A fix that never validated is reported instead of committed
+        if state.get("proposed_fix"):
+            return "commit_fix"
+        return "create_issue"
+
+    def run(self, repo_url: str, cursor: dict = None, thread_id: str = None) -> dict:
+        """Run the graph. With a checkpointer and thread_id, an interrupted run continues at the failed node."""
         from urllib.parse import urlparse
         parsed = urlparse(repo_url)
         path_parts = parsed.path.strip('/').split('/')
@@ -469,14 +600,24 @@ The automated agent determined this issue is not automatically fixable.
             "repo_name": path_parts[1],
             "failed_run_id": None,
             "failed_job_id": None,
+            "failed_job_name": None,
+            "failed_workflow_path": None,
+            "failed_run_head": None,
             "raw_logs": None,
             "analysis": None,
             "original_content": None,
             "proposed_fix": None,
             "workflow_file_path": None,
             "commit_sha": None,
+            "fix_branch": None,
+            "pr_url": None,
             "issue_url": None,
+            "issue_comment_url": None,
+            "issue_fingerprint": None,
+            "incident_id": None,
             "error_message": None,
+            "token_usage": None,
+            "run_cursor": cursor,
             "health_status": None,
             "status": None,
             "fix_applied": False
@@ -484,8 +625,16 @@ The automated agent determined this issue is not automatically fixable.
 
         logger.info(f"Starting monitoring agent for {repo_url}")
 
+        config = {"configurable": {"thread_id": thread_id}} if self.checkpointer and thread_id else None
+
         try:
-            final_state = self.graph.invoke(initial_state)
+            snapshot = self.graph.get_state(config) if config else None
+            if snapshot and snapshot.next:
+                logger.info(f"Resuming run {thread_id} at {', '.join(snapshot.next)}")
+                final_state = self.graph.invoke(None, config)
+            else:
+                final_state = self.graph.invoke(initial_state, config)
+            final_state["token_usage"] = dict(self.llm.usage)
             logger.info("Agent completed successfully")
 
             if not final_state.get("status"):
@@ -498,13 +647,46 @@ The automated agent determined this issue is not automatically fixable.
                 else:
                     final_state["status"] = "success"
 
+            if final_state["status"] == "error" and self._expired():
+                # A tool caught the timeout its call was cut to by the run's deadline
+                return self._stopped(RunTimeout(f"Run exceeded its deadline: {final_state.get('error_message')}"))
+
             logger.info(f"Final status: {final_state.get('status')}")
             return final_state
 
+        except (RunTimeout, RunCancelled) as e:
+            return self._stopped(e)
         except Exception as e:
+            if self._expired():
+                # The call failed because its timeout was cut short by the run's deadline
+                return self._stopped(RunTimeout(f"Run exceeded its deadline: {str(e)}"))
             logger.error(f"Agent execution failed: {e}")
             return {
                 "status": "error",
                 "error_message": str(e),
-                "health_status": "error"
-            }
\ No newline at end of file
+                "token_usage": dict(self.llm.usage),
+                "health_status": "error",
+                "resumable": self._resumable(config)
+            }
+
+    def _expired(self) -> bool:
+        remaining = self.deadline.remaining() if self.deadline else None
+        return remaining is not None and remaining <= 0
+
+    def _stopped(self, e: BaseException) -> dict:
+        """Result for a run stopped by its deadline or a cancel request; these are final, not resumed."""
+        status = "cancelled" if isinstance(e, RunCancelled) else "timeout"
+        logger.warning(f"Agent run stopped ({status}): {e}")
+        return {
+            "status": status,
+            "error_message": str(e),
+            "token_usage": dict(self.llm.usage),
+            "health_status": "error",
+            "resumable": False
+        }
+
+    def _resumable(self, config) -> bool:
+        try:
+            return bool(config and self.graph.get_state(config).next)
+        except Exception:
+            return False
\ No newline at end of file
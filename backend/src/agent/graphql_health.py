@@ -0,0 +1,117 @@
+# src/agent/graphql_health.py
+"""Batched workflow health checks through the GitHub GraphQL API.
+
+One query covers up to `batch_size` repositories that share an access token,
+reading the GitHub Actions check suites of each default branch head. This is
+a prefilter for sweeps: repositories whose latest run succeeded or that have
+no new runs need no REST calls at all, while failures and anything the query
+cannot classify go through the regular agent (and REST) path. Only the
+default branch is inspected, unlike the REST check which sees every branch.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from src.utils.config import Config
+
+logger = logging.getLogger(__name__)
+
+GITHUB_ACTIONS_APP_ID = 15368
+
+REPOSITORY_FIELDS = """
+    defaultBranchRef {
+      target {
+        ... on Commit {
+          checkSuites(last: 20, filterBy: {appId: %d}) {
+            nodes {
+              status
+              conclusion
+              workflowRun { databaseId updatedAt }
+            }
+          }
+        }
+      }
+    }
+""" % GITHUB_ACTIONS_APP_ID
+
+
+def build_query(count: int) -> str:
+    variables = ", ".join(f"$o{i}: String!, $n{i}: String!" for i in range(count))
+    fields = "\n".join(f"  r{i}: repository(owner: $o{i}, name: $n{i}) {{{REPOSITORY_FIELDS}  }}" for i in range(count))
+    return f"query({variables}) {{\n{fields}\n}}"
+
+
+def classify(repository: dict, cursor: dict = None) -> dict:
+    """Map one repository's check suites to a health result shaped like check_workflow_health.
+
+    "unknown" means the REST path has to decide.
+    """
+    if not repository:
+        return {"status": "unknown"}
+    target = (repository.get("defaultBranchRef") or {}).get("target") or {}
+    nodes = (target.get("checkSuites") or {}).get("nodes") or []
+    runs = [node["workflowRun"] for node in nodes
+            if node.get("status") == "COMPLETED" and node.get("workflowRun")]
+    conclusions = {node["workflowRun"]["databaseId"]: node.get("conclusion") for node in nodes
+                   if node.get("status") == "COMPLETED" and node.get("workflowRun")}
+    if cursor:
+        runs = [run for run in runs
+                if run["updatedAt"] > cursor["updated_at"] and run["databaseId"] != cursor["run_id"]]
+    if not runs:
+        return {"status": "unchanged", "cursor": cursor} if cursor else {"status": "unknown"}
+
+    latest = max(runs, key=lambda run: run["updatedAt"])
+    new_cursor = {"run_id": latest["databaseId"], "updated_at": latest["updatedAt"]}
+    conclusion = conclusions[latest["databaseId"]]
+    if conclusion == "SUCCESS":
+        return {"status": "success", "cursor": new_cursor}
+    if conclusion == "FAILURE":
+        return {"status": "failure", "run_id": latest["databaseId"]}
+    return {"status": "unknown"}
+
+
+def _check_batch(token: str, repos: list) -> dict:
+    variables = {}
+    for i, repo in enumerate(repos):
+        variables[f"o{i}"] = repo["owner"]
+        variables[f"n{i}"] = repo["name"]
+    try:
+        response = requests.post(
+            Config.GITHUB_GRAPHQL_URL,
+            json={"query": build_query(len(repos)), "variables": variables},
+            headers={"Authorization": f"bearer {token}"},
+            timeout=Config.GITHUB_HTTP_TIMEOUT
+        )
+        response.raise_for_status()
+        body = response.json()
+    except Exception as e:
+        logger.warning(f"GraphQL health check failed for {len(repos)} repositories: {str(e)}")
+        return {str(repo["_id"]): {"status": "unknown"} for repo in repos}
+
+    # Partial errors (e.g. a repository the token cannot see) null out single aliases
+    data = body.get("data") or {}
+    return {
+        str(repo["_id"]): classify(data.get(f"r{i}"), repo.get("run_cursor"))
+        for i, repo in enumerate(repos)
+    }
+
+
+def check_fleet_health(repos: list, batch_size: int = 25, max_workers: int = 4) -> dict:
+    """Check many repositories with as few GraphQL requests as possible.
+
+    Repositories are grouped by access token, since each query runs as one
+    token. Returns health results keyed by repository id.
+    """
+    batches = []
+    by_token = {}
+    for repo in repos:
+        by_token.setdefault(repo["access_token"], []).append(repo)
+    for token, token_repos in by_token.items():
+        for start in range(0, len(token_repos), batch_size):
+            batches.append((token, token_repos[start:start + batch_size]))
+
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for batch_result in executor.map(lambda batch: _check_batch(*batch), batches):
+            results.update(batch_result)
+    logger.info(f"GraphQL health check covered {len(repos)} repositories in {len(batches)} requests")
+    return results
@@ -7,11 +7,24 @@ class AgentState(TypedDict):
     repo_name: str
     failed_run_id: Optional[int]
     failed_job_id: Optional[int]
+    failed_job_name: Optional[str]
+    failed_workflow_path: Optional[str]
+    failed_run_head: Optional[dict]
     raw_logs: Optional[str]
     analysis: Optional[dict]
     original_content: Optional[str]
     proposed_fix: Optional[str]
     workflow_file_path: Optional[str]
     commit_sha: Optional[str]
+    fix_branch: Optional[str]
+    pr_url: Optional[str]
     issue_url: Optional[str]
-    error_message: Optional[str]
\ No newline at end of file
+    issue_comment_url: Optional[str]
+    issue_fingerprint: Optional[str]
+    incident_id: Optional[str]
+    error_message: Optional[str]
+    token_usage: Optional[dict]
+    run_cursor: Optional[dict]
+    health_status: Optional[str]
+    status: Optional[str]
+    fix_applied: bool
\ No newline at end of file
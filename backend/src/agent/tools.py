@@ -1,127 +1,170 @@
 # src/agent/tools.py
 import os
+import logging
 import requests
-from github import Github, GithubException
+from github import Github
 import base64
-from datetime import datetime, timedelta
+from src.utils.config import Config
+from src.utils import tracing
+from src.utils.workflow_cache import get_workflow_cache
+
+logger = logging.getLogger(__name__)
+
+
+class GitHubAPIError(Exception):
+    """A failed GitHub API call, with the HTTP status and response body when there was a response."""
+
+    def __init__(self, message: str, status_code: int = None, body: str = ""):
+        super().__init__(message)
+        self.status_code = status_code
+        self.body = body
+
 
 class GitHubTools:
-    def __init__(self):
-        self.gh = Github(os.getenv("GITHUB_TOKEN"))
+    def __init__(self, deadline=None, token=None):
+        # Every request is bounded by GITHUB_HTTP_TIMEOUT and, with a deadline, by the run's time left
+        self.deadline = deadline
+        # Runs for different repositories share the process, so each one carries its own token;
+        # GITHUB_TOKEN is only the fallback for standalone use
+        self.token = token or os.getenv("GITHUB_TOKEN")
+        self.gh = Github(self.token, base_url=Config.GITHUB_API_URL,
+                         timeout=int(Config.GITHUB_HTTP_TIMEOUT))
+        self.workflow_cache = get_workflow_cache()
+
+    def _timeout(self) -> float:
+        """Timeout for the next HTTP call; raises once the run is cancelled or out of time."""
+        if self.deadline is None:
+            return Config.GITHUB_HTTP_TIMEOUT
+        return self.deadline.timeout(Config.GITHUB_HTTP_TIMEOUT)
     
     def _make_request(self, method, endpoint, **kwargs):
         """Make HTTP request to GitHub API with error handling"""
-        url = f"https://api.github.com{endpoint}"
+        return self._request(method, endpoint, **kwargs).json()
+    
+    def _request(self, method, endpoint, **kwargs):
+        """Make HTTP request to GitHub API and return the raw response (304s included)"""
+        url = f"{Config.GITHUB_API_URL}{endpoint}"
         
-        token = os.getenv("GITHUB_TOKEN")
+        token = self.token
         if token:
             headers = kwargs.get('headers', {})
             headers['Authorization'] = f'token {token}'
             headers['Accept'] = 'application/vnd.github.v3+json'
             kwargs['headers'] = headers
+        kwargs.setdefault('timeout', self._timeout())
         
         try:
-            response = requests.request(method, url, **kwargs)
-            response.raise_for_status()
-            return response.json()
+            with tracing.span("github.request", {"http.method": method, "github.endpoint": endpoint}) as current:
+                response = requests.request(method, url, **kwargs)
+                if current:
+                    current.set_attribute("http.status_code", response.status_code)
+                response.raise_for_status()
+                return response
         except requests.exceptions.RequestException as e:
-            print(f"❌ API request error: {e}")
-            raise Exception(f"GitHub API error: {str(e)}")
+            logger.error(f"API request error: {e}")
+            response = getattr(e, "response", None)
+            raise GitHubAPIError(f"GitHub API error: {str(e)}",
+                                 status_code=response.status_code if response is not None else None,
+                                 body=response.text if response is not None else "")
     
-    def check_workflow_health(self, owner, repo_name):
-        """Check workflow health - consider both recent and older runs if no recent ones found"""
+    def check_workflow_health(self, owner, repo_name, cursor=None):
+        """Check workflow health of completed runs newer than `cursor`.
+
+        `cursor` is the high-water mark from the previous check ({"run_id", "updated_at"}).
+        Every result carries the advanced cursor; "unchanged" means no new completed runs.
+        """
         try:
-            print(f"🔍 Checking workflow health for {owner}/{repo_name}")
-            
-            recent_time = (datetime.now() - timedelta(hours=2)).isoformat() + 'Z'
+            logger.info(f"Checking workflow health for {owner}/{repo_name}", extra={"sampled": True})
             
             workflows = self._make_request('GET', f'/repos/{owner}/{repo_name}/actions/runs', 
                                         params={
-                                            'per_page': 10,
-                                            'created': f'>={recent_time}'
+                                            'per_page': 20,
+                                            'status': 'completed'
                                         })
             
-            recent_runs = workflows.get('workflow_runs', [])
-            print(f"📊 Found {len(recent_runs)} recent workflow runs (last 2 hours)")
+            runs = workflows.get('workflow_runs', [])
+            if cursor:
+                # GitHub timestamps are ISO-8601 UTC strings, so they compare lexicographically
+                runs = [run for run in runs
+                        if run['updated_at'] > cursor['updated_at'] and run['id'] != cursor['run_id']]
+            logger.info(f"Found {len(runs)} new completed workflow runs", extra={"sampled": True})
             
-            if recent_runs:
-                recent_runs = sorted(recent_runs, key=lambda x: x['created_at'], reverse=True)
-                
-                for run in recent_runs:
-                    print(f"🔍 Recent Run {run['id']}: {run['status']} - {run['conclusion']} - {run['created_at']}")
-                    
-                    # Only consider completed runs
-                    if run['status'] == 'completed':
-                        if run['conclusion'] == 'failure':
-                            print(f"❌ Found recent failed run: {run['id']}")
-                            return {
-                                "status": "failure",
-                                "run_id": run['id'],
-                                "job_id": self._get_failed_job_id(owner, repo_name, run['id']),
-                                "run_created_at": run['created_at']
-                            }
-                        elif run['conclusion'] == 'success':
-                            print(f"✅ Found recent successful run: {run['id']}")
-                            return {"status": "success"}
-                        else:
-                            print(f"⚠ Recent run {run['id']} has conclusion: {run['conclusion']}")
-                            continue
-            
-            print("No recent runs found, checking older runs for overall health...")
-            all_workflows = self._make_request('GET', f'/repos/{owner}/{repo_name}/actions/runs', 
-                                            params={'per_page': 5})
-            
-            all_runs = all_workflows.get('workflow_runs', [])
-            if all_runs:
-                latest_run = all_runs[0]  # Get the very latest run regardless of age
-                print(f"🔍 Latest overall run {latest_run['id']}: {latest_run['status']} - {latest_run['conclusion']} - {latest_run['created_at']}")
+            if not runs:
+                return {"status": "unchanged" if cursor else "success", "cursor": cursor}
+            
+            latest = max(runs, key=lambda x: x['updated_at'])
+            new_cursor = {"run_id": latest['id'], "updated_at": latest['updated_at']}
+            
+            for run in sorted(runs, key=lambda x: x['created_at'], reverse=True):
+                logger.info(f"Run {run['id']}: {run['status']} - {run['conclusion']} - {run['created_at']}", extra={"sampled": True})
                 
-                if latest_run['status'] == 'completed':
-                    if latest_run['conclusion'] == 'failure':
-                        print(f"❌ Latest run failed: {latest_run['id']}")
-                        return {
-                            "status": "failure", 
-                            "run_id": latest_run['id'],
-                            "job_id": self._get_failed_job_id(owner, repo_name, latest_run['id']),
-                            "run_created_at": latest_run['created_at']
-                        }
-                    elif latest_run['conclusion'] == 'success':
-                        print(f"✅ Latest run successful: {latest_run['id']}")
-                        return {"status": "success"}
+                if run['conclusion'] == 'failure':
+                    logger.info(f"Found failed run: {run['id']}")
+                    return {**self._failure_result(owner, repo_name, run), "cursor": new_cursor}
+                elif run['conclusion'] == 'success':
+                    logger.info(f"Found successful run: {run['id']}", extra={"sampled": True})
+                    return {"status": "success", "cursor": new_cursor}
+                else:
+                    logger.info(f"Run {run['id']} has conclusion: {run['conclusion']}", extra={"sampled": True})
             
-            print("No workflow runs found at all - repository might be new or have no workflows")
-            return {"status": "success"} 
+            return {"status": "unchanged" if cursor else "success", "cursor": new_cursor}
                     
         except Exception as e:
-            print(f"❌ Error checking workflow health: {e}")
+            logger.error(f"Error checking workflow health: {e}")
             return {
                 "status": "error", 
                 "message": str(e)
             }
     
-    def _get_failed_job_id(self, owner, repo_name, run_id):
-        """Get the ID of the first failed job in a run"""
+    def _failure_result(self, owner, repo_name, run):
+        failed_job = self._get_failed_job(owner, repo_name, run['id'])
+        if run.get('path'):
+            # Saves get_workflow_file a request for the run
+            self.workflow_cache.put_run_path(f"{owner}/{repo_name}", run['id'], run['path'])
+        head_repository = (run.get('head_repository') or {}).get('full_name')
+        head = None
+        if run.get('head_sha') and (run.get('head_commit') or {}).get('tree_id') \
+                and head_repository in (None, f"{owner}/{repo_name}"):
+            # Lets commit_files build a fix on the failed commit without fetching it again
+            head = {"branch": run.get('head_branch'), "sha": run['head_sha'],
+                    "tree_sha": run['head_commit']['tree_id']}
+        return {
+            "status": "failure",
+            "run_id": run['id'],
+            "job_id": failed_job['id'] if failed_job else None,
+            "job_name": failed_job['name'] if failed_job else None,
+            "workflow_path": run.get('path'),
+            "head": head,
+            "run_created_at": run['created_at']
+        }
+    
+    def _get_failed_job(self, owner, repo_name, run_id):
+        """Get the first failed job in a run"""
         try:
             jobs = self._make_request('GET', f'/repos/{owner}/{repo_name}/actions/runs/{run_id}/jobs')
             for job in jobs.get('jobs', []):
                 if job['conclusion'] == 'failure':
-                    return job['id']
+                    return job
             return None
         except Exception as e:
-            print(f"❌ Error getting failed job ID: {e}")
+            logger.error(f"Error getting failed job ID: {e}")
             return None
     
     def fetch_failure_logs(self, owner: str, repo_name: str, job_id: int) -> str:
         try:
-            logs_url = f"https://api.github.com/repos/{owner}/{repo_name}/actions/jobs/{job_id}/logs"
+            logs_url = f"{Config.GITHUB_API_URL}/repos/{owner}/{repo_name}/actions/jobs/{job_id}/logs"
             
-            token = os.getenv("GITHUB_TOKEN")
+            token = self.token
             headers = {}
             if token:
                 headers['Authorization'] = f'token {token}'
                 headers['Accept'] = 'application/vnd.github.v3+json'
             
-            response = requests.get(logs_url, headers=headers)
+            with tracing.span("github.logs", {"github.job_id": job_id}) as current:
+                response = requests.get(logs_url, headers=headers, timeout=self._timeout())
+                if current:
+                    current.set_attributes({"http.status_code": response.status_code,
+                                            "github.log_bytes": len(response.content)})
             
             if response.status_code == 200:
                 return response.text
@@ -129,32 +172,34 @@ class GitHubTools:
                 return f"Failed to fetch logs. Status: {response.status_code}"
                 
         except Exception as e:
-            print(f"❌ Error fetching logs for job {job_id}: {e}")
+            logger.error(f"Error fetching logs for job {job_id}: {e}")
             return f"Error fetching logs: {str(e)}"
     
     def get_workflow_file(self, owner: str, repo_name: str, run_id: int) -> dict:
         try:
-            run_data = self._make_request('GET', f'/repos/{owner}/{repo_name}/actions/runs/{run_id}')
-            
-            workflow_path = run_data.get('path', '')
+            full_name = f"{owner}/{repo_name}"
+            workflow_path = self.workflow_cache.get_run_path(full_name, run_id)
+            if workflow_path is None:
+                run_data = self._make_request('GET', f'/repos/{owner}/{repo_name}/actions/runs/{run_id}')
+                workflow_path = run_data.get('path', '')
+                self.workflow_cache.put_run_path(full_name, run_id, workflow_path)
             
             if workflow_path:
                 try:
-                    file_data = self._make_request('GET', f'/repos/{owner}/{repo_name}/contents/{workflow_path}')
+                    content = self._get_file_content(owner, repo_name, workflow_path)
                     
-                    if file_data.get('content'):
-                        content = base64.b64decode(file_data['content']).decode('utf-8')
+                    if content:
                         return {
                             "path": workflow_path,
                             "content": content
                         }
                 except Exception as e:
-                    print(f"❌ Error getting workflow file {workflow_path}: {e}")
+                    logger.error(f"Error getting workflow file {workflow_path}: {e}")
             
             return self._find_workflow_file(owner, repo_name)
             
         except Exception as e:
-            print(f"❌ Error getting workflow file: {e}")
+            logger.error(f"Error getting workflow file: {e}")
             return {"path": "", "content": f"Error: {str(e)}"}
     
     def _find_workflow_file(self, owner, repo_name):
@@ -164,38 +209,159 @@ class GitHubTools:
             
             for file_info in workflows_data:
                 if file_info['name'].endswith(('.yml', '.yaml')):
-                    file_data = self._make_request('GET', f'/repos/{owner}/{repo_name}/contents/{file_info["path"]}')
-                    content = base64.b64decode(file_data['content']).decode('utf-8')
+                    content = self._get_file_content(owner, repo_name, file_info["path"], file_info.get("sha"))
                     return {
                         "path": file_info["path"],
                         "content": content
                     }
             return {"path": "", "content": "No workflow files found"}
         except Exception as e:
-            print(f"❌ Error finding workflow files: {e}")
+            logger.error(f"Error finding workflow files: {e}")
             return {"path": "", "content": f"Error finding workflow files: {str(e)}"}
     
-    def commit_workflow_fix(self, owner: str, repo_name: str, file_path: str, new_content: str, commit_message: str) -> str:
+    def _get_file_content(self, owner, repo_name, path, sha=None):
+        """Fetch and decode a file, reusing the cached copy while its blob SHA or ETag still matches"""
+        full_name = f"{owner}/{repo_name}"
+        cached = self.workflow_cache.get(full_name, path)
+        if cached and sha and cached["sha"] == sha:
+            self.workflow_cache.record(hit=True)
+            return cached["content"]
+        
+        headers = {'If-None-Match': cached["etag"]} if cached and cached["etag"] else {}
+        response = self._request('GET', f'/repos/{owner}/{repo_name}/contents/{path}', headers=headers)
+        if response.status_code == 304:
+            self.workflow_cache.record(hit=True)
+            return cached["content"]
+        
+        file_data = response.json()
+        if cached and file_data.get('sha') == cached["sha"]:
+            self.workflow_cache.record(hit=True)
+            content = cached["content"]
+        else:
+            self.workflow_cache.record(hit=False)
+            content = base64.b64decode(file_data.get('content') or '').decode('utf-8')
+        self.workflow_cache.put(full_name, path, file_data.get('sha'), response.headers.get('ETag'), content)
+        return content
+    
+    def commit_workflow_fix(self, owner: str, repo_name: str, file_path: str, new_content: str,
+                            commit_message: str, branch: str = None, pr_body: str = None, base: dict = None) -> dict:
+        """Commit a fixed workflow file according to Config.FIX_COMMIT_MODE.
+
+        Returns {"commit_sha", "branch", "pr_url"}.
+        """
+        return self.commit_files(owner, repo_name, {file_path: new_content}, commit_message,
+                                 branch=branch, mode=Config.FIX_COMMIT_MODE, pr_body=pr_body, base=base)
+    
+    def _default_branch(self, owner, repo_name):
+        full_name = f"{owner}/{repo_name}"
+        branch = self.workflow_cache.get_default_branch(full_name)
+        if branch is None:
+            branch = self._make_request('GET', f'/repos/{owner}/{repo_name}')['default_branch']
+            self.workflow_cache.put_default_branch(full_name, branch)
+        return branch
+    
+    def _branch_head(self, owner, repo_name, branch):
+        """(commit SHA, tree SHA) of a branch tip"""
+        head = self._make_request('GET', f'/repos/{owner}/{repo_name}/branches/{branch}')['commit']
+        return head['sha'], head['commit']['tree']['sha']
+    
+    def _commit(self, owner, repo_name, files, commit_message, parent_sha, base_tree_sha):
+        tree = self._make_request('POST', f'/repos/{owner}/{repo_name}/git/trees', json={
+            "base_tree": base_tree_sha,
+            "tree": [{"path": path, "mode": "100644", "type": "blob", "content": content}
+                     for path, content in files.items()]
+        })
+        return self._make_request('POST', f'/repos/{owner}/{repo_name}/git/commits', json={
+            "message": commit_message,
+            "tree": tree['sha'],
+            "parents": [parent_sha]
+        })['sha']
+    
+    def commit_files(self, owner: str, repo_name: str, files: dict, commit_message: str,
+                     branch: str = None, mode: str = "pr", pr_body: str = None, base: dict = None) -> dict:
+        """Commit several files at once with the Git Data API.
+
+        Contents go inline into a single tree. `base` ({"branch", "sha", "tree_sha"},
+        e.g. the failed run's head commit) saves fetching the default branch when it
+        is a commit on that branch; the default branch name is cached per
+        repository. A pull request then costs four requests: tree, commit, ref and
+        pull. mode is "branch" (commit to `branch`), "pr" (also open a pull
+        request) or "direct" (fast-forward the default branch).
+        """
+        full_name = f"{owner}/{repo_name}"
+        for path in files:
+            self.workflow_cache.invalidate(full_name, path)
         try:
-            repo = self.gh.get_repo(f"{owner}/{repo_name}")
+            base_branch = self._default_branch(owner, repo_name)
+            if mode != "direct" and base and base.get("branch") == base_branch:
+                base_sha, base_tree_sha = base["sha"], base["tree_sha"]
+            else:
+                # Direct commits must build on the current tip to fast-forward
+                base_sha, base_tree_sha = self._branch_head(owner, repo_name, base_branch)
+            commit_sha = self._commit(owner, repo_name, files, commit_message, base_sha, base_tree_sha)
+            
+            if mode == "direct":
+                # Fast-forward only: fails instead of overwriting commits pushed meanwhile
+                self._make_request('PATCH', f'/repos/{owner}/{repo_name}/git/refs/heads/{base_branch}',
+                                   json={"sha": commit_sha, "force": False})
+                return {"commit_sha": commit_sha, "branch": base_branch, "pr_url": None}
             
+            branch = branch or f"ci-fix/{commit_sha[:8]}"
             try:
-                file = repo.get_contents(file_path)
-                update_result = repo.update_file(file_path, commit_message, new_content, file.sha)
-                return update_result['commit'].sha
-            except GithubException:
-                create_result = repo.create_file(file_path, commit_message, new_content)
-                return create_result['commit'].sha
+                self._make_request('POST', f'/repos/{owner}/{repo_name}/git/refs',
+                                   json={"ref": f"refs/heads/{branch}", "sha": commit_sha})
+            except GitHubAPIError as e:
+                if e.status_code != 422 or "Reference already exists" not in e.body:
+                    raise
+                # A previous attempt left the branch: add the fix on top of it, never overwrite it
+                head_sha, head_tree_sha = self._branch_head(owner, repo_name, branch)
+                commit_sha = self._commit(owner, repo_name, files, commit_message, head_sha, head_tree_sha)
+                self._make_request('PATCH', f'/repos/{owner}/{repo_name}/git/refs/heads/{branch}',
+                                   json={"sha": commit_sha, "force": False})
+            
+            pr_url = None
+            if mode == "pr":
+                pr_url = self._open_pull_request(owner, repo_name, branch, base_branch,
+                                                 commit_message.splitlines()[0], pr_body or commit_message)
+            return {"commit_sha": commit_sha, "branch": branch, "pr_url": pr_url}
                 
         except Exception as e:
-            print(f"❌ Error committing fix: {e}")
+            # The default branch may have been renamed; look it up again next time
+            self.workflow_cache.invalidate_default_branch(full_name)
+            logger.error(f"Error committing fix: {e}")
             raise Exception(f"Failed to commit fix: {str(e)}")
     
+    def _open_pull_request(self, owner, repo_name, branch, base_branch, title, body):
+        try:
+            pull = self._make_request('POST', f'/repos/{owner}/{repo_name}/pulls', json={
+                "title": title, "head": branch, "base": base_branch, "body": body
+            })
+            return pull['html_url']
+        except GitHubAPIError as e:
+            if e.status_code != 422:
+                raise
+            # A pull request for this branch is already open
+            pulls = self._make_request('GET', f'/repos/{owner}/{repo_name}/pulls',
+                                       params={"head": f"{owner}:{branch}", "state": "open"})
+            return pulls[0]['html_url'] if pulls else None
+    
+    def comment_on_issue(self, owner: str, repo_name: str, issue_number: int, body: str) -> str:
+        try:
+            comment = self._make_request('POST', f'/repos/{owner}/{repo_name}/issues/{issue_number}/comments',
+                                         json={"body": body})
+            return comment['html_url']
+        except Exception as e:
+            logger.error(f"Error commenting on issue #{issue_number}: {e}")
+            raise Exception(f"Failed to comment on issue: {str(e)}")
+    
     def create_github_issue(self, owner: str, repo_name: str, title: str, body: str) -> str:
         try:
-            repo = self.gh.get_repo(f"{owner}/{repo_name}")
-            issue = repo.create_issue(title=title, body=body)
-            return issue.html_url
+            # PyGithub applies GITHUB_HTTP_TIMEOUT itself; only refuse to start past the deadline
+            self._timeout()
+            with tracing.span("github.create_issue", {"github.repo": f"{owner}/{repo_name}"}):
+                repo = self.gh.get_repo(f"{owner}/{repo_name}")
+                issue = repo.create_issue(title=title, body=body)
+                return issue.html_url
         except Exception as e:
-            print(f"❌ Error creating issue: {e}")
+            logger.error(f"Error creating issue: {e}")
             raise Exception(f"Failed to create issue: {str(e)}")
\ No newline at end of file
@@ -1,17 +1,173 @@
 # src/llm/client.py
-import os
 import json
-import re
-from langchain_groq import ChatGroq
+import logging
+import yaml
+from typing import Optional
+from pydantic import ValidationError
+from langchain_core.messages import AIMessage, HumanMessage
 from langchain_core.prompts import ChatPromptTemplate
+from src.utils.config import Config
+from src.utils import tracing
+from .dispatch import get_dispatcher
+from .providers import create_chat_model, json_mode
+from .schemas import FailureAnalysis, complete_fields, parse_stats, unfence
+from .tokens import (
+    count_tokens, count_message_tokens, truncate_tail,
+    find_workflow_job, extract_lines, splice_lines
+)
+
+logger = logging.getLogger(__name__)
 
 class LLMClient:
-    def __init__(self):
-        groq_api_key = os.getenv("GROQ_API_KEY")
-        self.client = ChatGroq(
-            groq_api_key=groq_api_key,
-            model_name="openai/gpt-oss-20b"
-        )
+    """Routes each step to its configured provider: "analyze" and "fix"."""
+
+    def __init__(self, progress=None, deadline=None):
+        # progress(update) receives partial results while answers stream in
+        self.progress = progress
+        # Bounds every call by the run's time left and aborts it on cancellation
+        self.deadline = deadline
+        routes = {
+            "analyze": (Config.LLM_ANALYZE_PROVIDER or Config.LLM_PROVIDER, Config.LLM_ANALYZE_MODEL),
+            "fix": (Config.LLM_FIX_PROVIDER or Config.LLM_PROVIDER, Config.LLM_FIX_MODEL)
+        }
+        models = {}
+        self.routes = {}
+        for step, (provider, model) in routes.items():
+            # Steps on the same provider and model share one client
+            if (provider, model) not in models:
+                models[provider, model] = create_chat_model(provider, model)
+            self.routes[step] = (provider, models[provider, model])
+        self.usage = {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "by_provider": {},
+                      "parse_failures": 0}
+
+    def _invoke(self, messages: list, step: str, consume=None, **kwargs):
+        """Invoke the step's model. With `consume` and LLM_STREAMING, the answer is streamed
+        through it and may stop early (see LLMDispatcher.stream)."""
+        provider, model = self.routes[step]
+        streaming = bool(consume and Config.LLM_STREAMING)
+        with tracing.span(f"llm.{step}", {"llm.provider": provider, "llm.streaming": streaming}):
+            prompt_tokens = count_message_tokens(messages)
+
+            if streaming:
+                response, stopped, coalesced = get_dispatcher(provider).stream(model, messages, consume,
+                                                                               deadline=self.deadline, **kwargs)
+                if stopped:
+                    logger.info(f"LLM {step} stream stopped early, all required output received")
+            else:
+                response, coalesced = get_dispatcher(provider).invoke(model, messages, deadline=self.deadline, **kwargs)
+            tracing.set_attributes({"llm.coalesced": coalesced})
+            if coalesced:
+                # Shared with an identical in-flight prompt, no tokens were spent
+                return response
+
+            # Prefer the provider's numbers; fall back to the local estimate
+            usage = getattr(response, "usage_metadata", None) or {}
+            spent = {
+                "calls": 1,
+                "prompt_tokens": usage.get("input_tokens") or prompt_tokens,
+                "completion_tokens": usage.get("output_tokens") or count_tokens(response.content)
+            }
+            by_provider = self.usage["by_provider"].setdefault(provider, {"calls": 0, "prompt_tokens": 0, "completion_tokens": 0})
+            for key, value in spent.items():
+                self.usage[key] += value
+                by_provider[key] += value
+            tracing.set_attributes({"llm.prompt_tokens": spent["prompt_tokens"],
+                                    "llm.completion_tokens": spent["completion_tokens"]})
+            return response
+
+    def _invoke_validated(self, messages: list, step: str, validate, consume=None, **kwargs):
+        """Invoke and validate the answer, asking the model to correct it up to LLM_REPAIR_ATTEMPTS times.
+
+        `validate(content)` returns the parsed value or raises ValueError. Returns
+        (value, None) on success or (None, error) once the repair budget is spent.
+        """
+        for attempt in range(Config.LLM_REPAIR_ATTEMPTS + 1):
+            content = self._invoke(messages, step, consume, **kwargs).content
+            try:
+                value = validate(content)
+                parse_stats[step]["repaired" if attempt else "valid"] += 1
+                return value, None
+            except ValueError as e:
+                # ValidationError and JSONDecodeError are ValueErrors
+                error = e
+                self.usage["parse_failures"] += 1
+                logger.warning(f"LLM {step} answer failed validation (attempt {attempt + 1}): {str(e)[:300]}")
+                messages = messages + [
+                    AIMessage(content=content),
+                    HumanMessage(content=f"Your answer was invalid: {str(e)[:1000]}\n"
+                                         "Reply again with only the corrected output.")
+                ]
+        parse_stats[step]["failed"] += 1
+        return None, error
+
+    def report_progress(self, update: dict):
+        if self.progress:
+            try:
+                self.progress(update)
+            except Exception as e:
+                logger.warning(f"Failed to report LLM progress: {str(e)}")
+
+    def _analysis_consumer(self):
+        """Publish analysis fields as they complete; stop once every schema field is in."""
+        required = list(FailureAnalysis.model_fields)
+        reported = {}
+
+        def consume(text: str):
+            fields = complete_fields(text)
+            if len(fields) > len(reported):
+                reported.update(fields)
+                self.report_progress({"analysis": {key: fields[key] for key in required if key in fields}})
+            if all(key in fields for key in required):
+                return json.dumps({key: fields[key] for key in required})
+            return None
+        return consume
+
+    def _fix_consumer(self, single_job: bool):
+        """Stop once the YAML is over: at a closing fence, or at a second top-level key
+        when only one job was requested."""
+        # Lines seen at the last scan and at the last progress report
+        seen_lines, reported = [0], [0]
+
+        def top_level(line: str) -> bool:
+            return line[:1] not in ("", " ", "\t", "#", "-") and ":" in line
+
+        def is_yaml(lines: list) -> bool:
+            # Tells a closing fence after unfenced YAML from an opening one after prose
+            try:
+                parsed = yaml.safe_load("\n".join(lines))
+            except yaml.YAMLError:
+                return False
+            if not isinstance(parsed, dict):
+                return False
+            return any(isinstance(value, dict) for value in parsed.values()) if single_job else "jobs" in parsed
+
+        def consume(text: str):
+            complete = text.split("\n")[:-1]
+            if len(complete) == seen_lines[0]:
+                return None
+            seen_lines[0] = len(complete)
+            fenced, keyed, body = False, False, []
+            for line in complete:
+                if line.strip().startswith("```"):
+                    if fenced or is_yaml(body):
+                        return "\n".join(body)
+                    # Anything before the opening fence is preamble
+                    fenced, keyed, body = True, False, []
+                    continue
+                if top_level(line):
+                    if single_job and keyed:
+                        return "\n".join(body)
+                    keyed = True
+                body.append(line)
+            if len(complete) >= reported[0] + 25:
+                reported[0] = len(complete)
+                self.report_progress({"fix_lines": len(complete)})
+            return None
+        return consume
+
+    def _fixed_tokens(self, prompt: ChatPromptTemplate, inputs: dict) -> int:
+        """Tokens used by the prompt with every variable input left empty."""
+        return count_message_tokens(prompt.format_messages(**{k: "" for k in inputs}))
     
     def analyze_failure(self, logs: str) -> dict:
         if "Error fetching logs" in logs or "Failed to fetch logs" in logs:
@@ -25,7 +181,7 @@ class LLMClient:
         system_prompt = """You are a senior DevOps engineer. Analyze the following GitHub Actions logs. 
         Determine the root cause of the failure. Common causes include: syntax errors in the YAML, 
         package manager failures, version mismatches (e.g., Node.js, Python), or build/test failures. 
-        Respond with a JSON object with the following structure: 
+        Respond with only a JSON object with the following structure: 
         {{
             "root_cause": "description of the root cause",
             "error_message": "the specific error message", 
@@ -39,25 +195,32 @@ class LLMClient:
             ("human", "Logs:\n{logs}")
         ])
         
-        chain = prompt | self.client
-        response = chain.invoke({"logs": logs})
-        
-        try:
-            content = response.content.strip()
-            json_match = re.search(r'\{.*\}', content, re.DOTALL)
-            if json_match:
-                return json.loads(json_match.group())
-            else:
-                return json.loads(content)
-        except json.JSONDecodeError:
+        budget = Config.LLM_ANALYZE_TOKEN_BUDGET - self._fixed_tokens(prompt, {"logs": logs})
+        fitted_logs = truncate_tail(logs, budget)
+        if fitted_logs is not logs:
+            logger.info(f"Logs truncated to fit analysis budget of {Config.LLM_ANALYZE_TOKEN_BUDGET} tokens")
+
+        provider = self.routes["analyze"][0]
+        analysis, error = self._invoke_validated(
+            prompt.format_messages(logs=fitted_logs),
+            "analyze",
+            lambda content: FailureAnalysis.model_validate_json(unfence(content)),
+            self._analysis_consumer(),
+            **json_mode(provider, FailureAnalysis.model_json_schema())
+        )
+        if analysis is None:
             return {
                 "root_cause": "Failed to analyze logs",
-                "error_message": "JSON parsing error",
+                "error_message": f"Invalid analysis from model: {str(error)[:500]}",
                 "is_fixable": False,
-                "fix_suggestion": "Manual analysis required"
+                "fix_suggestion": "Manual analysis required",
+                # Never shared with similar failures elsewhere
+                "analysis_failed": True
             }
+        return analysis.model_dump()
         
-    def generate_fix(self, original_content: str, fix_suggestion: str) -> str:
+    def generate_fix(self, original_content: str, fix_suggestion: str, failed_job_name: str = None) -> Optional[str]:
+        """Corrected workflow YAML, or None when the model's output never validated."""
         system_prompt = """Given the following workflow file and the required fix, 
         generate the corrected workflow YAML file.
         Output only the YAML. No explanations, no markdown."""
@@ -67,16 +230,50 @@ class LLMClient:
             ("human", "Original workflow:\n{original_content}\n\nFix suggestion: {fix_suggestion}")
         ])
         
-        chain = prompt | self.client
-        response = chain.invoke({
+        inputs = {
             "original_content": original_content,
             "fix_suggestion": fix_suggestion
-        })
+        }
+
+        # When the whole file does not fit, send only the failing job and splice the result back
+        job_span = None
+        if count_message_tokens(prompt.format_messages(**inputs)) > Config.LLM_FIX_TOKEN_BUDGET:
+            job_span = find_workflow_job(original_content, failed_job_name)
+            if job_span:
+                logger.info(f"Workflow exceeds fix budget, sending only job '{failed_job_name}'")
+                prompt = ChatPromptTemplate.from_messages([
+                    ("system", """Given the following job from a workflow file and the required fix,
+        generate the corrected job, starting with the same job key.
+        Output only the YAML of that job. No explanations, no markdown."""),
+                    ("human", "Original workflow job:\n{original_content}\n\nFix suggestion: {fix_suggestion}")
+                ])
+                inputs["original_content"] = extract_lines(original_content, job_span)
+            else:
+                logger.warning("Workflow exceeds fix budget and the failed job could not be located")
+
+        def validate(content: str) -> str:
+            content = unfence(content)
+            try:
+                parsed = yaml.safe_load(content)
+            except yaml.YAMLError as e:
+                raise ValueError(f"not valid YAML: {e}")
+            if not isinstance(parsed, dict):
+                raise ValueError("expected a YAML mapping")
+            if job_span:
+                if len(parsed) != 1:
+                    raise ValueError("expected exactly one job key at the top level")
+            elif "jobs" not in parsed:
+                raise ValueError("workflow has no 'jobs' key")
+            return content
 
-        content = response.content.strip()
+        content, error = self._invoke_validated(
+            prompt.format_messages(**inputs), "fix", validate, self._fix_consumer(bool(job_span))
+        )
+        if content is None:
+            logger.warning(f"No valid workflow fix produced: {error}")
+            return None
 
-        # Remove accidental markdown code fences
-        content = re.sub(r"```(yaml|yml)?", "", content)
-        content = content.replace("```", "").strip()
+        if job_span:
+            content = splice_lines(original_content, job_span, content)
 
         return content
@@ -0,0 +1,279 @@
+# src/llm/dispatch.py
+import json
+import time
+import random
+import hashlib
+import logging
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from src.utils.config import Config
+from src.utils.deadline import RunCancelled, RunTimeout
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_ERRORS = ("APIConnectionError", "APITimeoutError", "ConnectionError", "Timeout", "ReadTimeout",
+                    "ConnectTimeout")
+
+
+def _status_code(error: Exception):
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+
+class _OwnerStopped(Exception):
+    """The run making a shared call was cancelled or ran out of time before it finished."""
+
+
+def _stopped(deadline) -> bool:
+    if deadline is None:
+        return False
+    remaining = deadline.remaining()
+    return deadline.cancelled or (remaining is not None and remaining <= 0)
+
+
+def _retry_after(error: Exception):
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class LLMDispatcher:
+    """Process-wide gate in front of the chat model.
+
+    Limits concurrent requests, retries 429/5xx responses with exponential
+    backoff and full jitter, and coalesces identical in-flight prompts, streamed
+    or not, so they share a single provider call.
+    """
+
+    def __init__(self, max_concurrency: int, max_retries: int, base_delay: float, max_delay: float):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "coalesced": 0, "retries": 0, "rate_limited": 0, "failures": 0,
+                      "stopped_early": 0}
+
+    def _key(self, model, messages) -> str:
+        payload = json.dumps({
+            "model": getattr(model, "model_name", None) or type(model).__name__,
+            "messages": [[m.type, m.content] for m in messages]
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _acquire(self, deadline):
+        """Take a concurrency slot, giving up when the run is cancelled or out of time."""
+        if deadline is None:
+            self._semaphore.acquire()
+            return
+        while True:
+            remaining = deadline.remaining()
+            if self._semaphore.acquire(timeout=1.0 if remaining is None else max(0.0, min(1.0, remaining))):
+                return
+            deadline.check()
+
+    @staticmethod
+    def _bound(kwargs: dict, deadline) -> dict:
+        """Per-attempt kwargs with the request timeout capped by the run's time left."""
+        cap = kwargs.get("timeout", Config.LLM_TIMEOUT)
+        return {**kwargs, "timeout": deadline.timeout(cap) if deadline else cap}
+
+    def _sleep(self, delay: float, deadline):
+        if deadline is None:
+            time.sleep(delay)
+        else:
+            deadline.wait(delay)
+
+    def _wait(self, future: Future, deadline):
+        """Result of a call shared with another run, giving up when this run is cancelled or out of time."""
+        if deadline is None:
+            return future.result()
+        while True:
+            try:
+                return future.result(timeout=1.0)
+            except FutureTimeout:
+                deadline.check()
+
+    def _settle(self, key: str, future: Future, response=None, error: BaseException = None):
+        # Unregister before waking the waiters, so a retrying waiter never finds the finished call
+        with self._lock:
+            if self._inflight.get(key) is future:
+                del self._inflight[key]
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(response)
+
+    def _share(self, model, messages, deadline, call) -> tuple:
+        """Make `call()` once for identical in-flight prompts. Returns (response, coalesced).
+
+        Only provider errors reach the runs sharing a call: when the run making
+        it stops, they retry it under their own deadlines.
+        """
+        key = self._key(model, messages)
+        while True:
+            with self._lock:
+                future = self._inflight.get(key)
+                owner = future is None
+                if owner:
+                    future = Future()
+                    self._inflight[key] = future
+                else:
+                    self.stats["coalesced"] += 1
+            if owner:
+                break
+            try:
+                return self._wait(future, deadline), True
+            except _OwnerStopped:
+                continue
+
+        try:
+            response = call()
+        except BaseException as e:
+            # A timeout capped by this run's time left is this run's stop, not a provider error
+            stopped = isinstance(e, (RunCancelled, RunTimeout)) or _stopped(deadline)
+            self._settle(key, future, error=_OwnerStopped() if stopped else e)
+            raise
+        self._settle(key, future, response)
+        return response, False
+
+    def invoke(self, model, messages, deadline=None, **kwargs) -> tuple:
+        """Invoke `model` with `messages`. Returns (response, coalesced).
+
+        With a `deadline`, every attempt is bounded by the run's time left and
+        waits (for a slot, a backoff or a coalesced call) end on cancellation.
+        """
+        return self._share(model, messages, deadline,
+                           lambda: self._invoke_with_retry(model, messages, deadline, **kwargs))
+
+    def stream(self, model, messages, consume, deadline=None, **kwargs) -> tuple:
+        """Stream `model`'s answer into `consume(text_so_far)`, stopping early once it returns a value.
+
+        `consume` returns None to keep reading, or the final content. Returns
+        (response, stopped_early, coalesced). Identical prompts in flight share
+        one call (streamed or not): a run joining it gets the whole answer,
+        passed once through its own `consume`.
+        """
+        stopped = [False]
+
+        def call():
+            response, stopped[0] = self._stream_with_retry(model, messages, consume, deadline, **kwargs)
+            return response
+
+        response, coalesced = self._share(model, messages, deadline, call)
+        if coalesced:
+            final = consume(response.content)
+            if final is not None and final != response.content:
+                response = response.model_copy(update={"content": final})
+        return response, stopped[0], coalesced
+
+    def _stream_with_retry(self, model, messages, consume, deadline=None, **kwargs) -> tuple:
+        """(AIMessage, stopped_early). Retried only while no token has arrived yet."""
+        # Imported here: this module loads at API startup, langchain only with the first run
+        from langchain_core.messages import AIMessage
+
+        attempt = 0
+        while True:
+            text, usage, received = "", None, False
+            self._acquire(deadline)
+            try:
+                try:
+                    self.stats["calls"] += 1
+                    stream = model.stream(messages, **self._bound(kwargs, deadline))
+                    try:
+                        for chunk in stream:
+                            if deadline:
+                                deadline.check()
+                            received = True
+                            usage = getattr(chunk, "usage_metadata", None) or usage
+                            if not chunk.content:
+                                continue
+                            text += chunk.content
+                            final = consume(text)
+                            if final is not None:
+                                self.stats["stopped_early"] += 1
+                                return AIMessage(content=final, usage_metadata=usage), True
+                    finally:
+                        # Closing the generator drops the HTTP stream when stopping early
+                        stream.close()
+                    return AIMessage(content=text, usage_metadata=usage), False
+                except Exception as e:
+                    status = _status_code(e)
+                    retryable = (not received and (status == 429 or (status is not None and status >= 500)
+                                                   or type(e).__name__ in RETRYABLE_ERRORS))
+                    if status == 429:
+                        self.stats["rate_limited"] += 1
+                    if not retryable or attempt >= self.max_retries:
+                        self.stats["failures"] += 1
+                        raise
+                    error = e
+            finally:
+                self._semaphore.release()
+
+            delay = _retry_after(error)
+            if delay is None:
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+            attempt += 1
+            self.stats["retries"] += 1
+            logger.warning(f"LLM stream failed ({status or type(error).__name__}), "
+                           f"retry {attempt}/{self.max_retries} in {delay:.2f}s")
+            self._sleep(delay, deadline)
+
+    def _invoke_with_retry(self, model, messages, deadline=None, **kwargs):
+        attempt = 0
+        while True:
+            self._acquire(deadline)
+            try:
+                try:
+                    self.stats["calls"] += 1
+                    return model.invoke(messages, **self._bound(kwargs, deadline))
+                except Exception as e:
+                    status = _status_code(e)
+                    retryable = (status == 429 or (status is not None and status >= 500)
+                                 or type(e).__name__ in RETRYABLE_ERRORS)
+                    if status == 429:
+                        self.stats["rate_limited"] += 1
+                    if not retryable or attempt >= self.max_retries:
+                        self.stats["failures"] += 1
+                        raise
+                    error = e
+            finally:
+                self._semaphore.release()
+
+            # Sleep outside the semaphore so waiting calls do not hold a slot
+            delay = _retry_after(error)
+            if delay is None:
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+            attempt += 1
+            self.stats["retries"] += 1
+            logger.warning(f"LLM call failed ({status or type(error).__name__}), "
+                           f"retry {attempt}/{self.max_retries} in {delay:.2f}s")
+            self._sleep(delay, deadline)
+
+
+_dispatchers = {}
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher(provider: str = None) -> LLMDispatcher:
+    """One dispatcher per provider, so a slow local model never holds remote slots."""
+    provider = provider or Config.LLM_PROVIDER
+    with _dispatcher_lock:
+        if provider not in _dispatchers:
+            _dispatchers[provider] = LLMDispatcher(
+                max_concurrency=Config.LLAMACPP_MAX_CONCURRENCY if provider == "llamacpp" else Config.LLM_MAX_CONCURRENCY,
+                max_retries=Config.LLM_MAX_RETRIES,
+                base_delay=Config.LLM_RETRY_BASE_DELAY,
+                max_delay=Config.LLM_RETRY_MAX_DELAY
+            )
+        return _dispatchers[provider]
+
+
+def dispatcher_stats() -> dict:
+    with _dispatcher_lock:
+        return {provider: dict(dispatcher.stats) for provider, dispatcher in _dispatchers.items()}
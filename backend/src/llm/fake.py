@@ -0,0 +1,111 @@
+# src/llm/fake.py
+import re
+import json
+import time
+import threading
+from typing import Any, Iterator, List, Optional
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+class FakeRateLimitError(Exception):
+    """Mimics the provider's HTTP 429 error."""
+    status_code = 429
+
+
+class FakeProviderLimits:
+    """Server-side limits shared by every FakeChatModel, like a real provider account."""
+
+    def __init__(self, requests_per_second: float = 0, max_concurrency: int = 0):
+        self.requests_per_second = requests_per_second
+        self.max_concurrency = max_concurrency
+        self._tokens = requests_per_second
+        self._updated = time.monotonic()
+        self._active = 0
+        self._lock = threading.Lock()
+        self.served = 0
+        self.rejected = 0
+
+    def acquire(self):
+        with self._lock:
+            if self.requests_per_second:
+                now = time.monotonic()
+                self._tokens = min(self.requests_per_second,
+                                   self._tokens + (now - self._updated) * self.requests_per_second)
+                self._updated = now
+                if self._tokens < 1:
+                    self.rejected += 1
+                    raise FakeRateLimitError("Rate limit reached (simulated)")
+                self._tokens -= 1
+            if self.max_concurrency and self._active >= self.max_concurrency:
+                self.rejected += 1
+                raise FakeRateLimitError("Too many concurrent requests (simulated)")
+            self._active += 1
+            self.served += 1
+
+    def release(self):
+        with self._lock:
+            self._active -= 1
+
+
+default_limits = FakeProviderLimits()
+
+
+class FakeChatModel(BaseChatModel):
+    """Deterministic offline chat model for tests and benchmarks.
+
+    Failure analyses are answered with a JSON object built from the last error
+    line in the logs; fix requests echo the original workflow back. Latency and
+    provider rate limits are simulated so throughput can be measured offline.
+    """
+
+    model_name: str = "fake"
+    latency: float = 0.0
+    limits: Any = None
+    # Streamed answers arrive in pieces of this many characters
+    chunk_size: int = 16
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake"
+
+    def _respond(self, messages: List[BaseMessage]) -> str:
+        # The first human message is the task; later ones are repair requests
+        prompt = next((m.content for m in messages if m.type == "human"), "")
+        if prompt.startswith("Logs:"):
+            error_lines = [line for line in prompt.splitlines() if re.search(r"error|failed", line, re.I)]
+            error = error_lines[-1].strip() if error_lines else "Unknown error"
+            return json.dumps({
+                "root_cause": f"Build step failed: {error[:200]}",
+                "error_message": error[:500],
+                "is_fixable": False,
+                "fix_suggestion": "Inspect the failing step"
+            })
+        match = re.search(r"Original workflow(?: job)?:\n(.*)\n\nFix suggestion:", prompt, re.DOTALL)
+        return match.group(1) if match else ""
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        limits = self.limits or default_limits
+        limits.acquire()
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            content = self._respond(messages)
+        finally:
+            limits.release()
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=content))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        limits = self.limits or default_limits
+        limits.acquire()
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+            content = self._respond(messages)
+        finally:
+            limits.release()
+        for start in range(0, len(content), self.chunk_size):
+            yield ChatGenerationChunk(message=AIMessageChunk(content=content[start:start + self.chunk_size]))
@@ -0,0 +1,95 @@
+# src/llm/llamacpp.py
+import json
+from typing import Any, Iterator, List, Optional
+import requests
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+ROLES = {"system": "system", "human": "user", "ai": "assistant"}
+
+
+class LlamaCppChatModel(BaseChatModel):
+    """Chat model served by a local llama.cpp server (`llama-server -m model.gguf`).
+
+    Talks to the server's OpenAI-compatible /v1/chat/completions endpoint, so
+    any local runtime exposing that API works too. HTTP errors are raised
+    with their response attached, letting the dispatcher retry 429/5xx.
+    """
+
+    model_name: str = "local"
+    base_url: str = "http://127.0.0.1:8080"
+    timeout: float = 60.0
+    temperature: float = 0.0
+    max_tokens: Optional[int] = None
+
+    @property
+    def _llm_type(self) -> str:
+        return "llamacpp"
+
+    def _payload(self, messages: List[BaseMessage], stop: Optional[List[str]], **kwargs: Any) -> dict:
+        payload = {
+            "model": self.model_name,
+            "messages": [{"role": ROLES.get(m.type, "user"), "content": m.content} for m in messages],
+            "temperature": self.temperature
+        }
+        if self.max_tokens:
+            payload["max_tokens"] = self.max_tokens
+        if stop:
+            payload["stop"] = stop
+        if kwargs.get("response_format"):
+            payload["response_format"] = kwargs["response_format"]
+        return payload
+
+    def _post(self, payload: dict, stream: bool = False, timeout: Optional[float] = None) -> requests.Response:
+        response = requests.post(f"{self.base_url.rstrip('/')}/v1/chat/completions",
+                                 json=payload, timeout=timeout or self.timeout, stream=stream)
+        response.raise_for_status()
+        return response
+
+    @staticmethod
+    def _usage(usage: dict) -> Optional[dict]:
+        if not usage:
+            return None
+        return {
+            "input_tokens": usage.get("prompt_tokens", 0),
+            "output_tokens": usage.get("completion_tokens", 0),
+            "total_tokens": usage.get("total_tokens", 0)
+        }
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        data = self._post(self._payload(messages, stop, **kwargs), timeout=kwargs.get("timeout")).json()
+        message = AIMessage(
+            content=data["choices"][0]["message"].get("content") or "",
+            usage_metadata=self._usage(data.get("usage"))
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        payload = self._payload(messages, stop, **kwargs)
+        payload["stream"] = True
+        payload["stream_options"] = {"include_usage": True}
+        # Closing the response when the consumer stops early makes the server stop generating
+        with self._post(payload, stream=True, timeout=kwargs.get("timeout")) as response:
+            if "text/event-stream" not in response.headers.get("content-type", ""):
+                # Server ignored "stream"; hand over the whole answer as one chunk
+                data = response.json()
+                yield ChatGenerationChunk(message=AIMessageChunk(
+                    content=data["choices"][0]["message"].get("content") or "",
+                    usage_metadata=self._usage(data.get("usage"))
+                ))
+                return
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data: "):
+                    continue
+                data = line[len("data: "):]
+                if data == "[DONE]":
+                    return
+                event = json.loads(data)
+                delta = event["choices"][0].get("delta", {}) if event.get("choices") else {}
+                yield ChatGenerationChunk(message=AIMessageChunk(
+                    content=delta.get("content") or "",
+                    usage_metadata=self._usage(event.get("usage"))
+                ))
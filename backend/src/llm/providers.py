@@ -0,0 +1,55 @@
+# src/llm/providers.py
+import os
+from src.utils.config import Config
+
+
+def _groq(model: str = None):
+    from langchain_groq import ChatGroq
+    # Retries are owned by the dispatcher, which also handles 429 backoff
+    return ChatGroq(
+        groq_api_key=os.getenv("GROQ_API_KEY"),
+        model_name=model or Config.GROQ_MODEL,
+        max_retries=0
+    )
+
+
+def _llamacpp(model: str = None):
+    from .llamacpp import LlamaCppChatModel
+    return LlamaCppChatModel(
+        model_name=model or Config.LLAMACPP_MODEL,
+        base_url=Config.LLAMACPP_URL,
+        timeout=Config.LLAMACPP_TIMEOUT
+    )
+
+
+def _fake(model: str = None):
+    from .fake import FakeChatModel
+    return FakeChatModel(model_name=model or "fake", latency=Config.FAKE_LLM_LATENCY)
+
+
+# name -> factory(model) returning a LangChain chat model; provider packages are imported on use
+PROVIDERS = {
+    "groq": _groq,
+    "llamacpp": _llamacpp,
+    "fake": _fake
+}
+
+
+def register_provider(name: str, factory):
+    PROVIDERS[name] = factory
+
+
+def json_mode(provider: str, schema: dict) -> dict:
+    """Invoke kwargs that make the provider answer with a JSON object."""
+    if provider == "groq":
+        return {"response_format": {"type": "json_object"}}
+    if provider == "llamacpp":
+        # llama.cpp turns the schema into a grammar, so the output always validates
+        return {"response_format": {"type": "json_object", "schema": schema}}
+    return {}
+
+
+def create_chat_model(provider: str, model: str = None):
+    if provider not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider '{provider}', expected one of: {', '.join(sorted(PROVIDERS))}")
+    return PROVIDERS[provider](model)
@@ -0,0 +1,83 @@
+# src/llm/schemas.py
+import json
+from typing import Optional
+from pydantic import BaseModel, Field
+
+_decoder = json.JSONDecoder()
+
+
+# Process-wide outcome of every structured answer: valid first time, valid after a repair call, or unusable
+parse_stats = {step: {"valid": 0, "repaired": 0, "failed": 0} for step in ("analyze", "fix")}
+
+
+def get_parse_stats() -> dict:
+    stats = {}
+    for step, counts in parse_stats.items():
+        total = sum(counts.values())
+        stats[step] = {
+            **counts,
+            "failure_rate": round((counts["repaired"] + counts["failed"]) / total, 4) if total else 0.0
+        }
+    return stats
+
+
+class FailureAnalysis(BaseModel):
+    """What analyze_failure must return; validated before the agent acts on it."""
+    root_cause: str = Field(min_length=1, description="description of the root cause")
+    error_message: Optional[str] = Field(default=None, description="the specific error message")
+    is_fixable: bool = Field(
+        default=False,
+        description="true only for a clear version mismatch or a simple syntax error in the workflow file"
+    )
+    fix_suggestion: Optional[str] = Field(default=None, description="suggestion for how to fix it")
+
+
+def unfence(content: str) -> str:
+    """Return the body of the first ``` fenced block, or the content itself when there is none."""
+    content = content.strip()
+    start = content.find("```")
+    if start == -1:
+        return content
+    body_start = content.find("\n", start)
+    end = content.find("```", body_start)
+    if body_start == -1 or end == -1:
+        return content
+    return content[body_start + 1:end].strip()
+
+
+def complete_fields(text: str) -> dict:
+    """Top-level fields of a JSON object whose values are already complete in a streamed prefix.
+
+    A value counts as complete once the character after it has arrived, so a
+    number like 12 is not reported while it could still become 123.
+    """
+    fields = {}
+    pos = text.find("{")
+    if pos == -1:
+        return fields
+    pos += 1
+    length = len(text)
+    while True:
+        while pos < length and text[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= length or text[pos] != '"':
+            return fields
+        try:
+            key, pos = _decoder.raw_decode(text, pos)
+        except ValueError:
+            return fields
+        while pos < length and text[pos] in " \t\r\n":
+            pos += 1
+        if pos >= length or text[pos] != ":":
+            return fields
+        pos += 1
+        while pos < length and text[pos] in " \t\r\n":
+            pos += 1
+        try:
+            value, end = _decoder.raw_decode(text, pos)
+        except ValueError:
+            return fields
+        if end >= length:
+            return fields
+        fields[key] = value
+        pos = end
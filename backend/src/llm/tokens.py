@@ -0,0 +1,119 @@
+# src/llm/tokens.py
+import re
+import textwrap
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_JOBS_RE = re.compile(r"^jobs\s*:\s*(#.*)?$")
+_KEY_RE = re.compile(r"""^(\s*)("[^"]+"|'[^']+'|[\w.-]+)\s*:""")
+
+
+def count_tokens(text: str) -> int:
+    """Local, dependency-free token estimate.
+
+    Words count as one token per four characters and every punctuation mark
+    as its own token, which slightly overestimates BPE tokenizers - the safe
+    direction for budgeting.
+    """
+    if not text:
+        return 0
+    return sum(
+        (len(tok) + 3) // 4 if tok[0].isalnum() or tok[0] == "_" else 1
+        for tok in _TOKEN_RE.findall(text)
+    )
+
+
+def count_message_tokens(messages) -> int:
+    # A few tokens of framing per chat message
+    return sum(count_tokens(m.content if isinstance(m.content, str) else str(m.content)) + 4
+               for m in messages)
+
+
+def truncate_tail(text: str, max_tokens: int) -> str:
+    """Keep the end of `text` (where CI errors usually are) within max_tokens."""
+    if count_tokens(text) <= max_tokens:
+        return text
+
+    marker = "...(older logs truncated)...\n"
+    budget = max_tokens - count_tokens(marker)
+    kept = []
+    used = 0
+    for line in reversed(text.splitlines()):
+        cost = count_tokens(line) + 1
+        if used + cost > budget:
+            break
+        kept.append(line)
+        used += cost
+    return marker + "\n".join(reversed(kept))
+
+
+def _job_blocks(lines: list) -> list:
+    """Return (key, name, start, end) for each job under the top-level `jobs:` key."""
+    jobs_idx = next((i for i, line in enumerate(lines) if _JOBS_RE.match(line.rstrip("\n"))), None)
+    if jobs_idx is None:
+        return []
+
+    blocks = []
+    child_indent = None
+    end = len(lines)
+    for i in range(jobs_idx + 1, len(lines)):
+        stripped = lines[i].strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        indent = len(lines[i]) - len(lines[i].lstrip())
+        if indent == 0:
+            end = i
+            break
+        if child_indent is None:
+            child_indent = indent
+        match = _KEY_RE.match(lines[i])
+        if indent == child_indent and match:
+            blocks.append([match.group(2).strip("'\""), None, i, None])
+
+    for n, block in enumerate(blocks):
+        block[3] = blocks[n + 1][2] if n + 1 < len(blocks) else end
+        # Trailing blank lines and top-level comments belong to the gap between jobs
+        while block[3] > block[2] + 1 and (not lines[block[3] - 1].strip()
+                                           or lines[block[3] - 1].startswith("#")):
+            block[3] -= 1
+        inner_indent = None
+        for line in lines[block[2] + 1:block[3]]:
+            if not line.strip() or line.strip().startswith("#"):
+                continue
+            indent = len(line) - len(line.lstrip())
+            if inner_indent is None:
+                inner_indent = indent
+            match = re.match(r"^\s+name\s*:\s*(.+?)\s*$", line)
+            if match and indent == inner_indent:
+                block[1] = match.group(1).strip("'\"")
+                break
+    return [tuple(b) for b in blocks]
+
+
+def find_workflow_job(content: str, job_name: str):
+    """Locate the job a failed GitHub job belongs to. Returns (start, end) line span or None.
+
+    GitHub reports the job's `name:` (or its key), with matrix values appended
+    as ` (a, b)` and reusable workflow jobs as `caller / callee`.
+    """
+    if not content or not job_name:
+        return None
+    lines = content.splitlines(keepends=True)
+    candidates = {job_name, job_name.split(" (")[0], job_name.split(" / ")[0]}
+    for key, name, start, end in _job_blocks(lines):
+        if key in candidates or (name and name in candidates):
+            return start, end
+    return None
+
+
+def extract_lines(content: str, span: tuple) -> str:
+    lines = content.splitlines(keepends=True)
+    return "".join(lines[span[0]:span[1]])
+
+
+def splice_lines(content: str, span: tuple, replacement: str) -> str:
+    """Replace the line span with `replacement`, re-indented to match the original block."""
+    lines = content.splitlines(keepends=True)
+    original = lines[span[0]]
+    indent = original[:len(original) - len(original.lstrip())]
+    block = textwrap.indent(textwrap.dedent(replacement).strip("\n"), indent) + "\n"
+    return "".join(lines[:span[0]]) + block + "".join(lines[span[1]:])
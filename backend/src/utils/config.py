@@ -7,5 +7,109 @@ load_dotenv()
 class Config:
     GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
     GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+    GITHUB_API_URL = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+    # GitHub Enterprise serves REST under /api/v3 and GraphQL under /api/graphql
+    GITHUB_GRAPHQL_URL = os.getenv(
+        "GITHUB_GRAPHQL_URL",
+        GITHUB_API_URL[:-len("/v3")] + "/graphql" if GITHUB_API_URL.endswith("/api/v3") else GITHUB_API_URL + "/graphql"
+    )
     
-    SCHEDULER_INTERVAL = int(os.getenv("SCHEDULER_INTERVAL", "300"))
\ No newline at end of file
+    SCHEDULER_INTERVAL = int(os.getenv("SCHEDULER_INTERVAL", "300"))
+
+    # json or text; LOG_FILE empty disables the file; LOG_SAMPLE_RATE keeps this share of per-run detail lines
+    LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+    LOG_FILE = os.getenv("LOG_FILE", "app.log")
+    LOG_SAMPLE_RATE = float(os.getenv("LOG_SAMPLE_RATE", "0.1"))
+
+    # OpenTelemetry spans for API requests, agent nodes, GitHub/LLM calls and Mongo writes:
+    # off, file (JSON lines in TRACE_FILE) or otlp (collector at OTEL_EXPORTER_OTLP_ENDPOINT)
+    TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "off")
+    TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+    TRACING_SERVICE_NAME = os.getenv("TRACING_SERVICE_NAME", "cicd-monitor")
+
+    LOG_ARCHIVE_DIR = os.getenv("LOG_ARCHIVE_DIR", "log_archive")
+    LOG_ARCHIVE_MAX_BYTES = int(os.getenv("LOG_ARCHIVE_MAX_BYTES", str(2 * 1024 ** 3)))
+
+    # Stream LLM answers: partial analyses are published to the run and reading stops
+    # as soon as the required output is complete
+    LLM_STREAMING = os.getenv("LLM_STREAMING", "true").lower() == "true"
+    # Extra calls allowed to repair an answer that fails schema or YAML validation
+    LLM_REPAIR_ATTEMPTS = int(os.getenv("LLM_REPAIR_ATTEMPTS", "1"))
+    LLM_ANALYZE_TOKEN_BUDGET = int(os.getenv("LLM_ANALYZE_TOKEN_BUDGET", "6000"))
+    LLM_FIX_TOKEN_BUDGET = int(os.getenv("LLM_FIX_TOKEN_BUDGET", "8000"))
+
+    # groq, llamacpp (local llama.cpp server) or fake. Analysis and fix generation can be routed
+    # separately (unset falls back to LLM_PROVIDER), e.g. classify failures on a small local
+    # model and write fixes remotely.
+    LLM_PROVIDER = os.getenv("LLM_PROVIDER", "groq")
+    LLM_ANALYZE_PROVIDER = os.getenv("LLM_ANALYZE_PROVIDER")
+    LLM_FIX_PROVIDER = os.getenv("LLM_FIX_PROVIDER")
+    # Model names override the provider default for that step
+    LLM_ANALYZE_MODEL = os.getenv("LLM_ANALYZE_MODEL")
+    LLM_FIX_MODEL = os.getenv("LLM_FIX_MODEL")
+    GROQ_MODEL = os.getenv("GROQ_MODEL", "openai/gpt-oss-20b")
+    LLAMACPP_URL = os.getenv("LLAMACPP_URL", "http://127.0.0.1:8080")
+    LLAMACPP_MODEL = os.getenv("LLAMACPP_MODEL", "local")
+    LLAMACPP_TIMEOUT = float(os.getenv("LLAMACPP_TIMEOUT", "60"))
+    # A CPU llama.cpp server decodes one request per slot; match its --parallel setting
+    LLAMACPP_MAX_CONCURRENCY = int(os.getenv("LLAMACPP_MAX_CONCURRENCY", "1"))
+    LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+    LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "1.0"))
+    LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "30.0"))
+    FAKE_LLM_LATENCY = float(os.getenv("FAKE_LLM_LATENCY", "0"))
+
+    # inline: run monitoring in the API process; queue: enqueue for `python main.py worker`
+    DISPATCH_MODE = os.getenv("DISPATCH_MODE", "inline")
+    WORKER_CONCURRENCY = int(os.getenv("WORKER_CONCURRENCY", "4"))
+    WORKER_POLL_INTERVAL = float(os.getenv("WORKER_POLL_INTERVAL", "2"))
+    JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "300"))
+    JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+    # Inline runs execute on this many threads, ordered manual > failure webhook > scheduled >
+    # success webhook; waiting PRIORITY_AGING_SECONDS is worth one class, so nothing starves
+    MONITOR_WORKERS = int(os.getenv("MONITOR_WORKERS", "8"))
+    PRIORITY_AGING_SECONDS = float(os.getenv("PRIORITY_AGING_SECONDS", "60"))
+
+    # pr: commit fixes to a branch and open a pull request; branch: commit to a branch only;
+    # direct: fast-forward the default branch
+    FIX_COMMIT_MODE = os.getenv("FIX_COMMIT_MODE", "pr")
+    # A recurring failure comments on its open issue unless unseen for this many days
+    ISSUE_DEDUP_WINDOW_DAYS = int(os.getenv("ISSUE_DEDUP_WINDOW_DAYS", "14"))
+
+    # Failure logs at least LOG_SIMILARITY_THRESHOLD similar (estimated Jaccard over normalized
+    # log shingles) to an analyzed failure in another repository of the same owner reuse its
+    # analysis instead of calling the LLM; matches are grouped into incidents for LOG_SIMILARITY_TTL_DAYS
+    LOG_SIMILARITY_ENABLED = os.getenv("LOG_SIMILARITY_ENABLED", "true").lower() == "true"
+    LOG_SIMILARITY_THRESHOLD = float(os.getenv("LOG_SIMILARITY_THRESHOLD", "0.8"))
+    LOG_SIMILARITY_TTL_DAYS = int(os.getenv("LOG_SIMILARITY_TTL_DAYS", "7"))
+    LOG_SIMILARITY_MAX_ENTRIES = int(os.getenv("LOG_SIMILARITY_MAX_ENTRIES", "5000"))
+    # How long a run waits for a near-duplicate failure that another run, in any process, is analyzing
+    LOG_SIMILARITY_WAIT_SECONDS = float(os.getenv("LOG_SIMILARITY_WAIT_SECONDS", "60"))
+
+    # rest: sweeps run the agent for every repository; graphql: batch-check health first
+    # and run the agent only where the latest default-branch run failed
+    SWEEP_HEALTH_BACKEND = os.getenv("SWEEP_HEALTH_BACKEND", "rest")
+    GRAPHQL_BATCH_SIZE = int(os.getenv("GRAPHQL_BATCH_SIZE", "25"))
+
+    # Agent state is checkpointed after every node so failed runs resume where they stopped;
+    # POST /api/monitoring/runs/{id}/resume (or a queue retry) continues a failed run within
+    # RUN_RESUME_WINDOW seconds; every other trigger starts a fresh run
+    CHECKPOINTS_ENABLED = os.getenv("CHECKPOINTS_ENABLED", "true").lower() == "true"
+    CHECKPOINT_TTL_DAYS = int(os.getenv("CHECKPOINT_TTL_DAYS", "7"))
+    RUN_RESUME_WINDOW = int(os.getenv("RUN_RESUME_WINDOW", "3600"))
+    # Every run gets RUN_DEADLINE_SECONDS end to end (0 disables); single GitHub and LLM calls
+    # are also capped and never wait past the run's deadline. Cancellation requests made through
+    # the API are picked up every CANCEL_POLL_SECONDS.
+    RUN_DEADLINE_SECONDS = float(os.getenv("RUN_DEADLINE_SECONDS", "600"))
+    GITHUB_HTTP_TIMEOUT = float(os.getenv("GITHUB_HTTP_TIMEOUT", "30"))
+    LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "120"))
+    CANCEL_POLL_SECONDS = float(os.getenv("CANCEL_POLL_SECONDS", "2"))
+
+    REPO_CACHE_TTL = float(os.getenv("REPO_CACHE_TTL", "30"))
+    WORKFLOW_CACHE_MAX_ENTRIES = int(os.getenv("WORKFLOW_CACHE_MAX_ENTRIES", "512"))
+
+    # Routine success results expire after this many days; every repository keeps at most
+    # RESULT_MAX_PER_REPO results. Compaction runs every RETENTION_INTERVAL seconds (0 disables).
+    RESULT_SUCCESS_TTL_DAYS = int(os.getenv("RESULT_SUCCESS_TTL_DAYS", "14"))
+    RESULT_MAX_PER_REPO = int(os.getenv("RESULT_MAX_PER_REPO", "1000"))
+    RETENTION_INTERVAL = int(os.getenv("RETENTION_INTERVAL", "3600"))
\ No newline at end of file
@@ -0,0 +1,78 @@
+# src/utils/deadline.py
+import time
+import logging
+import threading
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+# Both derive from BaseException, like asyncio.CancelledError, so the tools' broad
+# `except Exception` handlers cannot swallow them and turn a stop into a normal result
+class RunTimeout(BaseException):
+    """The monitoring run used up its time budget."""
+
+
+class RunCancelled(BaseException):
+    """The monitoring run was cancelled by a user."""
+
+
+class Deadline:
+    """Time budget and cancellation flag for one monitoring run.
+
+    Passed down to every node, HTTP call and LLM call, which call check()
+    before starting work and size their own timeouts from what is left.
+    `poll()` is asked (at most every `poll_interval` seconds) whether the run
+    was cancelled from elsewhere, e.g. another API process.
+    """
+
+    def __init__(self, seconds: Optional[float] = None, poll: Callable[[], bool] = None,
+                 poll_interval: float = 2.0):
+        self.expires_at = time.monotonic() + seconds if seconds else None
+        self._cancelled = threading.Event()
+        self._poll = poll
+        self._poll_interval = poll_interval
+        self._polled_at = 0.0
+
+    def cancel(self):
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        if not self._cancelled.is_set() and self._poll:
+            now = time.monotonic()
+            if now - self._polled_at >= self._poll_interval:
+                self._polled_at = now
+                try:
+                    if self._poll():
+                        self._cancelled.set()
+                except Exception as e:
+                    logger.warning(f"Cancellation poll failed: {str(e)}")
+        return self._cancelled.is_set()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left, or None without a time budget."""
+        if self.expires_at is None:
+            return None
+        return self.expires_at - time.monotonic()
+
+    def check(self):
+        if self.cancelled:
+            raise RunCancelled("Run was cancelled")
+        remaining = self.remaining()
+        if remaining is not None and remaining <= 0:
+            raise RunTimeout("Run exceeded its deadline")
+
+    def timeout(self, cap: float) -> float:
+        """Timeout for the next blocking call: `cap`, shortened to the time left."""
+        self.check()
+        remaining = self.remaining()
+        return cap if remaining is None else max(0.1, min(cap, remaining))
+
+    def wait(self, seconds: float):
+        """Sleep up to `seconds`, waking early on cancellation or when the deadline passes."""
+        remaining = self.remaining()
+        if remaining is not None:
+            seconds = min(seconds, max(0.0, remaining))
+        self._cancelled.wait(seconds)
+        self.check()
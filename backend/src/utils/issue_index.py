@@ -0,0 +1,88 @@
+# src/utils/issue_index.py
+import re
+import hashlib
+from datetime import datetime, timedelta
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from src.utils.log_similarity import normalize_log
+
+
+# Log lines that state what went wrong; the rest of the log is progress output
+_ERROR_LINE = re.compile(r"\b(error|err|fatal|failed|failure|exception|traceback)\b")
+MAX_ERROR_LINES = 5
+
+
+def failure_fingerprint(workflow_path: str, job_name: str, logs: str) -> str:
+    """Stable key for "the same failure": workflow, job and the normalized error lines of its log.
+
+    Built only from what GitHub reports, never from the LLM's wording, so a
+    recurring failure maps to the same key on every run.
+    """
+    lines = normalize_log(logs or "")
+    errors = list(dict.fromkeys(line for line in lines if _ERROR_LINE.search(line)))
+    text = "\n".join(errors[-MAX_ERROR_LINES:] or lines[-MAX_ERROR_LINES:])
+    return hashlib.sha256(f"{workflow_path or ''}\n{job_name or ''}\n{text}".encode()).hexdigest()[:32]
+
+
+class IssueIndex:
+    """Open agent-created issues per repository, keyed by failure fingerprint.
+
+    An entry stops matching once its issue is closed (reported by the `issues`
+    webhook) or has not seen the failure for `window_days`, after which the
+    next occurrence opens a fresh issue.
+    """
+
+    def __init__(self, collection, window_days: int = 14):
+        self.collection = collection
+        self.window_days = window_days
+
+    def ensure_indexes(self):
+        self.collection.create_index(
+            [("repo_id", ASCENDING), ("fingerprint", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"state": "open"},
+            name="one_open_issue_per_fingerprint"
+        )
+        self.collection.create_index([("repo_id", ASCENDING), ("issue_number", ASCENDING)])
+
+    def mark_seen(self, repo_id, fingerprint: str):
+        """Count another occurrence on the matching open issue and return its entry, or None."""
+        return self.collection.find_one_and_update(
+            {
+                "repo_id": repo_id,
+                "fingerprint": fingerprint,
+                "state": "open",
+                "last_seen": {"$gte": datetime.now() - timedelta(days=self.window_days)}
+            },
+            {"$set": {"last_seen": datetime.now()}, "$inc": {"occurrences": 1}},
+            return_document=ReturnDocument.AFTER
+        )
+
+    def record(self, repo_id, fingerprint: str, issue_number: int, issue_url: str):
+        """Remember a newly created issue, retiring any stale entry for the same fingerprint."""
+        now = datetime.now()
+        self.collection.update_many(
+            {"repo_id": repo_id, "fingerprint": fingerprint, "state": "open"},
+            {"$set": {"state": "stale"}}
+        )
+        try:
+            self.collection.insert_one({
+                "repo_id": repo_id,
+                "fingerprint": fingerprint,
+                "state": "open",
+                "issue_number": issue_number,
+                "issue_url": issue_url,
+                "created_at": now,
+                "last_seen": now,
+                "occurrences": 1
+            })
+        except DuplicateKeyError:
+            # A concurrent run recorded its issue first; keep that one
+            pass
+
+    def close(self, repo_id, issue_number: int) -> bool:
+        result = self.collection.update_many(
+            {"repo_id": repo_id, "issue_number": issue_number, "state": "open"},
+            {"$set": {"state": "closed", "closed_at": datetime.now()}}
+        )
+        return result.modified_count > 0
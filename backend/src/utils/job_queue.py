@@ -0,0 +1,182 @@
+# src/utils/job_queue.py
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument, ASCENDING
+from pymongo.errors import DuplicateKeyError
+from .priority_dispatcher import PRIORITY_CLASSES, priority_rank
+
+CLASS_NAMES = {priority: name for name, priority in PRIORITY_CLASSES.items()}
+
+
+class JobQueue:
+    """Durable work queue stored in a MongoDB collection.
+
+    Workers claim a job by taking a time-limited lease on it and must keep
+    heartbeating while they run it. A job whose lease expires (the worker died
+    or hung) becomes visible again and is picked up by another worker, up to
+    max_attempts times. At most one queued job exists per (repo_id, kind), so
+    bursts of triggers for the same repository collapse into one run. A job
+    resuming a run (payload["run_id"]) is keyed by that run as well, so it is
+    never folded into a plain job for the repository.
+
+    Jobs are claimed in `rank` order: priority class with aging (see
+    priority_rank), so urgent work goes first without starving routine checks.
+    """
+
+    def __init__(self, collection, lease_seconds: int = 300, max_attempts: int = 3, retry_delay: int = 30,
+                 aging_seconds: float = 60):
+        self.collection = collection
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.aging_seconds = aging_seconds
+
+    def ensure_indexes(self):
+        self.collection.create_index([("status", ASCENDING), ("rank", ASCENDING)])
+        self.collection.create_index([("status", ASCENDING), ("lease_expires_at", ASCENDING)])
+        self.collection.create_index(
+            [("repo_id", ASCENDING), ("kind", ASCENDING), ("run_id", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"status": "queued"},
+            name="one_queued_job_per_repo"
+        )
+        self.collection.create_index("finished_at", expireAfterSeconds=7 * 86400)
+
+    def enqueue(self, repo_id, kind: str = "monitor", priority_class: str = "scheduled", payload: dict = None):
+        """Queue a job, or return the id of the job already queued for this repository (or run)."""
+        now = datetime.now()
+        priority = PRIORITY_CLASSES[priority_class]
+        query = {"repo_id": repo_id, "kind": kind, "run_id": (payload or {}).get("run_id"), "status": "queued"}
+        try:
+            result = self.collection.find_one_and_update(
+                query,
+                {
+                    # repo_id, kind, run_id and status are copied from the query on insert
+                    "$setOnInsert": {
+                        "payload": payload or {},
+                        "attempts": 0,
+                        "enqueued_at": now,
+                        "available_at": now
+                    },
+                    # A more urgent trigger upgrades the queued job (aged from now, not
+                    # from the original enqueue, which the upsert cannot read)
+                    "$min": {"priority": priority, "rank": priority_rank(priority_class, now.timestamp(), self.aging_seconds)}
+                },
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # Lost an upsert race with another enqueue; that job covers this one
+            result = self.collection.find_one(query)
+        return result["_id"] if result else None
+
+    def claim(self, worker_id: str):
+        """Lease the next available job to worker_id, or return None."""
+        while True:
+            now = datetime.now()
+            job = self.collection.find_one_and_update(
+                {"$or": [
+                    {"status": "queued", "available_at": {"$lte": now}},
+                    {"status": "running", "lease_expires_at": {"$lt": now}}
+                ]},
+                {
+                    "$set": {
+                        "status": "running",
+                        "lease_owner": worker_id,
+                        "lease_expires_at": now + timedelta(seconds=self.lease_seconds),
+                        "heartbeat_at": now,
+                        "started_at": now
+                    },
+                    "$inc": {"attempts": 1}
+                },
+                sort=[("rank", ASCENDING)],
+                return_document=ReturnDocument.AFTER
+            )
+            if job is not None and job["attempts"] == 1:
+                job["queue_seconds"] = (now - job["enqueued_at"]).total_seconds()
+                self.collection.update_one({"_id": job["_id"]}, {"$set": {"queue_seconds": job["queue_seconds"]}})
+            if job is None or job["attempts"] <= self.max_attempts:
+                return job
+            # Reclaimed after its lease expired too many times - give up on it
+            self._finish(job, "failed", error="Lease expired too many times")
+
+    def heartbeat(self, job_id, worker_id: str) -> bool:
+        """Extend the lease. False means the lease was lost and the job belongs to someone else."""
+        now = datetime.now()
+        result = self.collection.update_one(
+            {"_id": job_id, "status": "running", "lease_owner": worker_id},
+            {"$set": {"heartbeat_at": now, "lease_expires_at": now + timedelta(seconds=self.lease_seconds)}}
+        )
+        return result.matched_count > 0
+
+    def complete(self, job_id, worker_id: str, result: dict = None):
+        self._finish({"_id": job_id, "lease_owner": worker_id}, "done", result=result)
+
+    def fail(self, job_id, worker_id: str, error: str, payload: dict = None):
+        """Requeue the job with a delay, or mark it failed once attempts are exhausted.
+
+        `payload` replaces the job's payload for the retry; with a "run_id" the
+        retry resumes that run and is queued under it.
+        """
+        job = self.collection.find_one({"_id": job_id, "lease_owner": worker_id, "status": "running"})
+        if not job:
+            return
+        if job["attempts"] >= self.max_attempts:
+            self._finish(job, "failed", error=error)
+            return
+
+        now = datetime.now()
+        update = {
+            "status": "queued",
+            "error": error,
+            "available_at": now + timedelta(seconds=self.retry_delay * job["attempts"])
+        }
+        if payload is not None:
+            update["payload"] = payload
+            update["run_id"] = payload.get("run_id")
+        try:
+            self.collection.update_one(
+                {"_id": job_id, "lease_owner": worker_id},
+                {
+                    "$set": update,
+                    "$unset": {"lease_owner": "", "lease_expires_at": ""}
+                }
+            )
+        except DuplicateKeyError:
+            # The same job (a plain one, or one resuming this run) is already queued and will do the work
+            self._finish(job, "superseded", error=error)
+
+    def _finish(self, job: dict, status: str, result: dict = None, error: str = None):
+        update = {"status": status, "finished_at": datetime.now()}
+        if result is not None:
+            update["result"] = result
+        if error is not None:
+            update["error"] = error
+        self.collection.update_one(
+            {"_id": job["_id"], "lease_owner": job.get("lease_owner")},
+            {"$set": update, "$unset": {"lease_expires_at": ""}}
+        )
+
+    def queue_times(self, since: datetime) -> dict:
+        """Time from enqueue to first claim per priority class, for jobs started since `since`."""
+        rows = self.collection.aggregate([
+            {"$match": {"started_at": {"$gte": since}, "queue_seconds": {"$exists": True}}},
+            {"$group": {
+                "_id": "$priority",
+                "started": {"$sum": 1},
+                "avg": {"$avg": "$queue_seconds"},
+                "max": {"$max": "$queue_seconds"}
+            }}
+        ])
+        return {
+            CLASS_NAMES.get(row["_id"], str(row["_id"])): {
+                "started": row["started"],
+                "queue_seconds": {"avg": round(row["avg"], 3), "max": round(row["max"], 3)}
+            }
+            for row in rows
+        }
+
+    def counts(self) -> dict:
+        return {
+            row["_id"]: row["count"]
+            for row in self.collection.aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}])
+        }
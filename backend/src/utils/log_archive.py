@@ -0,0 +1,305 @@
+# src/utils/log_archive.py
+import os
+import re
+import json
+import mmap
+import fcntl
+import bisect
+import struct
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+import zstandard
+
+FRAME_LINES = 4096
+FRAME_BYTES = 1024 * 1024
+# Blob layout: MAGIC, 4-byte big-endian index length, JSON index, then the frames
+MAGIC = b"CILOGZ1\n"
+_HEADER = len(MAGIC) + 4
+# Eviction trims the archive to this share of max_bytes, so the directory walk it needs is rare
+EVICT_TO = 0.9
+
+
+class LogArchive:
+    """On-disk archive of job logs, stored as independently compressed zstd frames.
+
+    Each log is split into frames of at most FRAME_LINES lines / FRAME_BYTES bytes,
+    so a line or byte range can be served by memory-mapping the blob and
+    decompressing only the frames that overlap it. The frame index sits in the
+    blob's header, so a single rename replaces both and a reader holding the
+    file open keeps a consistent view while the log is rewritten or evicted.
+
+    The archive's total size is kept in a usage file that every process
+    updates under an exclusive file lock, so max_bytes holds across workers.
+    Only when it is exceeded is the directory walked, to recount and drop the
+    least recently used logs (reads refresh a log's mtime).
+    """
+
+    def __init__(self, root: str, max_bytes: int, level: int = 10):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.level = level
+        self._usage_path = os.path.join(self.root, ".usage")
+        os.makedirs(self.root, exist_ok=True)
+        with self._locked():
+            if not os.path.exists(self._usage_path):
+                self._write_usage(self._evict())
+
+    @contextmanager
+    def _locked(self):
+        """Exclusive lock over the usage file, shared by every thread and process."""
+        with open(os.path.join(self.root, ".lock"), "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _read_usage(self) -> int | None:
+        try:
+            with open(self._usage_path) as f:
+                return int(f.read())
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _write_usage(self, total: int):
+        tmp = f"{self._usage_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w") as f:
+            f.write(str(max(0, total)))
+        os.replace(tmp, self._usage_path)
+
+    def _update_usage(self, delta: int):
+        """Add delta to the archive's size and evict when it passes max_bytes. Caller holds the lock."""
+        total = self._read_usage()
+        total = self._evict() if total is None or total + delta > self.max_bytes else total + delta
+        self._write_usage(total)
+
+    @staticmethod
+    def _size(path: str) -> int:
+        try:
+            return os.stat(path).st_size
+        except FileNotFoundError:
+            return 0
+
+    def _path(self, repo: str, job_id: int):
+        repo_dir = os.path.join(self.root, re.sub(r"[^A-Za-z0-9_.-]", "__", repo))
+        return repo_dir, os.path.join(repo_dir, f"{int(job_id)}.log.zst")
+
+    def has(self, repo: str, job_id: int) -> bool:
+        return os.path.exists(self._path(repo, job_id)[1])
+
+    def put(self, repo: str, job_id: int, logs: str) -> dict:
+        """Compress and store a log, replacing any previous copy. Returns the index."""
+        repo_dir, blob_path = self._path(repo, job_id)
+        os.makedirs(repo_dir, exist_ok=True)
+
+        compressor = zstandard.ZstdCompressor(level=self.level)
+        frames = []
+        compressed_frames = []
+        line_no = 0
+        byte_offset = 0
+        blob_offset = 0
+
+        for chunk in self._chunk_lines(logs.encode("utf-8")):
+            compressed = compressor.compress(b"".join(chunk))
+            raw_len = sum(len(line) for line in chunk)
+            # [offset after the header, compressed length, first line, first byte, raw length]
+            frames.append([blob_offset, len(compressed), line_no, byte_offset, raw_len])
+            compressed_frames.append(compressed)
+            blob_offset += len(compressed)
+            line_no += len(chunk)
+            byte_offset += raw_len
+
+        index = {
+            "repo": repo,
+            "job_id": int(job_id),
+            "total_lines": line_no,
+            "total_bytes": byte_offset,
+            "compressed_bytes": blob_offset,
+            "archived_at": datetime.now(timezone.utc).isoformat(),
+            "frames": frames
+        }
+        header = json.dumps(index).encode("utf-8")
+
+        tmp_blob = f"{blob_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_blob, "wb") as out:
+            out.write(MAGIC)
+            out.write(struct.pack(">I", len(header)))
+            out.write(header)
+            for compressed in compressed_frames:
+                out.write(compressed)
+        size = _HEADER + len(header) + blob_offset
+
+        with self._locked():
+            replaced = self._size(blob_path)
+            os.replace(tmp_blob, blob_path)
+            self._update_usage(size - replaced)
+        return index
+
+    def _chunk_lines(self, data: bytes):
+        chunk, size = [], 0
+        for line in data.splitlines(keepends=True):
+            chunk.append(line)
+            size += len(line)
+            if len(chunk) >= FRAME_LINES or size >= FRAME_BYTES:
+                yield chunk
+                chunk, size = [], 0
+        if chunk:
+            yield chunk
+
+    def _touch(self, blob_path: str):
+        # Reads count as use, so eviction drops the least recently used logs first
+        try:
+            os.utime(blob_path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _read_header(f) -> dict | None:
+        head = f.read(_HEADER)
+        if len(head) < _HEADER or head[:len(MAGIC)] != MAGIC:
+            return None
+        (length,) = struct.unpack(">I", head[len(MAGIC):])
+        return json.loads(f.read(length))
+
+    @contextmanager
+    def _open(self, repo: str, job_id: int):
+        """Yield (index, file) for a log, or (None, None) when it is not archived.
+
+        Everything is read through the one open file, so a concurrent put() or
+        eviction cannot mix an index with another version's frames.
+        """
+        _, blob_path = self._path(repo, job_id)
+        try:
+            f = open(blob_path, "rb")
+        except FileNotFoundError:
+            yield None, None
+            return
+        with f:
+            index = self._read_header(f)
+            if index is not None:
+                self._touch(blob_path)
+            yield index, (f if index is not None else None)
+
+    def get_index(self, repo: str, job_id: int) -> dict | None:
+        with self._open(repo, job_id) as (index, _):
+            return index
+
+    def read_lines(self, repo: str, job_id: int, start: int, end: int) -> dict | None:
+        """Return lines [start, end) (0-based) without decompressing the whole log."""
+        with self._open(repo, job_id) as (index, f):
+            if index is None:
+                return None
+
+            start = max(0, start)
+            end = min(end, index["total_lines"])
+            lines = []
+            if start < end:
+                frames = index["frames"]
+                first = bisect.bisect_right([frame[2] for frame in frames], start) - 1
+                for frame, data in self._iter_frames(f, frames[first:]):
+                    frame_start = frame[2]
+                    if frame_start >= end:
+                        break
+                    frame_lines = data.splitlines(keepends=True)
+                    lo = max(start - frame_start, 0)
+                    hi = min(end - frame_start, len(frame_lines))
+                    lines.extend(line.decode("utf-8", errors="replace").rstrip("\r\n")
+                                 for line in frame_lines[lo:hi])
+
+        return {
+            "total_lines": index["total_lines"],
+            "total_bytes": index["total_bytes"],
+            "start": start,
+            "end": start + len(lines),
+            "lines": lines
+        }
+
+    def read_bytes(self, repo: str, job_id: int, start: int, end: int) -> dict | None:
+        """Return the uncompressed byte range [start, end) of a log."""
+        with self._open(repo, job_id) as (index, f):
+            if index is None:
+                return None
+
+            start = max(0, start)
+            end = min(end, index["total_bytes"])
+            parts = []
+            if start < end:
+                frames = index["frames"]
+                first = bisect.bisect_right([frame[3] for frame in frames], start) - 1
+                for frame, data in self._iter_frames(f, frames[first:]):
+                    frame_start = frame[3]
+                    if frame_start >= end:
+                        break
+                    parts.append(data[max(start - frame_start, 0):end - frame_start])
+
+        content = b"".join(parts)
+        return {
+            "total_lines": index["total_lines"],
+            "total_bytes": index["total_bytes"],
+            "start": start,
+            "end": start + len(content),
+            "content": content.decode("utf-8", errors="replace")
+        }
+
+    def _iter_frames(self, f, frames: list):
+        # Frame offsets count from the end of the header, where the file position is now
+        data_start = f.tell()
+        if os.fstat(f.fileno()).st_size <= data_start:
+            return
+        decompressor = zstandard.ZstdDecompressor()
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as blob:
+            for frame in frames:
+                offset, length, _, _, raw_len = frame
+                offset += data_start
+                data = decompressor.decompress(blob[offset:offset + length],
+                                               max_output_size=raw_len)
+                yield frame, data
+
+    def delete(self, repo: str, job_id: int):
+        _, blob_path = self._path(repo, job_id)
+        with self._locked():
+            size = self._size(blob_path)
+            try:
+                os.remove(blob_path)
+            except FileNotFoundError:
+                return
+            self._update_usage(-size)
+
+    def _evict(self) -> int:
+        """Recount the archive from disk and, when it is over max_bytes, drop least recently
+        used logs until it fits in EVICT_TO of it. Returns the new total. Caller holds the lock."""
+        entries = []
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if not name.endswith(".log.zst"):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, path, stat.st_size))
+        total = sum(size for _, _, size in entries)
+        if total <= self.max_bytes:
+            return total
+        for _, path, size in sorted(entries):
+            if total <= self.max_bytes * EVICT_TO:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        return total
+
+
+_archive = None
+
+
+def get_log_archive() -> LogArchive:
+    global _archive
+    if _archive is None:
+        from src.utils.config import Config
+        _archive = LogArchive(Config.LOG_ARCHIVE_DIR, Config.LOG_ARCHIVE_MAX_BYTES)
+    return _archive
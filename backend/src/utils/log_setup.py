@@ -0,0 +1,137 @@
+# src/utils/log_setup.py
+import copy
+import json
+import queue
+import atexit
+import random
+import logging
+import zlib
+import contextvars
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+repo_id_var = contextvars.ContextVar("repo_id", default=None)
+run_id_var = contextvars.ContextVar("run_id", default=None)
+
+_listener = None
+
+
+@contextmanager
+def log_context(repo_id=None, run_id=None):
+    """Tag every record logged inside the block (in this thread or task) with repo and run IDs."""
+    tokens = []
+    if repo_id is not None:
+        tokens.append((repo_id_var, repo_id_var.set(str(repo_id))))
+    if run_id is not None:
+        tokens.append((run_id_var, run_id_var.set(str(run_id))))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Copy the context IDs onto the record while still on the calling thread."""
+
+    def filter(self, record):
+        record.repo_id = repo_id_var.get()
+        record.run_id = run_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Keep a fraction of records logged with extra={"sampled": True}.
+
+    Sampling is per workflow run when one is known, so a kept run keeps all of
+    its detail lines. Warnings and errors are never dropped.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if not getattr(record, "sampled", False) or record.levelno >= logging.WARNING or self.rate >= 1:
+            return True
+        key = getattr(record, "run_id", None) or getattr(record, "repo_id", None)
+        if key:
+            return zlib.crc32(key.encode()) % 10000 < self.rate * 10000
+        return random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName
+        }
+        for key in ("repo_id", "run_id"):
+            if getattr(record, key, None):
+                entry[key] = getattr(record, key)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__('%(asctime)s - %(levelname)s - %(message)s')
+
+    def format(self, record):
+        text = super().format(record)
+        ids = " ".join(f"{key}={getattr(record, key)}" for key in ("repo_id", "run_id") if getattr(record, key, None))
+        return f"{text} [{ids}]" if ids else text
+
+
+def setup_logging(level=logging.INFO, log_format: str = "json", log_file: str = None, sample_rate: float = 1.0):
+    """Route all logging through a queue so callers never block on console or disk I/O.
+
+    Records are tagged and sampled on the calling thread, then formatted and
+    written by a single QueueListener thread. Safe to call more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return _listener
+
+    formatter = JsonFormatter() if log_format == "json" else TextFormatter()
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    queue_handler = QueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(ContextFilter())
+    queue_handler.addFilter(SamplingFilter(sample_rate))
+    # QueueHandler.prepare() would flatten the record through this formatter; keep the
+    # raw message and exception so the listener's formatter sees them
+    queue_handler.prepare = _prepare
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return _listener
+
+
+def _prepare(record):
+    # Resolve args now: they may be mutated after the call returns
+    record = copy.copy(record)
+    record.msg = record.getMessage()
+    record.args = None
+    if record.exc_info:
+        record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.exc_info = None
+    return record
@@ -0,0 +1,349 @@
+# src/utils/log_similarity.py
+import re
+import time
+import random
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Optional
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 64
+# 16 bands of 4 rows: logs sharing about half their shingles become candidates,
+# then the estimated similarity decides
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+MAX_LINES = 300
+# How often a run waiting on another process's analysis re-reads its claim
+CLAIM_POLL_SECONDS = 0.5
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240611)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+_TIMESTAMP = re.compile(r"^\ufeff?\d{4}-\d\d-\d\dT[\d:.]+Z ?", re.M)
+_ANSI = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+_UUID = re.compile(r"\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b")
+_SHA = re.compile(r"\b[0-9a-f]{7,64}\b")
+# Checkout paths differ per repository; keep only the file name
+_PATH = re.compile(r"(?:[\w.@+~-]*/)+([\w.@+-]+)")
+_NUMBER = re.compile(r"\d+")
+_WORD = re.compile(r"<\w+>|\w+")
+
+
+def normalize_log(logs: str, repo_names: tuple = ()) -> list:
+    """Lines of the log tail with run- and repository-specific noise removed."""
+    text = _ANSI.sub("", _TIMESTAMP.sub("", logs)).lower()
+    for name in repo_names:
+        if name:
+            text = re.sub(rf"\b{re.escape(name.lower())}\b", "<repo>", text)
+    text = _UUID.sub("<uuid>", text)
+    text = _SHA.sub("<sha>", text)
+    text = _PATH.sub(r"\1", text)
+    text = _NUMBER.sub("<n>", text)
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    return lines[-MAX_LINES:]
+
+
+@lru_cache(maxsize=64)
+def log_signature(logs: str, repo_names: tuple = ()) -> Optional[tuple]:
+    """MinHash signature over word 3-grams of the normalized log, or None for an empty log."""
+    shingles = set()
+    for line in normalize_log(logs, repo_names):
+        words = _WORD.findall(line)
+        if len(words) < 3:
+            shingles.add(" ".join(words))
+            continue
+        for i in range(len(words) - 2):
+            shingles.add(" ".join(words[i:i + 3]))
+    if not shingles:
+        return None
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "big") for s in shingles]
+    return tuple(min([(a * h + b) % _PRIME for h in hashes]) for a, b in _PERMUTATIONS)
+
+
+def band_keys(signature: tuple, tenant: str = "") -> list:
+    """LSH bucket keys of a signature; prefixed with the tenant so buckets never span owners."""
+    return [
+        f"{tenant}:{band}:{hashlib.blake2b(repr(signature[band * ROWS:(band + 1) * ROWS]).encode(), digest_size=8).hexdigest()}"
+        for band in range(BANDS)
+    ]
+
+
+def similarity(a: tuple, b: tuple) -> float:
+    """Estimated Jaccard similarity of the two logs' shingle sets."""
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERM
+
+
+def adapt_error_message(error_message: Optional[str], logs: str, repo_names: tuple = ()) -> Optional[str]:
+    """The line of `logs` corresponding to another repository's error message.
+
+    Reused analyses quote the other repository's log; this picks the line here
+    with the most words in common once paths, versions and IDs are normalized.
+    """
+    if not error_message or error_message in logs:
+        return error_message
+    wanted = set(_WORD.findall(" ".join(normalize_log(error_message, repo_names))))
+    if not wanted:
+        return error_message
+    raw_lines = [line.strip() for line in _ANSI.sub("", _TIMESTAMP.sub("", logs)).splitlines() if line.strip()]
+    raw_lines = raw_lines[-MAX_LINES:]
+    best, best_score = None, 0.5
+    for raw, line in zip(raw_lines, normalize_log("\n".join(raw_lines), repo_names)):
+        words = set(_WORD.findall(line))
+        score = len(wanted & words) / len(wanted | words)
+        if score > best_score:
+            best, best_score = raw, score
+    return best[:500] if best else error_message
+
+
+class LogSimilarityIndex:
+    """Near-duplicate failure logs across the repositories of one owner, via MinHash LSH.
+
+    Every entry is an incident: the first analyzed failure of its kind and the
+    repositories whose logs matched it since. Matches never cross owners, so one
+    tenant's analysis is never posted into another tenant's issues. Entries are
+    held in memory and written through to Mongo; a miss also checks Mongo by
+    band key so entries from other processes are found. A failure that is still
+    being analyzed is visible too, in this process and (through a claim
+    document without an analysis) in others, so a storm of identical failures
+    waits for one LLM answer.
+    """
+
+    def __init__(self, collection, threshold: float = 0.8, ttl_days: int = 7,
+                 max_entries: int = 5000, wait_seconds: float = 60):
+        self.collection = collection
+        self.threshold = threshold
+        self.ttl_days = ttl_days
+        self.max_entries = max_entries
+        self.wait_seconds = wait_seconds
+        self._entries = {}
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.stats = {"lookups": 0, "hits": 0, "waited": 0, "misses": 0, "added": 0}
+
+    def ensure_indexes(self):
+        self.collection.create_index("bands")
+        self.collection.create_index([("repo_count", DESCENDING), ("last_seen", DESCENDING)])
+        self.collection.create_index([("last_seen", ASCENDING)], expireAfterSeconds=self.ttl_days * 86400)
+
+    def _remember(self, entry: dict):
+        # Caller holds the lock
+        if entry["id"] in self._entries:
+            return
+        if len(self._entries) >= self.max_entries:
+            self._forget(min(self._entries.values(), key=lambda e: e["last_seen"])["id"])
+        self._entries[entry["id"]] = entry
+        for key in entry["keys"]:
+            self._buckets.setdefault(key, set()).add(entry["id"])
+
+    def _forget(self, entry_id: str):
+        entry = self._entries.pop(entry_id, None)
+        if entry:
+            for key in entry["keys"]:
+                bucket = self._buckets.get(key)
+                if bucket:
+                    bucket.discard(entry_id)
+                    if not bucket:
+                        del self._buckets[key]
+
+    def _entry(self, doc: dict) -> dict:
+        signature = tuple(doc["signature"])
+        return {"id": str(doc["_id"]), "signature": signature, "keys": band_keys(signature, doc.get("owner") or ""),
+                "analysis": doc.get("analysis"), "claimed_until": doc.get("claimed_until"),
+                "last_seen": doc["last_seen"], "done": None}
+
+    def _load(self):
+        if self._loaded:
+            return
+        since = datetime.now() - timedelta(days=self.ttl_days)
+        docs = list(self.collection.find(
+            {"last_seen": {"$gte": since}, "analysis": {"$ne": None}},
+            {"signature": 1, "owner": 1, "analysis": 1, "last_seen": 1}
+        ).sort("last_seen", DESCENDING).limit(self.max_entries))
+        with self._lock:
+            for doc in docs:
+                self._remember(self._entry(doc))
+            self._loaded = True
+        logger.info(f"Loaded {len(docs)} log fingerprints")
+
+    def _live(self, entry: dict, now: datetime) -> bool:
+        # Analyzed, being analyzed here, or claimed by another process that has not given up yet
+        return bool(entry["analysis"] or entry["done"] or (entry["claimed_until"] and entry["claimed_until"] > now))
+
+    def _best(self, signature: tuple, keys: list, exclude: str = None) -> Optional[tuple]:
+        now = datetime.now()
+        with self._lock:
+            candidates = set().union(*(self._buckets.get(key, ()) for key in keys))
+            candidates.discard(exclude)
+            scored = [(similarity(signature, self._entries[c]["signature"]), self._entries[c]) for c in candidates]
+        scored = [item for item in scored if item[0] >= self.threshold and self._live(item[1], now)]
+        return max(scored, key=lambda item: item[0]) if scored else None
+
+    def _find(self, signature: tuple, keys: list, tenant: str, exclude: str = None) -> Optional[tuple]:
+        best = self._best(signature, keys, exclude)
+        if best is None:
+            # Entries and claims written by other processes since this one loaded
+            docs = list(self.collection.find(
+                {"owner": tenant, "bands": {"$in": keys}},
+                {"signature": 1, "owner": 1, "analysis": 1, "claimed_until": 1, "last_seen": 1}
+            ).sort("last_seen", DESCENDING).limit(50))
+            if docs:
+                with self._lock:
+                    for doc in docs:
+                        self._remember(self._entry(doc))
+                best = self._best(signature, keys, exclude)
+        return best
+
+    def _await(self, best: tuple, deadline=None) -> Optional[tuple]:
+        """Wait for an entry that is still being analyzed; `best` once it has an analysis, else None."""
+        score, entry = best
+        limit = self.wait_seconds
+        remaining = deadline.remaining() if deadline else None
+        if remaining is not None:
+            limit = max(0.0, min(limit, remaining))
+        done = entry["done"]
+        if done is not None:
+            done.wait(limit)
+        else:
+            # Claimed by another process: poll its document until it is analyzed, released or stale
+            until = time.monotonic() + limit
+            while True:
+                doc = self.collection.find_one({"_id": ObjectId(entry["id"])}, {"analysis": 1, "claimed_until": 1})
+                if doc is None:
+                    break
+                entry["analysis"] = doc.get("analysis")
+                entry["claimed_until"] = doc.get("claimed_until")
+                left = until - time.monotonic()
+                if entry["analysis"] or not self._live(entry, datetime.now()) or left <= 0:
+                    break
+                if deadline:
+                    deadline.wait(min(CLAIM_POLL_SECONDS, left))
+                else:
+                    time.sleep(min(CLAIM_POLL_SECONDS, left))
+        if deadline:
+            deadline.check()
+        self.stats["waited"] += 1
+        return best if entry["analysis"] else None
+
+    def _hit(self, best: tuple, logs: str, repo_id, repo_names: tuple) -> dict:
+        score, entry = best
+        self.stats["hits"] += 1
+        now = datetime.now()
+        entry["last_seen"] = now
+        self.collection.update_one({"_id": ObjectId(entry["id"])},
+                                   {"$set": {"last_seen": now}, "$inc": {"hits": 1}})
+        # repo_count is kept next to the list because array sizes cannot be indexed for sorting
+        self.collection.update_one({"_id": ObjectId(entry["id"]), "repo_ids": {"$ne": repo_id}},
+                                   {"$push": {"repo_ids": repo_id}, "$inc": {"repo_count": 1}})
+        analysis = dict(entry["analysis"])
+        analysis["error_message"] = adapt_error_message(analysis.get("error_message"), logs, repo_names)
+        return {"incident_id": entry["id"], "similarity": round(score, 3), "analysis": analysis}
+
+    def _claim(self, pending: dict):
+        now = datetime.now()
+        self.collection.insert_one({
+            "_id": ObjectId(pending["id"]),
+            "owner": pending["tenant"],
+            "signature": list(pending["signature"]),
+            "bands": pending["keys"],
+            "analysis": None,
+            "claimed_until": now + timedelta(seconds=self.wait_seconds),
+            "repo_ids": [pending["repo_id"]],
+            "repo_count": 1,
+            "hits": 0,
+            "first_seen": now,
+            "last_seen": now
+        })
+
+    def match(self, logs: str, repo_id, tenant: str, repo_names: tuple = (), deadline=None) -> Optional[dict]:
+        """Analysis of an incident of `tenant` whose logs are near-duplicates of `logs`, or None.
+
+        On a hit the repository is added to the incident. On a miss the caller
+        must analyze the logs and then call complete() with the returned
+        "pending" token (also on failure, with analysis=None).
+        """
+        self._load()
+        signature = log_signature(logs, repo_names)
+        if signature is None:
+            return None
+        keys = band_keys(signature, tenant)
+        self.stats["lookups"] += 1
+
+        best = self._find(signature, keys, tenant)
+        if best and best[1]["analysis"] is None:
+            # Still being analyzed by another run: wait for that answer instead of asking again
+            best = self._await(best, deadline)
+        if best:
+            return self._hit(best, logs, repo_id, repo_names)
+
+        # Miss: publish a pending entry, here and as a claim document in Mongo,
+        # so concurrent near-duplicates in any process wait for this analysis
+        self.stats["misses"] += 1
+        pending = {"id": str(ObjectId()), "signature": signature, "keys": keys, "tenant": tenant,
+                   "analysis": None, "claimed_until": None, "last_seen": datetime.now(),
+                   "done": threading.Event(), "repo_id": repo_id}
+        with self._lock:
+            self._remember(pending)
+        try:
+            self._claim(pending)
+            # Two processes can claim the same failure at once; the older claim wins
+            rival = self._find(signature, keys, tenant, exclude=pending["id"])
+        except Exception as e:
+            logger.warning(f"Failed to claim failure logs for analysis: {str(e)}")
+            rival = None
+        if rival and (rival[1]["analysis"] or ObjectId(rival[1]["id"]) < ObjectId(pending["id"])):
+            self.collection.delete_one({"_id": ObjectId(pending["id"])})
+            best = rival if rival[1]["analysis"] else self._await(rival, deadline)
+            if best:
+                self.complete(pending, None)
+                return self._hit(best, logs, repo_id, repo_names)
+            try:
+                self._claim(pending)
+            except Exception as e:
+                logger.warning(f"Failed to claim failure logs for analysis: {str(e)}")
+        return {"pending": pending}
+
+    def complete(self, pending: dict, analysis: Optional[dict], job_name: str = None) -> Optional[str]:
+        """Store the analysis for a missed lookup; returns the new incident ID, or None without one."""
+        try:
+            if not analysis:
+                with self._lock:
+                    self._forget(pending["id"])
+                self.collection.delete_one({"_id": ObjectId(pending["id"]), "analysis": None})
+                return None
+            now = datetime.now()
+            # Upsert: the claim document is missing if claiming failed or lost to an analysis that failed
+            self.collection.update_one({"_id": ObjectId(pending["id"])}, {
+                "$set": {"analysis": analysis, "job_name": job_name, "last_seen": now},
+                "$unset": {"claimed_until": ""},
+                "$setOnInsert": {
+                    "owner": pending["tenant"],
+                    "signature": list(pending["signature"]),
+                    "bands": pending["keys"],
+                    "repo_ids": [pending["repo_id"]],
+                    "repo_count": 1,
+                    "hits": 0,
+                    "first_seen": now
+                }
+            }, upsert=True)
+            pending["analysis"] = analysis
+            self.stats["added"] += 1
+            return pending["id"]
+        finally:
+            done, pending["done"] = pending["done"], None
+            if done:
+                done.set()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            entries = len(self._entries)
+        lookups = self.stats["lookups"]
+        return {**self.stats, "entries": entries,
+                "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0}
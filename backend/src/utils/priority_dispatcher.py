@@ -0,0 +1,135 @@
+# src/utils/priority_dispatcher.py
+import heapq
+import time
+import logging
+import threading
+import itertools
+import contextvars
+from collections import deque
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+# Lower runs first
+PRIORITY_CLASSES = {"manual": 0, "failure": 1, "scheduled": 2, "success": 3}
+
+
+def priority_rank(priority_class: str, enqueued_at: float, aging_seconds: float) -> float:
+    """Sort key with aging: every `aging_seconds` waited is worth one priority class.
+
+    Aging is linear and the same for every job, so a job's rank never changes
+    after it is queued and a plain heap (or index) orders the queue correctly.
+    """
+    return PRIORITY_CLASSES[priority_class] * aging_seconds + enqueued_at
+
+
+class PriorityDispatcher:
+    """In-process executor for monitoring runs, ordered by priority class with aging.
+
+    Work for a repository that is already waiting is coalesced into the queued
+    entry, which is promoted if the new trigger is more urgent; work whose
+    arguments must not be dropped (resuming a specific run) is submitted with
+    coalesce=False and always queued on its own. Queue time is tracked per class.
+    """
+
+    def __init__(self, workers: int, aging_seconds: float = 60, samples: int = 500):
+        self.aging_seconds = aging_seconds
+        self._heap = []
+        self._pending = {}
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._waits = {name: deque(maxlen=samples) for name in PRIORITY_CLASSES}
+        self.stats = {name: {"submitted": 0, "coalesced": 0, "started": 0} for name in PRIORITY_CLASSES}
+        self.running = 0
+        self._threads = [
+            threading.Thread(target=self._work, name=f"monitor-{slot}", daemon=True)
+            for slot in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, key, priority_class: str, fn, *args, coalesce: bool = True) -> Future:
+        """Queue fn(*args), or join the entry already waiting under `key` (unless coalesce=False).
+
+        fn runs in a copy of the submitter's context, so its trace and log
+        context carry over to the worker thread.
+        """
+        now = time.monotonic()
+        rank = priority_rank(priority_class, now, self.aging_seconds)
+        with self._cond:
+            self.stats[priority_class]["submitted"] += 1
+            if not coalesce:
+                # Never joined: a key of its own that no other submission matches
+                key = (key, next(self._counter))
+            entry = self._pending.get(key)
+            if entry:
+                self.stats[priority_class]["coalesced"] += 1
+                if rank < entry["rank"]:
+                    # Promote: leave the old heap item behind as stale
+                    entry["stale"] = True
+                    entry = {**entry, "rank": rank, "class": priority_class, "stale": False}
+                    self._pending[key] = entry
+                    heapq.heappush(self._heap, (rank, next(self._counter), entry))
+                    self._cond.notify()
+                return entry["future"]
+
+            entry = {"key": key, "class": priority_class, "rank": rank, "fn": fn, "args": args,
+                     "enqueued_at": now, "future": Future(), "stale": False,
+                     "context": contextvars.copy_context()}
+            self._pending[key] = entry
+            heapq.heappush(self._heap, (rank, next(self._counter), entry))
+            self._cond.notify()
+            return entry["future"]
+
+    def _next(self) -> dict:
+        with self._cond:
+            while True:
+                while self._heap and self._heap[0][2]["stale"]:
+                    heapq.heappop(self._heap)
+                if self._heap:
+                    entry = heapq.heappop(self._heap)[2]
+                    del self._pending[entry["key"]]
+                    self.running += 1
+                    self.stats[entry["class"]]["started"] += 1
+                    self._waits[entry["class"]].append(time.monotonic() - entry["enqueued_at"])
+                    return entry
+                self._cond.wait()
+
+    def _work(self):
+        while True:
+            entry = self._next()
+            future = entry["future"]
+            try:
+                if future.set_running_or_notify_cancel():
+                    future.set_result(entry["context"].run(entry["fn"], *entry["args"]))
+            except BaseException as e:
+                logger.error(f"Monitoring task for {entry['key']} failed: {str(e)}")
+                future.set_exception(e)
+            finally:
+                with self._cond:
+                    self.running -= 1
+
+    def idle(self) -> bool:
+        with self._cond:
+            return not self._pending and not self.running
+
+    def metrics(self) -> dict:
+        """Per-class counters and queue-time percentiles over the most recent runs."""
+        with self._cond:
+            queued = {name: 0 for name in PRIORITY_CLASSES}
+            for entry in self._pending.values():
+                queued[entry["class"]] += 1
+            classes = {}
+            for name, waits in self._waits.items():
+                ordered = sorted(waits)
+                classes[name] = {
+                    **self.stats[name],
+                    "queued": queued[name],
+                    "queue_seconds": {
+                        "p50": round(ordered[len(ordered) // 2], 3),
+                        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+                        "max": round(ordered[-1], 3)
+                    } if ordered else None
+                }
+            return {"workers": len(self._threads), "running": self.running,
+                    "aging_seconds": self.aging_seconds, "classes": classes}
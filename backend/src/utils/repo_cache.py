@@ -0,0 +1,69 @@
+# src/utils/repo_cache.py
+import time
+import threading
+
+
+class RepositoryCache:
+    """In-process cache of repository records with TTL and explicit invalidation.
+
+    Writes in this process invalidate entries directly; writes from other
+    workers arrive through a change stream when available, with the TTL as the
+    upper bound on staleness otherwise. Readers pass the generation they saw
+    before querying so a result fetched before an invalidation is not cached.
+    """
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._by_id = {}
+        self._all = None
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, repo_id: str):
+        with self._lock:
+            entry = self._by_id.get(repo_id)
+            if entry and entry[1] > time.monotonic():
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            return None
+
+    def put(self, repo_id: str, repo, generation: int):
+        with self._lock:
+            if generation == self._generation:
+                self._by_id[repo_id] = (repo, time.monotonic() + self.ttl)
+
+    def get_all(self):
+        with self._lock:
+            if self._all and self._all[1] > time.monotonic():
+                self.hits += 1
+                return list(self._all[0])
+            self.misses += 1
+            return None
+
+    def put_all(self, repos: list, generation: int):
+        with self._lock:
+            if generation == self._generation:
+                expires = time.monotonic() + self.ttl
+                self._all = (list(repos), expires)
+                for repo in repos:
+                    self._by_id[str(repo.id)] = (repo, expires)
+
+    def invalidate(self, repo_id: str = None):
+        """Drop one repository (and the list, whose contents or order it affects), or everything."""
+        with self._lock:
+            self._generation += 1
+            self._all = None
+            if repo_id is None:
+                self._by_id.clear()
+            else:
+                self._by_id.pop(str(repo_id), None)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._by_id), "hits": self.hits, "misses": self.misses}
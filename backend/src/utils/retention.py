@@ -0,0 +1,119 @@
+# src/utils/retention.py
+from datetime import datetime, timedelta
+from pymongo import ASCENDING, DESCENDING, UpdateOne, DeleteMany
+from pymongo.errors import DuplicateKeyError
+
+ROUTINE_FIELDS = {"status": 1, "root_cause": 1, "timestamp": 1, "occurrences": 1, "last_seen": 1,
+                  "failed_run_id": 1, "fix_applied": 1, "pr_url": 1, "issue_url": 1,
+                  "error_message": 1}
+
+
+def is_routine_success(result: dict) -> bool:
+    """A success that carries no information beyond 'nothing was wrong'."""
+    return (result.get("status") == "success"
+            and not result.get("failed_run_id")
+            and not result.get("fix_applied")
+            and not result.get("pr_url")
+            and not result.get("issue_url")
+            and not result.get("error_message"))
+
+
+def same_routine_result(a: dict, b: dict) -> bool:
+    return is_routine_success(a) and is_routine_success(b) and a.get("root_cause") == b.get("root_cause")
+
+
+def success_expiry(last_seen: datetime, ttl_days: int):
+    return last_seen + timedelta(days=ttl_days) if ttl_days else None
+
+
+def ensure_indexes(collection):
+    # Routine successes carry expires_at; every other result is kept until capped
+    collection.create_index("expires_at", expireAfterSeconds=0)
+
+
+def cap_repository(collection, repo_id, max_results: int) -> int:
+    """Delete everything older than the newest max_results results of a repository."""
+    if not max_results:
+        return 0
+    boundary = list(collection.find({"repo_id": repo_id}, {"timestamp": 1})
+                    .sort("timestamp", DESCENDING).skip(max_results - 1).limit(1))
+    if not boundary:
+        return 0
+    return collection.delete_many({"repo_id": repo_id, "timestamp": {"$lt": boundary[0]["timestamp"]}}).deleted_count
+
+
+def downsample_repository(collection, repo_id, ttl_days: int) -> int:
+    """Collapse consecutive identical routine successes into their first record.
+
+    The surviving record counts the collapsed ones in `occurrences` and keeps
+    the latest time in `last_seen`. Returns the number of records removed.
+    """
+    updates = []
+    removed = []
+    head = None
+
+    def flush():
+        if head and head["merged"]:
+            updates.append(UpdateOne({"_id": head["_id"]}, {"$set": {
+                "occurrences": head["occurrences"],
+                "last_seen": head["last_seen"],
+                "expires_at": success_expiry(head["last_seen"], ttl_days)
+            }}))
+
+    for result in collection.find({"repo_id": repo_id}, ROUTINE_FIELDS).sort("timestamp", ASCENDING):
+        occurrences = result.get("occurrences") or 1
+        last_seen = result.get("last_seen") or result.get("timestamp")
+        if head and same_routine_result(head, result):
+            head["occurrences"] += occurrences
+            head["last_seen"] = max(head["last_seen"], last_seen)
+            head["merged"] = True
+            removed.append(result["_id"])
+            continue
+        flush()
+        head = {**result, "occurrences": occurrences, "last_seen": last_seen, "merged": False} \
+            if is_routine_success(result) else None
+    flush()
+
+    if removed:
+        updates.append(DeleteMany({"_id": {"$in": removed}}))
+    if updates:
+        collection.bulk_write(updates, ordered=True)
+    return len(removed)
+
+
+# Maintenance locks are leases: short, renewed while the job runs, released when it ends,
+# so a crashed holder blocks others for at most this long
+LOCK_TTL_SECONDS = 60
+
+
+def acquire_lock(collection, name: str, owner: str, ttl_seconds: int = LOCK_TTL_SECONDS) -> bool:
+    """Best-effort cross-process lock so one worker runs maintenance at a time.
+
+    Calling it again as the same owner renews the lease.
+    """
+    now = datetime.now()
+    try:
+        collection.update_one(
+            {"_id": name, "$or": [{"expires_at": {"$lt": now}}, {"owner": owner}]},
+            {"$set": {"owner": owner, "expires_at": now + timedelta(seconds=ttl_seconds)}},
+            upsert=True
+        )
+        return True
+    except DuplicateKeyError:
+        return False
+
+
+def release_lock(collection, name: str, owner: str):
+    collection.delete_one({"_id": name, "owner": owner})
+
+
+def compact(results_collection, repo_ids, max_results: int, ttl_days: int, heartbeat=None) -> dict:
+    """Cap and downsample every repository; `heartbeat()` is called before each one, e.g. to renew a lock."""
+    stats = {"repositories": 0, "capped": 0, "downsampled": 0}
+    for repo_id in repo_ids:
+        if heartbeat:
+            heartbeat()
+        stats["repositories"] += 1
+        stats["capped"] += cap_repository(results_collection, repo_id, max_results)
+        stats["downsampled"] += downsample_repository(results_collection, repo_id, ttl_days)
+    return stats
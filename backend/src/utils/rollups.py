@@ -0,0 +1,124 @@
+# src/utils/rollups.py
+from datetime import datetime, timedelta
+from pymongo import UpdateOne, ReplaceOne, ASCENDING
+
+GRANULARITIES = ("hour", "day")
+COUNTERS = ("runs", "successes", "failures", "errors", "fix_attempts", "fixes_applied",
+            "issues_created", "recoveries", "recovery_seconds")
+
+
+def bucket_start(ts: datetime, granularity: str) -> datetime:
+    if granularity == "hour":
+        return ts.replace(minute=0, second=0, microsecond=0)
+    return ts.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def result_counters(result: dict, recovery_seconds: float = None) -> dict:
+    status = result.get("status")
+    analysis = result.get("analysis_data") or {}
+    counters = {
+        "runs": 1,
+        "successes": int(status == "success"),
+        "failures": int(status == "failure"),
+        "errors": int(status not in ("success", "failure")),
+        "fix_attempts": int(bool(analysis.get("is_fixable"))),
+        "fixes_applied": int(bool(result.get("fix_applied"))),
+        # Repeat failures comment on the existing issue instead of opening one
+        "issues_created": int(bool(result.get("issue_url")) and not result.get("issue_comment_url"))
+    }
+    if recovery_seconds is not None:
+        counters["recoveries"] = 1
+        counters["recovery_seconds"] = recovery_seconds
+    return counters
+
+
+def ensure_indexes(collection):
+    collection.create_index(
+        [("repo_id", ASCENDING), ("granularity", ASCENDING), ("bucket", ASCENDING)],
+        unique=True
+    )
+
+
+def record_result(collection, repo_id, result: dict, recovery_seconds: float = None):
+    """Add one monitoring result to the hourly and daily buckets of its repo and of the fleet.
+
+    Fleet-wide buckets are stored with repo_id None so trend queries never
+    have to aggregate across repositories.
+    """
+    counters = result_counters(result, recovery_seconds)
+    ts = result.get("timestamp") or datetime.now()
+    collection.bulk_write([
+        UpdateOne(
+            {"repo_id": key, "granularity": granularity, "bucket": bucket_start(ts, granularity)},
+            {"$inc": counters},
+            upsert=True
+        )
+        for key in (repo_id, None)
+        for granularity in GRANULARITIES
+    ], ordered=False)
+
+
+def rebuild(results_collection, collection, since: datetime = None):
+    """Recompute buckets from raw monitoring results, e.g. to backfill history.
+
+    Buckets older than `since` are left untouched. Recovery time is measured
+    from a repository's first failure to its next success, so the scan starts
+    a day before `since` to pick up failures that were still open.
+    """
+    query = {}
+    if since:
+        since = bucket_start(since, "day")
+        query["timestamp"] = {"$gte": since - timedelta(days=1)}
+
+    buckets = {}
+    failing_since = {}
+    for result in results_collection.find(query).sort([("timestamp", ASCENDING)]):
+        repo_id = result["repo_id"]
+        ts = result.get("timestamp")
+        if ts is None:
+            continue
+
+        recovery_seconds = None
+        if result.get("status") == "failure":
+            failing_since.setdefault(repo_id, ts)
+        elif result.get("status") == "success" and repo_id in failing_since:
+            recovery_seconds = (ts - failing_since.pop(repo_id)).total_seconds()
+
+        if since and ts < since:
+            continue
+        counters = result_counters(result, recovery_seconds)
+        # A downsampled record stands for several identical successful runs
+        extra = (result.get("occurrences") or 1) - 1
+        counters["runs"] += extra
+        counters["successes"] += extra
+        for key in (repo_id, None):
+            for granularity in GRANULARITIES:
+                bucket = buckets.setdefault((key, granularity, bucket_start(ts, granularity)), {})
+                for name, value in counters.items():
+                    bucket[name] = bucket.get(name, 0) + value
+
+    if since:
+        collection.delete_many({"bucket": {"$gte": since}})
+    else:
+        collection.delete_many({})
+    if buckets:
+        collection.bulk_write([
+            ReplaceOne(
+                {"repo_id": key, "granularity": granularity, "bucket": bucket},
+                {"repo_id": key, "granularity": granularity, "bucket": bucket, **counters},
+                upsert=True
+            )
+            for (key, granularity, bucket), counters in buckets.items()
+        ], ordered=False)
+    return len(buckets)
+
+
+def trend_point(doc: dict) -> dict:
+    runs = doc.get("runs", 0)
+    fix_attempts = doc.get("fix_attempts", 0)
+    recoveries = doc.get("recoveries", 0)
+    point = {"bucket": doc["bucket"], **{name: doc.get(name, 0) for name in COUNTERS}}
+    point["failure_rate"] = doc.get("failures", 0) / runs if runs else 0.0
+    point["fix_success_rate"] = doc.get("fixes_applied", 0) / fix_attempts if fix_attempts else None
+    point["mttr_seconds"] = doc.get("recovery_seconds", 0) / recoveries if recoveries else None
+    return point
@@ -0,0 +1,151 @@
+# src/utils/tracing.py
+import atexit
+import logging
+from contextlib import contextmanager
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+_tracer = None
+
+# Mongo commands that get a span; reads are covered by the spans of the code issuing them
+TRACED_MONGO_COMMANDS = {"insert", "update", "delete", "findAndModify"}
+
+
+def setup_tracing(exporter: str, service_name: str, file_path: str = "traces.jsonl") -> bool:
+    """Install the OpenTelemetry tracer. `exporter` is off, file (JSON lines) or otlp.
+
+    The OTLP exporter sends over HTTP to OTEL_EXPORTER_OTLP_ENDPOINT (a local
+    collector at localhost:4318 by default). The SDK is an optional dependency;
+    without it tracing stays off and every helper here is a no-op.
+    """
+    global _tracer
+    if exporter == "off":
+        return False
+    try:
+        from opentelemetry import trace
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    except ImportError:
+        logger.warning(f"TRACING_EXPORTER={exporter} but opentelemetry-sdk is not installed; tracing disabled")
+        return False
+
+    if exporter == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        span_exporter = OTLPSpanExporter()
+    elif exporter == "file":
+        out = open(file_path, "a", encoding="utf-8")
+        span_exporter = ConsoleSpanExporter(out=out, formatter=lambda span: span.to_json(indent=None) + "\n")
+    else:
+        raise ValueError(f"Unknown tracing exporter '{exporter}', expected off, file or otlp")
+
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    provider.add_span_processor(BatchSpanProcessor(span_exporter))
+    trace.set_tracer_provider(provider)
+    # Flush buffered spans on exit
+    atexit.register(provider.shutdown)
+    _tracer = trace.get_tracer("cicd-monitor")
+    logger.info(f"Tracing enabled ({exporter} exporter)")
+    return True
+
+
+def enabled() -> bool:
+    return _tracer is not None
+
+
+def _clean(attributes: Optional[dict]) -> dict:
+    # OpenTelemetry accepts only primitive attribute values
+    return {key: value if isinstance(value, (str, bool, int, float)) else str(value)
+            for key, value in (attributes or {}).items() if value is not None}
+
+
+@contextmanager
+def span(name: str, attributes: dict = None):
+    """Child span of the current one around the block; yields None while tracing is off."""
+    if _tracer is None:
+        yield None
+        return
+    with _tracer.start_as_current_span(name, attributes=_clean(attributes)) as current:
+        yield current
+
+
+def set_attributes(attributes: dict):
+    """Add attributes to the current span."""
+    if _tracer is None:
+        return
+    from opentelemetry import trace
+    trace.get_current_span().set_attributes(_clean(attributes))
+
+
+def current_trace_id() -> Optional[str]:
+    """Hex trace ID of the current span, for storing next to the results it produced."""
+    if _tracer is None:
+        return None
+    from opentelemetry import trace
+    context = trace.get_current_span().get_span_context()
+    return format(context.trace_id, "032x") if context.is_valid else None
+
+
+def inject() -> dict:
+    """W3C trace headers for the current span, to continue the trace in a queue worker."""
+    if _tracer is None:
+        return {}
+    from opentelemetry.propagate import inject as inject_context
+    carrier = {}
+    inject_context(carrier)
+    return carrier
+
+
+@contextmanager
+def attach(carrier: Optional[dict]):
+    """Continue the trace described by `carrier` (from inject()) inside the block."""
+    if _tracer is None or not carrier:
+        yield
+        return
+    from opentelemetry import context
+    from opentelemetry.propagate import extract
+    token = context.attach(extract(carrier))
+    try:
+        yield
+    finally:
+        context.detach(token)
+
+
+def mongo_listeners() -> list:
+    """pymongo event listeners that trace write commands; empty while tracing is off."""
+    if _tracer is None:
+        return []
+    from pymongo import monitoring
+    from opentelemetry.trace import Status, StatusCode
+
+    class MongoCommandTracer(monitoring.CommandListener):
+        # pymongo reports commands on the calling thread, so spans nest under the current one
+        def __init__(self):
+            self._spans = {}
+
+        def started(self, event):
+            if event.command_name not in TRACED_MONGO_COMMANDS:
+                return
+            self._spans[event.connection_id, event.request_id] = _tracer.start_span(
+                f"mongo.{event.command_name}",
+                attributes=_clean({
+                    "db.system": "mongodb",
+                    "db.name": event.database_name,
+                    "db.operation": event.command_name,
+                    "db.mongodb.collection": event.command.get(event.command_name)
+                })
+            )
+
+        def succeeded(self, event):
+            current = self._spans.pop((event.connection_id, event.request_id), None)
+            if current:
+                current.end()
+
+        def failed(self, event):
+            current = self._spans.pop((event.connection_id, event.request_id), None)
+            if current:
+                current.set_status(Status(StatusCode.ERROR, str(event.failure)))
+                current.end()
+
+    return [MongoCommandTracer()]
@@ -0,0 +1,88 @@
+# src/utils/workflow_cache.py
+import threading
+from collections import OrderedDict
+
+
+class WorkflowFileCache:
+    """LRU cache of decoded workflow files per repository.
+
+    Files are keyed by (repository, path) and carry their git blob SHA and the
+    ETag of the contents response, so callers can revalidate with a conditional
+    request (a 304 costs no rate limit) or skip the fetch when a directory
+    listing reports the same SHA. The workflow path of a run never changes, so
+    run_id -> path is cached without validation; default branches change so
+    rarely that they are kept until a commit against one fails.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._files = OrderedDict()
+        self._run_paths = OrderedDict()
+        self._default_branches = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _touch(self, store: OrderedDict, key, value=None):
+        if value is not None:
+            store[key] = value
+        store.move_to_end(key)
+        while len(store) > self.max_entries:
+            store.popitem(last=False)
+
+    def get(self, repo: str, path: str):
+        """Return {"sha", "etag", "content"} for a file, or None."""
+        with self._lock:
+            entry = self._files.get((repo, path))
+            if entry:
+                self._touch(self._files, (repo, path))
+            return entry
+
+    def put(self, repo: str, path: str, sha: str, etag: str, content: str):
+        with self._lock:
+            self._touch(self._files, (repo, path), {"sha": sha, "etag": etag, "content": content})
+
+    def record(self, hit: bool):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def invalidate(self, repo: str, path: str):
+        with self._lock:
+            self._files.pop((repo, path), None)
+
+    def get_run_path(self, repo: str, run_id: int):
+        with self._lock:
+            return self._run_paths.get((repo, run_id))
+
+    def put_run_path(self, repo: str, run_id: int, path: str):
+        with self._lock:
+            self._touch(self._run_paths, (repo, run_id), path)
+
+    def get_default_branch(self, repo: str):
+        with self._lock:
+            return self._default_branches.get(repo)
+
+    def put_default_branch(self, repo: str, branch: str):
+        with self._lock:
+            self._touch(self._default_branches, repo, branch)
+
+    def invalidate_default_branch(self, repo: str):
+        with self._lock:
+            self._default_branches.pop(repo, None)
+
+    def stats(self) -> dict:
+        return {"files": len(self._files), "runs": len(self._run_paths), "hits": self.hits, "misses": self.misses}
+
+
+_cache = None
+
+
+def get_workflow_cache() -> WorkflowFileCache:
+    global _cache
+    if _cache is None:
+        from src.utils.config import Config
+        _cache = WorkflowFileCache(Config.WORKFLOW_CACHE_MAX_ENTRIES)
+    return _cache
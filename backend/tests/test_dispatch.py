@@ -0,0 +1,142 @@
+import time
+import threading
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from src.llm.dispatch import LLMDispatcher
+from src.utils.deadline import Deadline, RunCancelled
+
+
+class RateLimited(Exception):
+    status_code = 429
+
+    class response:
+        headers = {"retry-after": "30"}
+
+
+class GatedModel:
+    """Rate-limits its first call once `release` is set, then answers every call."""
+
+    model_name = "gated"
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = 0
+
+    def invoke(self, messages, **kwargs):
+        self.calls += 1
+        if self.calls == 1:
+            self.release.wait(5)
+            raise RateLimited("Rate limit reached")
+        return AIMessage(content="shared answer")
+
+
+def wait_until(condition, timeout=5):
+    stop = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < stop, "timed out"
+        time.sleep(0.01)
+
+
+def test_cancelling_the_run_making_a_shared_call_does_not_fail_its_waiters():
+    dispatcher = LLMDispatcher(max_concurrency=2, max_retries=3, base_delay=0.1, max_delay=0.1)
+    model = GatedModel()
+    messages = [HumanMessage(content="same prompt")]
+    owner_deadline, waiter_deadline = Deadline(), Deadline()
+    results = {}
+
+    def run(name, deadline):
+        try:
+            results[name] = dispatcher.invoke(model, messages, deadline=deadline)
+        except BaseException as e:
+            results[name] = e
+
+    owner = threading.Thread(target=run, args=("owner", owner_deadline))
+    owner.start()
+    wait_until(lambda: model.calls == 1)
+    waiter = threading.Thread(target=run, args=("waiter", waiter_deadline))
+    waiter.start()
+    wait_until(lambda: dispatcher.stats["coalesced"] == 1)
+
+    # The owner backs off after the 429 and is cancelled while it waits
+    model.release.set()
+    wait_until(lambda: dispatcher.stats["retries"] == 1)
+    owner_deadline.cancel()
+    owner.join(5)
+    waiter.join(5)
+
+    assert isinstance(results["owner"], RunCancelled)
+    response, coalesced = results["waiter"]
+    assert response.content == "shared answer"
+    assert coalesced is False
+    assert model.calls == 2
+
+
+def test_provider_errors_reach_every_run_sharing_the_call():
+    dispatcher = LLMDispatcher(max_concurrency=2, max_retries=0, base_delay=0.1, max_delay=0.1)
+    model = GatedModel()
+    messages = [HumanMessage(content="same prompt")]
+    results = {}
+
+    def run(name):
+        try:
+            results[name] = dispatcher.invoke(model, messages, deadline=Deadline())
+        except BaseException as e:
+            results[name] = e
+
+    threads = [threading.Thread(target=run, args=(name,)) for name in ("owner", "waiter")]
+    threads[0].start()
+    wait_until(lambda: model.calls == 1)
+    threads[1].start()
+    wait_until(lambda: dispatcher.stats["coalesced"] == 1)
+    model.release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert isinstance(results["owner"], RateLimited)
+    assert isinstance(results["waiter"], RateLimited)
+    assert model.calls == 1
+
+
+class GatedStreamModel:
+    """Streams its answer in two chunks, holding the second until `release` is set."""
+
+    model_name = "gated-stream"
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.calls = 0
+
+    def stream(self, messages, **kwargs):
+        self.calls += 1
+        yield AIMessage(content='{"answer": ')
+        self.release.wait(5)
+        yield AIMessage(content='"shared"}')
+
+
+def test_identical_streams_share_one_call():
+    dispatcher = LLMDispatcher(max_concurrency=2, max_retries=0, base_delay=0.1, max_delay=0.1)
+    model = GatedStreamModel()
+    messages = [HumanMessage(content="same prompt")]
+    seen = {"owner": [], "waiter": []}
+    results = {}
+
+    def run(name):
+        results[name] = dispatcher.stream(model, messages, lambda text: seen[name].append(text),
+                                          deadline=Deadline())
+
+    threads = [threading.Thread(target=run, args=(name,)) for name in ("owner", "waiter")]
+    threads[0].start()
+    wait_until(lambda: seen["owner"])
+    threads[1].start()
+    wait_until(lambda: dispatcher.stats["coalesced"] == 1)
+    model.release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert model.calls == 1
+    owner_response, _, owner_coalesced = results["owner"]
+    waiter_response, _, waiter_coalesced = results["waiter"]
+    assert owner_response.content == waiter_response.content == '{"answer": "shared"}'
+    assert (owner_coalesced, waiter_coalesced) == (False, True)
+    # The joining run's consumer still sees the whole answer once
+    assert seen["waiter"] == ['{"answer": "shared"}']
@@ -6,6 +6,7 @@ import Dashboard from './pages/Dashboard';
 import Repositories from './pages/Repositories';
 import RepositoryDetail from './pages/RepositoryDetail';
 import MonitoringResults from './pages/MonitoringResults';
+import Incidents from './pages/Incidents';
 import Settings from './pages/Settings';
 import AddRepository from './pages/AddRepository';
 
@@ -25,6 +26,7 @@ function App() {
               <Route path="/repositories/add" element={<AddRepository />} />
               <Route path="/repositories/:id" element={<RepositoryDetail />} />
               <Route path="/monitoring" element={<MonitoringResults />} />
+              <Route path="/incidents" element={<Incidents />} />
               <Route path="/settings" element={<Settings />} />
             </Routes>
           </main>
@@ -4,6 +4,7 @@ import {
   LayoutDashboard, 
   GitBranch, 
   Activity, 
+  Layers,
   Settings,
   Plus 
 } from 'lucide-react';
@@ -12,6 +13,7 @@ const navigation = [
   { name: 'Dashboard', href: '/', icon: LayoutDashboard },
   { name: 'Repositories', href: '/repositories', icon: GitBranch },
   { name: 'Monitoring', href: '/monitoring', icon: Activity },
+  { name: 'Incidents', href: '/incidents', icon: Layers },
   { name: 'Settings', href: '/settings', icon: Settings },
 ];
 
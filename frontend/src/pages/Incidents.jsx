@@ -0,0 +1,110 @@
+// src/pages/Incidents.jsx
+import { Link } from 'react-router-dom';
+import { Layers, GitBranch, Clock } from 'lucide-react';
+import Button from '../components/UI/Button';
+import { useApi } from '../hooks/useApi';
+import { incidentsAPI } from '../services/api';
+
+const Incidents = () => {
+  const { data, loading, error, refetch } = useApi(() => incidentsAPI.getAll(2, 50));
+
+  const incidents = data?.incidents || [];
+  const index = data?.index;
+
+  if (loading && !data) {
+    return (
+      <div className="flex items-center justify-center h-64">
+        <div className="animate-spin rounded-full h-12 w-12 border-b-2 border-blue-600"></div>
+      </div>
+    );
+  }
+
+  return (
+    <div className="space-y-6">
+      <div className="flex justify-between items-center">
+        <div>
+          <h1 className="text-3xl font-bold text-gray-900">Incidents</h1>
+          <p className="text-sm text-gray-500 mt-1">
+            Failures with near-identical logs across repositories, analyzed once
+          </p>
+        </div>
+        <Button onClick={refetch} loading={loading}>
+          Refresh
+        </Button>
+      </div>
+
+      {index && (
+        <div className="grid grid-cols-1 md:grid-cols-3 gap-4">
+          <div className="card p-4 text-center">
+            <div className="text-2xl font-bold text-gray-900">{incidents.length}</div>
+            <div className="text-sm text-gray-500">Shared Incidents</div>
+          </div>
+          <div className="card p-4 text-center">
+            <div className="text-2xl font-bold text-green-600">{index.hits}</div>
+            <div className="text-sm text-gray-500">Analyses Reused</div>
+          </div>
+          <div className="card p-4 text-center">
+            <div className="text-2xl font-bold text-blue-600">{Math.round(index.hit_rate * 100)}%</div>
+            <div className="text-sm text-gray-500">Lookup Hit Rate</div>
+          </div>
+        </div>
+      )}
+
+      {error && (
+        <div className="card p-4 bg-red-50 border border-red-200 text-red-800">{error}</div>
+      )}
+
+      {incidents.length === 0 ? (
+        <div className="card p-12 text-center">
+          <Layers className="w-12 h-12 text-gray-400 mx-auto mb-4" />
+          <p className="text-gray-500">No failure has hit more than one repository recently</p>
+        </div>
+      ) : (
+        <div className="space-y-4">
+          {incidents.map(incident => (
+            <div key={incident.id} className="card p-6">
+              <div className="flex justify-between items-start">
+                <div className="flex-1 min-w-0">
+                  <h3 className="text-lg font-semibold text-gray-900">
+                    {incident.root_cause || 'Unknown root cause'}
+                  </h3>
+                  {incident.error_message && (
+                    <p className="text-sm font-mono text-gray-600 mt-1 truncate">{incident.error_message}</p>
+                  )}
+                </div>
+                <div className="text-right ml-4">
+                  <div className="text-2xl font-bold text-red-600">{incident.repo_count}</div>
+                  <div className="text-xs text-gray-500">repositories</div>
+                </div>
+              </div>
+
+              <div className="flex flex-wrap gap-2 mt-4">
+                {incident.repos.map(repo => (
+                  <Link
+                    key={repo.id}
+                    to={`/repositories/${repo.id}`}
+                    className="inline-flex items-center px-2 py-1 rounded bg-gray-100 text-sm text-gray-700 hover:bg-gray-200"
+                  >
+                    <GitBranch className="w-3 h-3 mr-1" />
+                    {repo.name || repo.id}
+                  </Link>
+                ))}
+              </div>
+
+              <div className="flex items-center space-x-4 mt-4 text-xs text-gray-500">
+                {incident.job_name && <span>Job: {incident.job_name}</span>}
+                <span>{incident.hits} analyses reused</span>
+                <span className="inline-flex items-center">
+                  <Clock className="w-3 h-3 mr-1" />
+                  Last seen {new Date(incident.last_seen).toLocaleString()}
+                </span>
+              </div>
+            </div>
+          ))}
+        </div>
+      )}
+    </div>
+  );
+};
+
+export default Incidents;
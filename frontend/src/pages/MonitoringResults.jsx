@@ -281,6 +281,11 @@ const MonitoringResults = () => {
                         <Calendar className="w-4 h-4 inline mr-1" />
                         {new Date(result.timestamp).toLocaleString()}
                       </span>
+                      {result.occurrences > 1 && (
+                        <span className="text-xs text-gray-500">
+                          ×{result.occurrences}, last {new Date(result.last_seen).toLocaleString()}
+                        </span>
+                      )}
                       {result.fix_applied && (
                         <span className="inline-flex items-center px-2.5 py-0.5 rounded-full text-xs font-medium bg-green-100 text-green-800">
                           Fix Applied
@@ -323,6 +328,17 @@ const MonitoringResults = () => {
                     </div>
                     
                     <div className="flex items-center space-x-2">
+                      {result.pr_url && (
+                        <a 
+                          href={result.pr_url} 
+                          target="_blank" 
+                          rel="noopener noreferrer"
+                          className="text-blue-600 hover:text-blue-800 text-sm"
+                        >
+                          <ExternalLink className="w-4 h-4 inline mr-1" />
+                          View PR
+                        </a>
+                      )}
                       {result.issue_url && (
                         <a 
                           href={result.issue_url} 
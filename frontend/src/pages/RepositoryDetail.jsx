@@ -19,7 +19,7 @@ import {
 import Button from '../components/UI/Button';
 import StatusBadge from '../components/UI/StatusBadge';
 import { useApi } from '../hooks/useApi';
-import { repositoriesAPI } from '../services/api';
+import { repositoriesAPI, monitoringAPI } from '../services/api';
 
 const RepositoryDetail = () => {
   const { id } = useParams();
@@ -38,6 +38,7 @@ const RepositoryDetail = () => {
   
   const [actionLoading, setActionLoading] = useState(false);
   const [monitoringStatus, setMonitoringStatus] = useState('idle');
+  const [runProgress, setRunProgress] = useState(null);
 
   const repository = repoData;
   const results = resultsData?.results || [];
@@ -72,14 +73,32 @@ const RepositoryDetail = () => {
     
     setActionLoading(true);
     setMonitoringStatus('monitoring');
+    setRunProgress(null);
     try {
+      const triggeredAt = Date.now();
       await repositoriesAPI.triggerMonitoring(id);
-      // Refetch results after a short delay
-      setTimeout(() => {
-        refetchResults();
-        setMonitoringStatus('completed');
-        setTimeout(() => setMonitoringStatus('idle'), 2000);
-      }, 3000);
+      // Poll the run for live progress until it finishes (or give up after two minutes)
+      const poll = setInterval(async () => {
+        let run = null;
+        try {
+          const response = await monitoringAPI.getRuns(id, 1);
+          run = response.data.runs[0];
+        } catch (error) {
+          console.error('Error polling monitoring run:', error);
+        }
+        const current = run && new Date(run.resumed_at || run.started_at).getTime() >= triggeredAt - 5000;
+        if (current && run.status === 'running') {
+          setRunProgress(run.progress || null);
+          return;
+        }
+        if (current || Date.now() - triggeredAt > 120000) {
+          clearInterval(poll);
+          setRunProgress(null);
+          refetchResults();
+          setMonitoringStatus(current && ['failed', 'timeout', 'cancelled'].includes(run.status) ? 'error' : 'completed');
+          setTimeout(() => setMonitoringStatus('idle'), 2000);
+        }
+      }, 1000);
     } catch (error) {
       console.error('Error triggering monitoring:', error);
       setMonitoringStatus('error');
@@ -119,6 +138,12 @@ const RepositoryDetail = () => {
   const getMonitoringStatusMessage = () => {
     switch (monitoringStatus) {
       case 'monitoring':
+        if (runProgress?.analysis?.root_cause) {
+          return `Analyzing: ${runProgress.analysis.root_cause}`;
+        }
+        if (runProgress?.node) {
+          return `Monitoring in progress (${runProgress.node.replace(/_/g, ' ')})...`;
+        }
         return 'Monitoring in progress...';
       case 'completed':
         return 'Monitoring completed!';
@@ -368,6 +393,11 @@ const RepositoryDetail = () => {
                     <span className="text-sm text-gray-500">
                       {new Date(result.timestamp).toLocaleString()}
                     </span>
+                    {result.occurrences > 1 && (
+                      <span className="text-xs text-gray-500">
+                        ×{result.occurrences}, last {new Date(result.last_seen).toLocaleString()}
+                      </span>
+                    )}
                   </div>
                   {result.fix_applied && (
                     <span className="inline-flex items-center px-2.5 py-0.5 rounded-full text-xs font-medium bg-green-100 text-green-800">
@@ -407,6 +437,20 @@ const RepositoryDetail = () => {
                     </div>
                   )}
                   
+                  {result.pr_url && (
+                    <div>
+                      <span className="font-medium text-gray-700">Pull Request:</span>
+                      <a 
+                        href={result.pr_url} 
+                        target="_blank" 
+                        rel="noopener noreferrer"
+                        className="ml-2 text-blue-600 hover:text-blue-800"
+                      >
+                        View PR
+                      </a>
+                    </div>
+                  )}
+                  
                   {result.issue_url && (
                     <div>
                       <span className="font-medium text-gray-700">Issue:</span>
@@ -153,6 +153,18 @@ export const monitoringAPI = {
     return { data: { results } };
   },
 
+  // Monitoring runs, newest first; a running one carries live progress
+  getRuns: async (repoId, limit = 1) => {
+    const response = await api.get('/monitoring/runs', {
+      params: { repo_id: repoId, limit }
+    });
+    const runs = response.data.map(run => ({
+      ...run,
+      id: run._id || run.id
+    }));
+    return { data: { runs } };
+  },
+
   // Additional monitoring methods if needed
   getResultsByRepo: async (repoId, limit = 50) => {
     const response = await api.get(`/repositories/${repoId}/results`, {
@@ -167,6 +179,20 @@ export const monitoringAPI = {
   }
 };
 
+// Failures shared by several repositories, analyzed once
+export const incidentsAPI = {
+  getAll: async (minRepos = 2, limit = 50) => {
+    const response = await api.get('/incidents', {
+      params: { min_repos: minRepos, limit }
+    });
+    const incidents = response.data.incidents.map(incident => ({
+      ...incident,
+      id: incident._id || incident.id
+    }));
+    return { data: { incidents, index: response.data.index } };
+  }
+};
+
 // Scheduler API for checking status
 export const schedulerAPI = {
   getStatus: async () => {